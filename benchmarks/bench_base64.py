@@ -0,0 +1,67 @@
+# -*- coding:utf-8 -*-
+import io
+import os
+import json
+import base64
+import shutil
+import tempfile
+from unittest import mock
+
+from benchmarks.runner import benchmark
+from benchmarks.stub_agent import StubAgent
+from controller.action_config import setting
+from controller.common.stream import StreamTool
+from controller.action.Endpoint_Action import Endpoint_Action
+
+SIZES = {"1MiB": 1024 * 1024, "16MiB": 16 * 1024 * 1024}
+
+
+@benchmark(params=list(SIZES))
+def send_file_to_agent(size: str):
+    folder = tempfile.mkdtemp(prefix="bond-bench-")
+    path = os.path.join(folder, "payload.bin")
+    with open(path, "wb") as f:
+        f.write(os.urandom(SIZES[size]))
+
+    try:
+        with StubAgent() as agent:
+            yield (
+                lambda: Endpoint_Action.send_file_to_agent(
+                    agent.host, path, "/tmp/payload.bin", agent.port, mode="json"
+                ),
+                SIZES[size],
+            )
+    finally:
+        shutil.rmtree(folder)
+
+
+@benchmark(params=list(SIZES))
+def get_physical_file(size: str):
+    folder = tempfile.mkdtemp(prefix="bond-bench-")
+
+    try:
+        with StubAgent() as agent, mock.patch.object(setting, "DOWNLOAD_PATH", folder):
+            agent.add_file("/tmp/payload.bin", os.urandom(SIZES[size]))
+            yield (
+                lambda: Endpoint_Action.get_physical_file(
+                    agent.host, "/tmp/payload.bin", "bench", agent.port
+                ),
+                SIZES[size],
+            )
+    finally:
+        shutil.rmtree(folder)
+
+
+@benchmark(params=list(SIZES))
+def extract_json_base64(size: str):
+    content = os.urandom(SIZES[size])
+    body = json.dumps(
+        {"filename": "payload.bin", "file_base64": base64.b64encode(content).decode()}
+    ).encode()
+    chunk_size = setting.DOWNLOAD_CHUNK_SIZE
+
+    def run() -> None:
+        chunks = (body[i : i + chunk_size] for i in range(0, len(body), chunk_size))
+        StreamTool.extract_json_base64(chunks, "file_base64", io.BytesIO())
+
+    yield run, SIZES[size]
@@ -0,0 +1,34 @@
+# -*- coding:utf-8 -*-
+import logging
+
+from benchmarks.runner import benchmark
+from controller.common.logger.logger_format import ColoredFormatter
+
+RECORDS = 10000
+
+
+class _TtyStream:
+    def isatty(self) -> bool:
+        return True
+
+
+@benchmark(params=["colored", "plain"])
+def colored_formatter(mode: str):
+    formatter = ColoredFormatter(
+        "%(asctime)s %(name)s [%(levelname)s] %(message)s",
+        "%Y-%m-%d %H:%M:%S",
+        use_colors=mode == "colored",
+        stream=_TtyStream() if mode == "colored" else None,
+    )
+    records = [
+        logging.LogRecord(
+            "Bond Controller", logging.INFO, __file__, 1, "message %d", (i,), None
+        )
+        for i in range(RECORDS)
+    ]
+
+    def run() -> None:
+        for record in records:
+            formatter.format(record)
+
+    yield run
@@ -0,0 +1,33 @@
+# -*- coding:utf-8 -*-
+from benchmarks.runner import benchmark
+from benchmarks.stub_agent import StubAgent
+from controller.action.common.response import ResponseMethod
+
+REQUESTS = 100
+
+
+@benchmark(params=["get_text", "get_json", "post_text"])
+def round_trip(method: str):
+    """
+    每次計時 REQUESTS 個請求，反映 session pool 與 log 的成本
+    """
+    with StubAgent() as agent:
+        agent.add_file("/tmp/small.txt", b"x" * 1024)
+        base = f"http://{agent.host}:{agent.port}"
+        calls = {
+            "get_text": lambda: ResponseMethod.get_text(f"{base}/bond_info/"),
+            "get_json": lambda: ResponseMethod.get_json(
+                f"{base}/get_physical_file?target=/tmp/small.txt"
+            ),
+            "post_text": lambda: ResponseMethod.post_text(
+                f"{base}/upload_file/",
+                json={"target": "/tmp/small.txt", "file_content": "eHh4"},
+            ),
+        }
+        call = calls[method]
+
+        def run() -> None:
+            for _ in range(REQUESTS):
+                call()
+
+        yield run
@@ -0,0 +1,75 @@
+# -*- coding:utf-8 -*-
+import os
+import random
+import shutil
+import tempfile
+
+from benchmarks.runner import benchmark
+from controller.common.zip.zip import ZipTool
+
+# 名稱 -> (資料夾深度, 每層資料夾數, 每個資料夾的檔案數, 檔案大小, 可壓縮)
+SHAPES = {
+    "many_small": (1, 20, 100, 1024, True),
+    "few_large": (0, 0, 4, 8 * 1024 * 1024, True),
+    "deep": (8, 2, 4, 16 * 1024, True),
+    "incompressible": (0, 0, 4, 4 * 1024 * 1024, False),
+}
+
+WORDS = [b"bond", b"agent", b"controller", b"upload", b"folder", b"zip", b"\n"]
+
+
+def make_tree(path: str, shape: str) -> int:
+    """
+    Create synthetic directory tree.
+
+    :param path: [str] 建立的資料夾
+    :param shape: [str] SHAPES 的名稱
+    :return: [int] 檔案總大小
+    """
+    depth, fanout, files, size, compressible = SHAPES[shape]
+    rand = random.Random(shape)
+    total = 0
+
+    def content() -> bytes:
+        if not compressible:
+            return rand.getrandbits(size * 8).to_bytes(size, "little")
+        data = b" ".join(rand.choice(WORDS) for _ in range(size // 4))
+        return data[:size]
+
+    def fill(folder: str, level: int) -> None:
+        nonlocal total
+        os.makedirs(folder, exist_ok=True)
+        for index in range(files):
+            data = content()
+            with open(os.path.join(folder, f"file_{index}.txt"), "wb") as f:
+                f.write(data)
+            total += len(data)
+        if level < depth:
+            for index in range(fanout):
+                fill(os.path.join(folder, f"dir_{index}"), level + 1)
+
+    fill(path, 0)
+
+    return total
+
+
+def _zip_dir(shape: str, parallel: bool):
+    folder = tempfile.mkdtemp(prefix="bond-bench-")
+    try:
+        size = make_tree(folder, shape)
+        yield (
+            lambda: ZipTool.zip_dir(folder, use_cache=False, parallel=parallel),
+            size,
+        )
+    finally:
+        shutil.rmtree(folder)
+
+
+@benchmark(params=list(SHAPES))
+def zip_dir(shape: str):
+    yield from _zip_dir(shape, parallel=False)
+
+
+@benchmark(params=["many_small", "few_large"])
+def zip_dir_parallel(shape: str):
+    yield from _zip_dir(shape, parallel=True)
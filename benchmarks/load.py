@@ -0,0 +1,356 @@
+# -*- coding:utf-8 -*-
+"""
+負載測試：啟動多個 StubAgent 模擬 agent，透過 Fleet_Action 同時對所有 agent 執行
+Endpoint_Action 的操作，回報每個操作的 p50 / p99 延遲與吞吐量。
+
+    python -m benchmarks.load --agents 20 --rounds 5 --latency 0.02 --bandwidth 10MiB
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import shutil
+import zipfile
+import argparse
+import tempfile
+import contextlib
+from unittest import mock
+
+from benchmarks.bench_zip import make_tree
+from benchmarks.stub_agent import INJECTED_ERROR, NOT_FOUND, StubAgent
+from controller.action_config import setting
+from controller.action.Fleet_Action import Fleet_Action
+from controller.action.Endpoint_Action import Endpoint_Action
+
+REMOTE_FILE = "/tmp/bond-load/payload.bin"
+REMOTE_FOLDER = "/tmp/bond-load/folder"
+
+
+class LoadContext:
+    """
+    LoadContext 類別，負載測試使用的本機檔案與資料夾。
+    """
+
+    def __init__(self, workdir: str, file_size: int, folder_shape: str) -> None:
+        self.file_path = os.path.join(workdir, "payload.bin")
+        self.file_content = os.urandom(file_size)
+        with open(self.file_path, "wb") as f:
+            f.write(self.file_content)
+
+        self.folder_path = os.path.join(workdir, "folder")
+        self.folder_size = make_tree(self.folder_path, folder_shape)
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+            for root, _, files in os.walk(self.folder_path):
+                for name in files:
+                    path = os.path.join(root, name)
+                    zf.write(path, os.path.relpath(path, self.folder_path))
+        self.folder_zip = buffer.getvalue()
+
+        self.download_path = os.path.join(workdir, "downloads")
+        os.makedirs(self.download_path)
+
+    def clear_downloads(self) -> None:
+        for name in os.listdir(self.download_path):
+            os.remove(os.path.join(self.download_path, name))
+
+
+# 操作名稱 -> (函式(ctx, dest, port), 計算吞吐量的 agent 統計 (實際收到 / 送出的 bytes))
+OPERATIONS = {
+    "bond_info": (
+        lambda ctx, dest, port: Endpoint_Action.bond_info(dest, port),
+        None,
+    ),
+    "send_file": (
+        lambda ctx, dest, port: Endpoint_Action.send_file_to_agent(
+            dest, ctx.file_path, REMOTE_FILE, port
+        ),
+        "received_bytes",
+    ),
+    "send_folder": (
+        lambda ctx, dest, port: Endpoint_Action.send_folder_to_agent(
+            dest, ctx.folder_path, REMOTE_FOLDER, port
+        ),
+        "received_bytes",
+    ),
+    "execute_file": (
+        lambda ctx, dest, port: Endpoint_Action.execute_file(
+            dest, REMOTE_FILE, port=port
+        ),
+        None,
+    ),
+    "execute_python_folder": (
+        lambda ctx, dest, port: Endpoint_Action.execute_python_folder(
+            dest, REMOTE_FOLDER, port=port
+        ),
+        None,
+    ),
+    "submit_execute_file": (
+        lambda ctx, dest, port: Endpoint_Action.submit_execute_file(
+            dest, REMOTE_FILE, port=port
+        ).result(),
+        None,
+    ),
+    "get_physical_file": (
+        lambda ctx, dest, port: Endpoint_Action.get_physical_file(
+            dest, REMOTE_FILE, f"{dest}_{port}", port
+        ),
+        "sent_bytes",
+    ),
+    "get_physical_folder_zip": (
+        lambda ctx, dest, port: Endpoint_Action.get_physical_folder_zip(
+            dest, REMOTE_FOLDER, port
+        ),
+        "sent_bytes",
+    ),
+}
+
+# 舊版的文字回應路徑 (ResponseMethod.get_text / post_text) 遇到 HTTP 錯誤只會印出並回傳 body
+_ERROR_BODIES = {INJECTED_ERROR.decode(), NOT_FOUND.decode()}
+
+
+def checked(result):
+    """
+    Raise if result is the body of an error response swallowed by the text path.
+
+    :param result: [all] 操作的回傳值
+    :return: [all] result
+    """
+    if isinstance(result, str) and result in _ERROR_BODIES:
+        raise RuntimeError(f"HTTP error response: {result}")
+
+    return result
+
+
+def percentile(values: list, percent: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    :param values: [list] 已排序的數值
+    :param percent: [float] 0 ~ 100
+    :return: [float] 百分位數
+    """
+    if not values:
+        return float("nan")
+
+    index = max(0, min(len(values) - 1, int(-(-len(values) * percent // 100)) - 1))
+
+    return values[index]
+
+
+def run_operation(
+    name: str, ctx: LoadContext, agents: list, rounds: int, concurrency: int
+) -> dict:
+    """
+    Run operation on all agents for rounds, each round is one Fleet_Action fan-out.
+    吞吐量以 agent 實際收到 / 送出的 bytes 計算 (中斷的傳輸只計入已傳送的部分)。
+
+    :param name: [str] OPERATIONS 的名稱
+    :param ctx: [LoadContext] 測試檔案
+    :param agents: [list] StubAgent
+    :param rounds: [int] 執行的輪數
+    :param concurrency: [int] 同時執行的 agent 數
+    :return: [dict] operation, calls, errors, p50, p99, mean, max, ops_per_sec, throughput (bytes/s)
+    """
+    func, counter = OPERATIONS[name]
+    hosts = [f"{agent.host}:{agent.port}" for agent in agents]
+
+    def operation(host: str):
+        dest, port = host.rsplit(":", 1)
+        return checked(func(ctx, dest, int(port)))
+
+    def transferred() -> int:
+        return sum(agent.stats.get(counter, 0) for agent in agents) if counter else 0
+
+    latencies = []
+    errors = 0
+    wall = 0.0
+    transferred_before = transferred()
+
+    for _ in range(rounds):
+        start = time.monotonic()
+        for result in Fleet_Action.execute(
+            hosts, operation, max_workers=concurrency, host_timeout=None
+        ):
+            latencies.append(result["elapsed"])
+            errors += result["error"] is not None
+        wall += time.monotonic() - start
+        ctx.clear_downloads()
+
+    latencies.sort()
+    calls = len(latencies)
+    succeeded = calls - errors
+
+    return {
+        "operation": name,
+        "calls": calls,
+        "errors": errors,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "mean": sum(latencies) / calls if calls else float("nan"),
+        "max": latencies[-1] if latencies else float("nan"),
+        "ops_per_sec": succeeded / wall if wall else 0.0,
+        "throughput": (transferred() - transferred_before) / wall if wall else 0.0,
+    }
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse size like 512KiB / 10MiB / 1GiB / 1000.
+
+    :param text: [str] 大小
+    :return: [int] bytes
+    """
+    units = {"kib": 1024, "mib": 1024**2, "gib": 1024**3, "kb": 1000, "mb": 1000**2}
+    lower = text.strip().lower()
+    for unit, factor in units.items():
+        if lower.endswith(unit):
+            return int(float(lower[: -len(unit)]) * factor)
+
+    return int(lower)
+
+
+def report(results: list, agents: list) -> None:
+    print(
+        f"{'operation':<26} {'calls':>6} {'errors':>6} {'p50':>10} {'p99':>10}"
+        f" {'max':>10} {'ops/s':>8} {'MiB/s':>8}"
+    )
+    for result in results:
+        print(
+            f"{result['operation']:<26} {result['calls']:>6} {result['errors']:>6}"
+            f" {result['p50'] * 1000:>8.1f}ms {result['p99'] * 1000:>8.1f}ms"
+            f" {result['max'] * 1000:>8.1f}ms {result['ops_per_sec']:>8.1f}"
+            f" {result['throughput'] / 1024 / 1024:>8.2f}"
+        )
+
+    injected = sum(agent.stats.get("injected_errors", 0) for agent in agents)
+    received = sum(agent.stats.get("received_bytes", 0) for agent in agents)
+    print(
+        f"agents: {len(agents)}, injected errors: {injected},"
+        f" received: {received / 1024 / 1024:.2f}MiB"
+    )
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load",
+        description="以多個模擬 agent 對 controller 的操作進行負載測試",
+    )
+    parser.add_argument("--agents", type=int, default=10, help="模擬的 agent 數量")
+    parser.add_argument(
+        "--concurrency", type=int, help="同時執行的 agent 數 (default: --agents)"
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="每個操作執行的輪數")
+    parser.add_argument(
+        "--operations",
+        default=",".join(OPERATIONS),
+        help=f"以逗號分隔的操作 (default: 全部: {','.join(OPERATIONS)})",
+    )
+    parser.add_argument("--file-size", default="1MiB", help="傳輸檔案的大小")
+    parser.add_argument(
+        "--folder-shape", default="many_small", help="資料夾的形狀，見 bench_zip.SHAPES"
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="每個請求的延遲秒數")
+    parser.add_argument("--jitter", type=float, default=0.0, help="額外延遲的上限秒數")
+    parser.add_argument("--bandwidth", help="每個 agent 的頻寬 (ex: 10MiB)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="回傳 500 的機率")
+    parser.add_argument(
+        "--disconnect-rate", type=float, default=0.0, help="回應傳送一半時中斷的機率"
+    )
+    parser.add_argument(
+        "--execute-time", type=float, default=0.0, help="execute_* 的執行秒數"
+    )
+    parser.add_argument(
+        "--capabilities",
+        help="agent 宣告的功能，以逗號分隔 (ex: upload_file_stream)，未指定時模擬舊版 agent",
+    )
+    parser.add_argument("--seed", type=int, help="注入錯誤的亂數種子")
+    parser.add_argument("--json", dest="json_path", help="將結果寫入 JSON 檔")
+    parser.add_argument(
+        "--metrics",
+        dest="metrics_path",
+        help="記錄各階段耗時並寫入 Prometheus 格式的檔案",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="CRITICAL",
+        help="controller log 等級 (default: CRITICAL)",
+    )
+    args = parser.parse_args(argv)
+
+    operations = [name.strip() for name in args.operations.split(",") if name.strip()]
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"unknown operations: {sorted(unknown)}")
+
+    from controller.common.logger.info_logger_handle import Logger
+
+    Logger.info_logger.setLevel(args.log_level.upper())
+
+    if args.metrics_path:
+        from controller.common.metrics import Metrics
+
+        Metrics.enable()
+
+    workdir = tempfile.mkdtemp(prefix="bond-load-")
+    try:
+        ctx = LoadContext(workdir, parse_size(args.file_size), args.folder_shape)
+
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(
+                mock.patch.object(setting, "DOWNLOAD_PATH", ctx.download_path)
+            )
+            # 舊版 HTTP 錯誤只會印出，不會拋出例外，因此重導向避免洗版
+            stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+
+            agents = [
+                stack.enter_context(
+                    StubAgent(
+                        latency=args.latency,
+                        jitter=args.jitter,
+                        bandwidth=(
+                            parse_size(args.bandwidth) if args.bandwidth else None
+                        ),
+                        error_rate=args.error_rate,
+                        disconnect_rate=args.disconnect_rate,
+                        execute_time=args.execute_time,
+                        capabilities=(
+                            args.capabilities.split(",") if args.capabilities else None
+                        ),
+                        seed=None if args.seed is None else args.seed + index,
+                    )
+                )
+                for index in range(args.agents)
+            ]
+            for agent in agents:
+                agent.add_file(REMOTE_FILE, ctx.file_content)
+                agent.add_folder(REMOTE_FOLDER, ctx.folder_zip)
+
+            results = []
+            for name in operations:
+                print(f"running {name} ...", file=sys.stderr)
+                results.append(
+                    run_operation(
+                        name, ctx, agents, args.rounds, args.concurrency or args.agents
+                    )
+                )
+
+        report(results, agents)
+    finally:
+        shutil.rmtree(workdir)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+    if args.metrics_path:
+        Metrics.write_prometheus(args.metrics_path)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+# -*- coding:utf-8 -*-
+import gc
+import re
+import sys
+import json
+import time
+import argparse
+import importlib
+import pkgutil
+import statistics
+import tracemalloc
+from typing import Callable, Iterable
+
+BENCHMARKS = []
+
+
+class Benchmark:
+    """
+    Benchmark 類別，一個 (函式, 參數) 的效能測試。
+    函式為 generator：yield 前為準備工作 (不計時)，yield 要計時的 callable，
+    或 (callable, 每次處理的 bytes)；yield 之後為清理工作。
+    """
+
+    def __init__(self, func: Callable, param=None, rounds: int = 5) -> None:
+        self.func = func
+        self.param = param
+        self.rounds = rounds
+        self.name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}" + (
+            f"[{param}]" if param is not None else ""
+        )
+
+    def run(self, rounds: int = None) -> dict:
+        """
+        Run benchmark, each round is timed separately, peak memory is measured
+        in an extra round with tracemalloc (tracemalloc slows down the code).
+
+        :param rounds: [int] 計時的次數 (default: 建立時指定的次數)
+        :return: [dict] name, rounds, min, median, mean, peak_memory, throughput (bytes/s)
+        """
+        fixture = self.func() if self.param is None else self.func(self.param)
+        target = next(fixture)
+        target, nbytes = target if isinstance(target, tuple) else (target, None)
+
+        try:
+            # 暖機，排除第一次 import / 連線等成本
+            target()
+
+            times = []
+            for _ in range(rounds or self.rounds):
+                gc.collect()
+                start = time.perf_counter()
+                target()
+                times.append(time.perf_counter() - start)
+
+            gc.collect()
+            tracemalloc.start()
+            try:
+                target()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        finally:
+            fixture.close()
+
+        median = statistics.median(times)
+
+        return {
+            "name": self.name,
+            "rounds": len(times),
+            "min": min(times),
+            "median": median,
+            "mean": statistics.mean(times),
+            "peak_memory": peak,
+            "throughput": nbytes / median if nbytes and median else None,
+        }
+
+
+def benchmark(params: Iterable = None, rounds: int = 5) -> Callable:
+    """
+    註冊效能測試的 decorator
+
+    :param params: [Iterable] 每個參數各自執行一次測試 (default: None)
+    :param rounds: [int] 計時的次數 (default: 5)
+    :return: [Callable] decorator
+    """
+
+    def decorator(func: Callable) -> Callable:
+        for param in params if params is not None else [None]:
+            BENCHMARKS.append(Benchmark(func, param, rounds))
+        return func
+
+    return decorator
+
+
+def discover() -> list:
+    """
+    Import all benchmarks/bench_*.py modules.
+
+    :return: [list] 已註冊的 Benchmark
+    """
+    package = importlib.import_module("benchmarks")
+    for module in pkgutil.iter_modules(package.__path__):
+        if module.name.startswith("bench_"):
+            importlib.import_module(f"benchmarks.{module.name}")
+
+    return BENCHMARKS
+
+
+def _format_size(size: float) -> str:
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if abs(size) < 1024 or unit == "GiB":
+            return f"{size:.1f}{unit}"
+        size /= 1024
+
+
+def report(results: list, baseline: dict = None, threshold: float = 0.2) -> list:
+    """
+    Print results as table, compare with baseline if given.
+
+    :param results: [list] Benchmark.run 的結果
+    :param baseline: [dict] name -> 之前的結果 (default: None)
+    :param threshold: [float] 比 baseline 慢或多用記憶體超過此比例視為退步 (default: 0.2)
+    :return: [list] 退步的 (name, 指標, 之前, 現在)
+    """
+    regressions = []
+    print(
+        f"{'benchmark':<48} {'median':>10} {'min':>10} {'peak mem':>10} {'throughput':>12}"
+    )
+
+    for result in results:
+        throughput = (
+            f"{_format_size(result['throughput'])}/s" if result["throughput"] else "-"
+        )
+        line = (
+            f"{result['name']:<48} {result['median'] * 1000:>8.2f}ms "
+            f"{result['min'] * 1000:>8.2f}ms {_format_size(result['peak_memory']):>10} "
+            f"{throughput:>12}"
+        )
+
+        previous = (baseline or {}).get(result["name"])
+        if previous:
+            for metric in ("median", "peak_memory"):
+                if result[metric] > previous[metric] * (1 + threshold):
+                    regressions.append(
+                        (result["name"], metric, previous[metric], result[metric])
+                    )
+                    line += f"  REGRESSION {metric} x{result[metric] / previous[metric]:.2f}"
+        print(line)
+
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="bond-controller 傳輸與壓縮路徑的效能測試 (時間與記憶體峰值)",
+    )
+    parser.add_argument("-k", dest="pattern", help="只執行名稱符合此 regex 的測試")
+    parser.add_argument("--rounds", type=int, help="每個測試計時的次數")
+    parser.add_argument("--json", dest="json_path", help="將結果寫入 JSON 檔")
+    parser.add_argument("--compare", help="與之前 --json 輸出的結果比較")
+    parser.add_argument(
+        "--threshold", type=float, default=0.2, help="視為退步的比例 (default: 0.2)"
+    )
+    parser.add_argument("--list", action="store_true", help="列出測試名稱")
+    parser.add_argument(
+        "--log-level", default="WARNING", help="controller log 等級 (default: WARNING)"
+    )
+    args = parser.parse_args(argv)
+
+    # 避免 log 輸出影響測試結果
+    from controller.common.logger.info_logger_handle import Logger
+
+    Logger.info_logger.setLevel(args.log_level.upper())
+
+    benchmarks = [
+        item
+        for item in discover()
+        if not args.pattern or re.search(args.pattern, item.name)
+    ]
+    if args.list:
+        print("\n".join(item.name for item in benchmarks))
+        return 0
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = {result["name"]: result for result in json.load(f)["results"]}
+
+    results = []
+    for item in benchmarks:
+        print(f"running {item.name} ...", file=sys.stderr)
+        results.append(item.run(args.rounds))
+
+    regressions = report(results, baseline, args.threshold)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"python": sys.version, "results": results}, f, indent=2, sort_keys=True
+            )
+
+    return 1 if regressions else 0
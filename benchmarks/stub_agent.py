@@ -0,0 +1,454 @@
+# -*- coding:utf-8 -*-
+import re
+import json
+import time
+import base64
+import uuid
+import random
+import socket
+import hashlib
+import threading
+from typing import Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# 錯誤回應的 body，舊版 controller 的文字回應路徑不會拋出 HTTP 錯誤，負載測試以此判斷失敗
+INJECTED_ERROR = b"injected error"
+NOT_FOUND = b"not found"
+
+
+class Throttle:
+    """
+    Throttle 類別，同一個 agent 的所有連線共用的頻寬限制 (bytes/s)。
+    """
+
+    def __init__(self, rate: float = None) -> None:
+        self.rate = rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def consume(self, nbytes: int) -> None:
+        """
+        Wait until nbytes can be transferred.
+
+        :param nbytes: [int] 要傳輸的 bytes
+        """
+        if not self.rate:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._next = max(self._next, now) + nbytes / self.rate
+            delay = self._next - now
+
+        if delay > 0:
+            time.sleep(delay)
+
+
+class StubAgentHandler(BaseHTTPRequestHandler):
+    """
+    模擬 bond-agent 的 HTTP handler，只在記憶體中處理請求，不寫入磁碟。
+    """
+
+    protocol_version = "HTTP/1.1"
+    # headers 與 body 分開寫入，避免 Nagle 與 delayed ACK 造成每個請求約 40ms 延遲
+    disable_nagle_algorithm = True
+
+    _RANGE = re.compile(r"bytes=(\d+)-$")
+    _IO_CHUNK = 64 * 1024
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    @property
+    def agent(self) -> "StubAgent":
+        return self.server.agent
+
+    def _read(self, size: int) -> bytes:
+        data = self.rfile.read(size)
+        self.agent.throttle.consume(len(data))
+        return data
+
+    def _read_body(self) -> bytes:
+        """
+        Read request body, supports Content-Length and chunked transfer encoding.
+
+        :return: [bytes] request body
+        """
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            length = int(self.headers.get("Content-Length") or 0)
+            chunks = []
+            while length > 0:
+                data = self._read(min(self._IO_CHUNK, length))
+                if not data:
+                    break
+                chunks.append(data)
+                length -= len(data)
+            return b"".join(chunks)
+
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            if size == 0:
+                # 略過 trailer
+                while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(self._read(size))
+            self.rfile.readline()
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str = "text/plain",
+        headers: dict = None,
+    ) -> None:
+        """
+        Send response with bandwidth limit and injected disconnects.
+
+        :param status: [int] HTTP status
+        :param body: [bytes] response body
+        :param content_type: [str] content type (default: text/plain)
+        :param headers: [dict] 其他 headers (default: None)
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+
+        # 傳送一半後中斷連線，模擬網路中斷
+        limit = len(body)
+        if status < 400 and len(body) > 1 and self.agent.inject("disconnect"):
+            limit = len(body) // 2
+
+        for offset in range(0, limit, self._IO_CHUNK):
+            data = body[offset : min(offset + self._IO_CHUNK, limit)]
+            self.agent.throttle.consume(len(data))
+            self.wfile.write(data)
+        self.agent.count("sent_bytes", limit)
+
+        if limit < len(body):
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+
+    def _send_download(self, filename: str, content: bytes, sha256: str) -> None:
+        """
+        Send raw file with Range, ETag and checksum headers (resumable download).
+
+        :param filename: [str] Content-Disposition 的檔名
+        :param content: [bytes] 檔案內容
+        :param sha256: [str] 檔案內容的 sha256
+        """
+        headers = {
+            "ETag": f'"{sha256[:16]}"',
+            "Accept-Ranges": "bytes",
+            "X-Checksum-Sha256": sha256,
+            "Content-Disposition": f'attachment; filename="{filename}"',
+        }
+
+        match = self._RANGE.match(self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and (if_range is None or if_range == headers["ETag"]):
+            start = int(match.group(1))
+            if start >= len(content):
+                self._send(
+                    416, b"", headers={"Content-Range": f"bytes */{len(content)}"}
+                )
+                return
+            headers["Content-Range"] = (
+                f"bytes {start}-{len(content) - 1}/{len(content)}"
+            )
+            self._send(206, content[start:], "application/octet-stream", headers)
+            return
+
+        self._send(200, content, "application/octet-stream", headers)
+
+    def _handle(self, method: str) -> None:
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        handler = getattr(self, f"_{method}_{url.path.strip('/')}", None)
+
+        body = self._read_body() if method == "post" else b""
+        self.agent.delay()
+
+        if handler is None or (
+            url.path == "/capabilities/" and self.agent.capabilities is None
+        ):
+            # 舊版 agent 沒有 /capabilities/ 等新的 endpoint
+            self._send(404, NOT_FOUND)
+        elif self.agent.inject("error"):
+            self.agent.count("injected_errors")
+            self._send(self.agent.error_status, INJECTED_ERROR)
+        else:
+            self.agent.count(url.path)
+            handler(query, body)
+
+    def do_GET(self) -> None:
+        self._handle("get")
+
+    def do_POST(self) -> None:
+        self._handle("post")
+
+    # *------ endpoints ------*
+
+    def _get_bond_info(self, query: dict, body: bytes) -> None:
+        self._send(200, b"bond-agent stub")
+
+    def _get_capabilities(self, query: dict, body: bytes) -> None:
+        self._send(
+            200,
+            json.dumps({"capabilities": list(self.agent.capabilities)}).encode(),
+            "application/json",
+        )
+
+    def _get_get_physical_file(self, query: dict, body: bytes) -> None:
+        self._send(200, self.agent.file_response(query["target"]), "application/json")
+
+    def _get_get_physical_file_stream(self, query: dict, body: bytes) -> None:
+        target = query["target"]
+        self._send_download(
+            target.rsplit("/", 1)[-1],
+            self.agent.files[target],
+            self.agent.checksums[("file", target)],
+        )
+
+    def _get_get_physical_folder_zip(self, query: dict, body: bytes) -> None:
+        target = query["target"]
+        self._send_download(
+            f"{target.rstrip('/').rsplit('/', 1)[-1]}.zip",
+            self.agent.folders[target],
+            self.agent.checksums[("folder", target)],
+        )
+
+    def _post_upload_file(self, query: dict, body: bytes) -> None:
+        data = json.loads(body)
+        self.agent.receive(data["target"], base64.b64decode(data["file_content"]))
+        self._send(200, b"upload success")
+
+    def _post_upload_folder(self, query: dict, body: bytes) -> None:
+        data = json.loads(body)
+        self.agent.receive(data["target"], base64.b64decode(data["folder_content"]))
+        self._send(200, b"upload success")
+
+    def _post_upload_file_stream(self, query: dict, body: bytes) -> None:
+        self.agent.receive(query["target"], body)
+        self._send(200, b"upload success")
+
+    def _post_upload_folder_stream(self, query: dict, body: bytes) -> None:
+        self.agent.receive(query["target"], body)
+        self._send(200, b"upload success")
+
+    def _execute(self, body: bytes) -> None:
+        data = json.loads(body)
+        time.sleep(self.agent.execute_time)
+        self._send(200, f"executed {data['to_be_executed']}".encode())
+
+    def _post_execute_file(self, query: dict, body: bytes) -> None:
+        self._execute(body)
+
+    def _post_execute_python_folder(self, query: dict, body: bytes) -> None:
+        self._execute(body)
+
+    def _post_execute_job(self, query: dict, body: bytes) -> None:
+        data = json.loads(body)
+        job_id = self.agent.start_job(data["to_be_executed"])
+        self._send(200, json.dumps({"job_id": job_id}).encode(), "application/json")
+
+    def _post_job_status(self, query: dict, body: bytes) -> None:
+        jobs = self.agent.job_status(json.loads(body)["job_ids"])
+        self._send(200, json.dumps({"jobs": jobs}).encode(), "application/json")
+
+
+class StubAgent:
+    """
+    StubAgent 類別，在本機背景執行緒啟動的 bond-agent 模擬伺服器，
+    用於效能與負載測試，不需要真實的 agent。
+
+        with StubAgent(latency=0.01, bandwidth=10 * 1024 * 1024) as agent:
+            Endpoint_Action.bond_info(agent.host, agent.port)
+
+    :param host: [str] 監聽的位址 (default: 127.0.0.1)
+    :param port: [int] 監聽的 port，0 代表自動選擇 (default: 0)
+    :param latency: [float] 每個請求的延遲秒數 (default: 0)
+    :param jitter: [float] 額外延遲的上限秒數，均勻分布 (default: 0)
+    :param bandwidth: [float] 所有連線共用的頻寬 bytes/s，None 代表不限制 (default: None)
+    :param error_rate: [float] 回傳 error_status 的機率 (default: 0)
+    :param error_status: [int] 注入錯誤時的 HTTP status (default: 500)
+    :param disconnect_rate: [float] 回應傳送一半時中斷連線的機率 (default: 0)
+    :param execute_time: [float] execute_file / execute_python_folder 的執行秒數 (default: 0)
+    :param capabilities: [Iterable[str]] /capabilities/ 回傳的功能，None 代表舊版 agent (default: None)
+    :param seed: [int] 注入錯誤的亂數種子 (default: None)
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        bandwidth: float = None,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        disconnect_rate: float = 0.0,
+        execute_time: float = 0.0,
+        capabilities: Iterable[str] = None,
+        seed: int = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle = Throttle(bandwidth)
+        self.rates = {"error": error_rate, "disconnect": disconnect_rate}
+        self.error_status = error_status
+        self.execute_time = execute_time
+        self.capabilities = None if capabilities is None else tuple(capabilities)
+
+        self.files = {}
+        self.folders = {}
+        self.received = {}
+        self.stats = {}
+        self.checksums = {}
+        self.jobs = {}
+        self._responses = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.server = ThreadingHTTPServer((host, port), StubAgentHandler)
+        self.server.daemon_threads = True
+        self.server.agent = self
+        self.host, self.port = self.server.server_address[:2]
+        self._thread = None
+
+    def add_file(self, target: str, content: bytes) -> None:
+        """
+        Add file which can be downloaded by get_physical_file.
+
+        :param target: [str] 檔案路徑
+        :param content: [bytes] 檔案內容
+        """
+        self.files[target] = content
+        self.checksums[("file", target)] = hashlib.sha256(content).hexdigest()
+        self._responses.pop(target, None)
+
+    def add_folder(self, target: str, zip_content: bytes) -> None:
+        """
+        Add folder (as zip data) which can be downloaded by get_physical_folder_zip.
+
+        :param target: [str] 資料夾路徑
+        :param zip_content: [bytes] zip 內容
+        """
+        self.folders[target] = zip_content
+        self.checksums[("folder", target)] = hashlib.sha256(zip_content).hexdigest()
+
+    def start_job(self, target: str) -> str:
+        """
+        Start a job of execute_job, it finishes after execute_time.
+
+        :param target: [str] 執行的檔案或資料夾
+        :return: [str] job id
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self.jobs[job_id] = (target, time.monotonic() + self.execute_time)
+
+        return job_id
+
+    def job_status(self, job_ids: Iterable[str]) -> dict:
+        """
+        Get status of jobs, unknown job ids are omitted.
+
+        :param job_ids: [Iterable[str]] job ids
+        :return: [dict] job id -> {"status", "result"}
+        """
+        now = time.monotonic()
+        statuses = {}
+        with self._lock:
+            for job_id in job_ids:
+                if job_id not in self.jobs:
+                    continue
+                target, finish_at = self.jobs[job_id]
+                statuses[job_id] = (
+                    {"status": "done", "result": f"executed {target}"}
+                    if now >= finish_at
+                    else {"status": "running", "result": None}
+                )
+
+        return statuses
+
+    def file_response(self, target: str) -> bytes:
+        """
+        Build (and cache) base64 JSON response of get_physical_file.
+
+        :param target: [str] 檔案路徑
+        :return: [bytes] JSON 回應
+        """
+        if target not in self._responses:
+            self._responses[target] = json.dumps(
+                {
+                    "filename": target.rsplit("/", 1)[-1],
+                    "file_base64": base64.b64encode(self.files[target]).decode(),
+                }
+            ).encode()
+
+        return self._responses[target]
+
+    def receive(self, target: str, content: bytes) -> None:
+        """
+        Record uploaded data, only the size is kept.
+
+        :param target: [str] 上傳的目標路徑
+        :param content: [bytes] 上傳的內容
+        """
+        with self._lock:
+            self.received[target] = len(content)
+            self.stats["received_bytes"] = self.stats.get("received_bytes", 0) + len(
+                content
+            )
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def inject(self, kind: str) -> bool:
+        """
+        Decide whether to inject a failure of kind.
+
+        :param kind: [str] "error" / "disconnect"
+        :return: [bool] 是否注入
+        """
+        rate = self.rates[kind]
+        if not rate:
+            return False
+
+        with self._lock:
+            return self._random.random() < rate
+
+    def delay(self) -> None:
+        """
+        Sleep latency plus random jitter.
+        """
+        delay = self.latency
+        if self.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def start(self) -> "StubAgent":
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, name="bond-stub-agent", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StubAgent":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
@@ -1,35 +1,46 @@
 # -*- coding:utf-8 -*-
-# System initialization
-from .action_config.system import CHECK_SYSTEM as SYSTEM_OPTION
-
-# Action Method initialization
-from .action.Endpoint_Action import Endpoint_Action as ENDPOINT
-from .action.Local_Action import Local_Action as LOCAL
-from .action.Server_Action import Server_Action as SERVER
-
-# SSH initialization
-from .common.SSH import SSH, InteractiveSSH, SFTP
-
-# Logger initialization
-from .common.logger.info_logger_handle import Logger as LOGGER
-
-LOGGER.setup_info_log_handler()
-
-# FOLDER initialization
-from .common.about_folder import Folder as FOLDER
-
-# JSON initialization
-from .common.about_json import Json as JSON
-
-__all__ = [
-    SYSTEM_OPTION,
-    ENDPOINT,
-    LOCAL,
-    SERVER,
-    SSH,
-    InteractiveSSH,
-    SFTP,
-    LOGGER,
-    JSON,
-    FOLDER,
-]
+import importlib
+
+# 延遲載入 (PEP 562)：第一次存取時才 import 對應模組，
+# 避免 import controller 時就載入 paramiko / requests 等套件
+_LAZY_ATTRIBUTES = {
+    # System initialization
+    "SYSTEM_OPTION": (".action_config.system", "CHECK_SYSTEM"),
+    # Action Method initialization
+    "ENDPOINT": (".action.Endpoint_Action", "Endpoint_Action"),
+    "ASYNC_ENDPOINT": (".action.AsyncEndpoint_Action", "AsyncEndpoint_Action"),
+    "LOCAL": (".action.Local_Action", "Local_Action"),
+    "SERVER": (".action.Server_Action", "Server_Action"),
+    "FLEET": (".action.Fleet_Action", "Fleet_Action"),
+    # SSH initialization
+    "SSH": (".common.SSH", "SSH"),
+    "InteractiveSSH": (".common.SSH", "InteractiveSSH"),
+    "SFTP": (".common.SSH", "SFTP"),
+    # Logger initialization (第一次寫 log 時才建立 handler)
+    "LOGGER": (".common.logger.info_logger_handle", "Logger"),
+    # Metrics initialization
+    "METRICS": (".common.metrics", "Metrics"),
+    # FOLDER initialization
+    "FOLDER": (".common.about_folder", "Folder"),
+    # JSON initialization
+    "JSON": (".common.about_json", "Json"),
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str):
+    try:
+        module_name, attribute = _LAZY_ATTRIBUTES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+    value = getattr(importlib.import_module(module_name, __name__), attribute)
+    # 快取在模組中，之後不再經過 __getattr__
+    globals()[name] = value
+
+    return value
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
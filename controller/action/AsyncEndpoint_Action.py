@@ -0,0 +1,329 @@
+# -*- coding:utf-8 -*-
+import os
+import base64
+import asyncio
+import functools
+from typing import Any, Callable
+
+from controller.action_config import setting
+from controller.common.zip.zip import ZipTool
+from controller.common.about_folder import Folder
+from controller.action.common.async_response import AsyncResponseMethod
+from controller.common.logger.info_logger_handle import Logger
+
+
+class AsyncEndpoint_Action:
+    """
+    AsyncEndpoint_Action 類別，Endpoint_Action 的 asyncio 版本，所有方法皆為 coroutine (需要 aiohttp)。
+    壓縮、編碼等 CPU 或磁碟工作會交給 event loop 的預設 executor，不會阻塞 event loop。
+    """
+
+    @staticmethod
+    async def _run_in_thread(func: Callable, *args) -> Any:
+        """
+        Run blocking func in the default executor of the running event loop.
+        (asyncio.to_thread 需要 Python 3.9)
+
+        :param func: [Callable] blocking function
+        :param args: [all] args
+        :return: [Any] func 的回傳值
+        """
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(None, functools.partial(func, *args))
+
+    @staticmethod
+    async def close() -> None:
+        """
+        Close the HTTP session of the running event loop.
+        """
+        await AsyncResponseMethod.close_sessions()
+
+    @staticmethod
+    async def bond_info(dest: str, port: int = setting.AGENT_PORT) -> str:
+        """
+        Get agent info.
+
+        :param dest: [str] target host address.
+        :param port: [str] target host port (default: 8086).
+        :return: [str] text
+        """
+        Logger.info(f"Get agent info from {dest}:{port}")
+        url = f"http://{dest}:{port}/bond_info/"
+
+        return await AsyncResponseMethod.get_text(url)
+
+    @staticmethod
+    async def send_folder_to_agent(
+        dest: str,
+        folder_path: str,
+        target: str,
+        port: int = setting.AGENT_PORT,
+        exclude_files: tuple = (),
+        exclude_dirs: tuple = (),
+    ) -> str:
+        """
+        Send folder to agent.
+
+        :param dest: [str] target host address.
+        :param folder_path: [str] folder path to send.
+        :param target: [str] target filepath.
+        :param port: [int] target host port (default: 8086).
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :return: [str] text
+        """
+        Logger.info(f"Sending folder to agent at {dest}:{port}")
+
+        zip_folder_base64_data = await AsyncEndpoint_Action._run_in_thread(
+            ZipTool.zip_dir, folder_path, exclude_files, exclude_dirs
+        )
+
+        data = {"target": target, "folder_content": zip_folder_base64_data}
+        url = f"http://{dest}:{port}/upload_folder/"
+
+        return await AsyncResponseMethod.post_text(url, json=data)
+
+    @staticmethod
+    def _read_file_base64(filepath: str) -> str:
+        """
+        Read file and encode it with base64.
+
+        :param filepath: [str] filepath to read.
+        :return: [str] base64 encoded file content
+        """
+        with open(filepath, "rb") as f:
+            return base64.b64encode(f.read()).decode("utf-8")
+
+    @staticmethod
+    async def send_file_to_agent(
+        dest: str, filepath: str, target: str, port: int = setting.AGENT_PORT
+    ) -> str:
+        """
+        Send file to agent.
+
+        :param dest: [str] target host address.
+        :param filepath: [str] filepath to send.
+        :param target: [str] target filepath.
+        :param port: [int] target host port (default: 8086).
+        :return: [str] text
+        """
+
+        Logger.debug(filepath)
+
+        Logger.info(f"Sending file to agent at {dest}:{port}")
+        file_content = await AsyncEndpoint_Action._run_in_thread(
+            AsyncEndpoint_Action._read_file_base64, filepath
+        )
+
+        data = {"target": target, "file_content": file_content}
+        url = f"http://{dest}:{port}/upload_file/"
+
+        return await AsyncResponseMethod.post_text(url, json=data)
+
+    @staticmethod
+    async def execute_file(
+        dest: str,
+        target: str,
+        timeout: int = setting.EXECUTE_TIMEOUT,
+        port: int = setting.AGENT_PORT,
+        extra_args: tuple = (),
+    ) -> str:
+        """
+        Execute file at endpoint.
+
+        :param dest: [str] target host address.
+        :param target: [str] target filepath.
+        :param timeout: [int] timeout (default: 0).
+        :param port: [int] target host port (default: 8086).
+        :param extra_args: [str] extra args.
+        :return: [tuple] text
+        """
+        Logger.info(
+            f"Executing file at {dest}:{port} on {target} with timeout {timeout}"
+        )
+        url = f"http://{dest}:{port}/execute_file/"
+        data = {"to_be_executed": target, "timeout": timeout, "extra_args": extra_args}
+
+        return await AsyncResponseMethod.post_text(url, json=data)
+
+    @staticmethod
+    async def execute_python_folder(
+        dest: str,
+        target: str,
+        timeout: int = setting.EXECUTE_TIMEOUT,
+        port: int = setting.AGENT_PORT,
+        extra_args: tuple = (),
+    ) -> str:
+        """
+        Execute python folder at endpoint.
+
+        :param dest: [str] target host address.
+        :param target: [str] target folderpath.
+        :param timeout: [int] timeout (default: 0).
+        :param port: [int] target host port (default: 8086).
+        :param extra_args: [str] extra args.
+        :return: [tuple] text
+        """
+        Logger.info(
+            f"Executing python folder at {dest}:{port} on {target} with timeout {timeout}"
+        )
+        url = f"http://{dest}:{port}/execute_python_folder/"
+        data = {"to_be_executed": target, "timeout": timeout, "extra_args": extra_args}
+
+        return await AsyncResponseMethod.post_text(url, json=data)
+
+    @staticmethod
+    async def send_python_folder_to_execute(
+        dest: str,
+        folder_path: str,
+        target: str,
+        port: int = setting.AGENT_PORT,
+        exclude_files: tuple = (),
+        exclude_dirs: tuple = (),
+        timeout: int = setting.EXECUTE_TIMEOUT,
+        extra_args: list = [],
+    ) -> dict:
+        """
+        Send python folder to endpoint to execute.
+
+        :param dest: [str] target host address.
+        :param folder_path: [str] folder path.
+        :param target: [str] target folder.
+        :param port: [int] target host port (default: 8086).
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :param timeout: [int] timeout (default: 0).
+        :param extra_args: [list] extra args.
+        :return: [dict] result
+        """
+
+        result = {}
+
+        result["send_folder_to_agent"] = (
+            await AsyncEndpoint_Action.send_folder_to_agent(
+                dest, folder_path, target, port, exclude_files, exclude_dirs
+            )
+        )
+        result["execute_file"] = await AsyncEndpoint_Action.execute_python_folder(
+            dest, target, timeout, port, extra_args
+        )
+
+        return result
+
+    @staticmethod
+    async def send_file_to_execute(
+        dest: str,
+        filepath: str,
+        target: str,
+        timeout: int = setting.EXECUTE_TIMEOUT,
+        port: int = setting.AGENT_PORT,
+        extra_args: list = [],
+    ) -> dict:
+        """
+        Send file to endpoint to execute.
+
+        :param dest: [str] target host address.
+        :param filepath: [str] filepath to send.
+        :param target: [str] target filepath.
+        :param timeout: [int] timeout (default: 0).
+        :param port: [int] target host port (default: 8086).
+        :param extra_args: [list] extra args.
+        :return: [dict] result
+        """
+
+        result = {}
+
+        result["send_file_to_agent"] = await AsyncEndpoint_Action.send_file_to_agent(
+            dest, filepath, target, port
+        )
+        result["execute_file"] = await AsyncEndpoint_Action.execute_file(
+            dest, target, timeout, port, extra_args
+        )
+
+        return result
+
+    @staticmethod
+    def _write_base64_file(file_path: str, file_base64: str) -> None:
+        """
+        Decode base64 content and write it to file.
+
+        :param file_path: [str] file path to write.
+        :param file_base64: [str] base64 encoded file content.
+        """
+        with open(file_path, "wb") as file:
+            file.write(base64.b64decode(file_base64))
+
+    @staticmethod
+    async def get_physical_file(
+        dest: str, target: str, host_name: str, port: int = setting.AGENT_PORT
+    ) -> None:
+        """
+        Get physical file.
+
+        :param dest: [str] target host address.
+        :param target: [str] target file.
+        :param host_name: [str] target host name.
+        :param port: [int] target host port (default: 8086).
+        """
+
+        Folder.check_and_make_folder(setting.DOWNLOAD_PATH)
+
+        Logger.info(f"Get physical file at {dest}:{port} on `{target}`")
+        url = f"http://{dest}:{port}/get_physical_file"
+
+        content = await AsyncResponseMethod.get_json(url, params={"target": target})
+
+        file_name = host_name + "_" + content["filename"]
+        file_path = os.path.join(setting.DOWNLOAD_PATH, file_name)
+
+        await AsyncEndpoint_Action._run_in_thread(
+            AsyncEndpoint_Action._write_base64_file, file_path, content["file_base64"]
+        )
+
+        Logger.info(f"Get physical file at {dest}:{port} on `{target}` success")
+
+    @staticmethod
+    async def get_physical_folder_zip(
+        dest: str, target: str, port: int = setting.AGENT_PORT
+    ) -> None:
+        """
+        Get physical folder as ZIP.
+
+        :param dest: [str] target host address.
+        :param target: [str] target folder.
+        :param port: [int] target host port (default: 8086).
+        """
+        Folder.check_and_make_folder(setting.DOWNLOAD_PATH)
+
+        Logger.info(f"Getting physical folder as ZIP from {dest}:{port} for `{target}`")
+        url = f"http://{dest}:{port}/get_physical_folder_zip"
+
+        response = await AsyncResponseMethod.get_response(
+            url, params={"target": target}
+        )
+
+        async with response:
+            content_disposition = response.headers.get("Content-Disposition")
+            if content_disposition and "filename=" in content_disposition:
+                zip_filename = content_disposition.split("filename=")[-1].strip('"')
+            else:
+                zip_filename = "default_bond_get.zip"
+
+            counter = 1
+            base_filename, file_extension = os.path.splitext(zip_filename)
+            while os.path.exists(os.path.join(setting.DOWNLOAD_PATH, zip_filename)):
+                zip_filename = f"{base_filename} ({counter}){file_extension}"
+                counter += 1
+
+            file_path = os.path.join(setting.DOWNLOAD_PATH, zip_filename)
+
+            with open(file_path, "wb") as f:
+                async for chunk in response.content.iter_chunked(
+                    setting.DOWNLOAD_CHUNK_SIZE
+                ):
+                    await AsyncEndpoint_Action._run_in_thread(f.write, chunk)
+
+        Logger.info(
+            f"Successfully saved physical folder from {dest}:{port} as `{zip_filename}`"
+        )
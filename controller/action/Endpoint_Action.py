@@ -1,11 +1,20 @@
 # -*- coding:utf-8 -*-
 import os
+import time
+import uuid
 import base64
+from typing import Callable
 
 from controller.action_config import setting
 from controller.common.zip.zip import ZipTool
+from controller.common.zip.codec import Codec
+from controller.common.stream import CountingIterator, StreamTool
+from controller.common.metrics import Metrics
 from controller.common.about_folder import Folder
+from controller.action.common.job import Job, JobPoller
 from controller.action.common.response import ResponseMethod
+from controller.action.common.download import ResumableDownload
+from controller.action.common.capability import AgentCapability
 from controller.common.logger.info_logger_handle import Logger
 
 
@@ -15,6 +24,7 @@ class Endpoint_Action:
     """
 
     @staticmethod
+    @Metrics.instrument()
     def bond_info(dest: str, port: int = setting.AGENT_PORT) -> str:
         """
         Get agent info.
@@ -29,6 +39,7 @@ class Endpoint_Action:
         return ResponseMethod.get_text(url)
 
     @staticmethod
+    @Metrics.instrument()
     def send_folder_to_agent(
         dest: str,
         folder_path: str,
@@ -36,6 +47,8 @@ class Endpoint_Action:
         port: int = setting.AGENT_PORT,
         exclude_files: tuple = (),
         exclude_dirs: tuple = (),
+        mode: str = setting.UPLOAD_MODE,
+        codec: str = setting.ZIP_CODEC,
     ) -> str:
         """
         Send folder to agent.
@@ -46,22 +59,229 @@ class Endpoint_Action:
         :param port: [int] target host port (default: 8086).
         :param exclude_files: [tuple] files to exclude.
         :param exclude_dirs: [tuple] directories to exclude.
+        :param mode: [str] "auto" / "stream" / "json" (default: UPLOAD_MODE).
+        :param codec: [str] 壓縮方式，見 Codec (default: ZIP_CODEC).
         :return: [str] text
         """
-        Logger.info(f"Sending folder to agent at {dest}:{port}")
+        codec = Endpoint_Action._resolve_codec(dest, port, codec)
+
+        if Endpoint_Action._use_stream(
+            dest, port, mode, AgentCapability.UPLOAD_FOLDER_STREAM
+        ):
+            return Endpoint_Action.stream_folder_to_agent(
+                dest,
+                folder_path,
+                target,
+                port,
+                exclude_files,
+                exclude_dirs,
+                codec=codec,
+            )
+
+        Logger.info(f"Sending folder to agent at {dest}:{port} with codec {codec}")
+
+        with Metrics.phase("zip"):
+            zip_folder_base64_data = ZipTool.zip_dir(
+                folder_path, exclude_files, exclude_dirs, codec=codec
+            )
+
+        data = {
+            "target": target,
+            "folder_content": zip_folder_base64_data,
+            "codec": codec,
+        }
+        url = f"http://{dest}:{port}/upload_folder/"
 
-        zip_folder_base64_data = ZipTool.zip_dir(
-            folder_path, exclude_files, exclude_dirs
+        start = time.perf_counter()
+        text = ResponseMethod.post_text(url, json=data)
+        # 包含 agent 解壓縮的時間，作為 "auto" codec 的有效傳輸速度
+        Codec.record_link(
+            dest, len(zip_folder_base64_data) * 3 // 4, time.perf_counter() - start
         )
 
-        data = {"target": target, "folder_content": zip_folder_base64_data}
-        url = f"http://{dest}:{port}/upload_folder/"
+        return text
 
-        return ResponseMethod.post_text(url, json=data)
+    @staticmethod
+    @Metrics.instrument()
+    def stream_folder_to_agent(
+        dest: str,
+        folder_path: str,
+        target: str,
+        port: int = setting.AGENT_PORT,
+        exclude_files: tuple = (),
+        exclude_dirs: tuple = (),
+        chunk_size: int = setting.UPLOAD_CHUNK_SIZE,
+        codec: str = setting.ZIP_CODEC,
+    ) -> str:
+        """
+        Zip folder on the fly and stream it to agent as raw chunked body.
+        Agent 需支援 AgentCapability.UPLOAD_FOLDER_STREAM。
+
+        :param dest: [str] target host address.
+        :param folder_path: [str] folder path to send.
+        :param target: [str] target folder.
+        :param port: [int] target host port (default: 8086).
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :param chunk_size: [int] bytes per chunk (default: UPLOAD_CHUNK_SIZE).
+        :param codec: [str] 壓縮方式，見 Codec (default: ZIP_CODEC).
+        :return: [str] text
+        """
+        codec = Endpoint_Action._resolve_codec(dest, port, codec)
+        Logger.info(f"Streaming folder to agent at {dest}:{port} with codec {codec}")
+        url = f"http://{dest}:{port}/upload_folder_stream/"
+        chunks = CountingIterator(
+            ZipTool.zip_dir_stream(
+                folder_path, exclude_files, exclude_dirs, chunk_size, codec
+            )
+        )
+
+        start = time.perf_counter()
+        text = ResponseMethod.post_text(
+            url,
+            params={"target": target, "codec": codec},
+            data=Metrics.timed_iter(chunks, "zip"),
+            headers={"Content-Type": "application/zip"},
+        )
+        # 壓縮與傳送同時進行，扣除等待壓縮的時間後作為 "auto" codec 的有效傳輸速度
+        Codec.record_link(
+            dest, chunks.bytes, time.perf_counter() - start - chunks.seconds
+        )
+
+        return text
+
+    @staticmethod
+    @Metrics.instrument()
+    def sync_folder_to_agent(
+        dest: str,
+        folder_path: str,
+        target: str,
+        port: int = setting.AGENT_PORT,
+        exclude_files: tuple = (),
+        exclude_dirs: tuple = (),
+        codec: str = setting.ZIP_CODEC,
+    ) -> str:
+        """
+        Sync folder to agent, only added / changed files are sent and removed files are deleted.
+        不支援 AgentCapability.FOLDER_SYNC 的 agent 會改用 send_folder_to_agent 傳送整個資料夾。
+
+        :param dest: [str] target host address.
+        :param folder_path: [str] folder path to send.
+        :param target: [str] target folder.
+        :param port: [int] target host port (default: 8086).
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :param codec: [str] 壓縮方式，見 Codec (default: ZIP_CODEC).
+        :return: [str] text
+        """
+        if not AgentCapability.supports(dest, port, AgentCapability.FOLDER_SYNC):
+            return Endpoint_Action.send_folder_to_agent(
+                dest,
+                folder_path,
+                target,
+                port,
+                exclude_files,
+                exclude_dirs,
+                codec=codec,
+            )
+
+        Logger.info(f"Syncing folder to agent at {dest}:{port}")
+
+        local_manifest = ZipTool.file_manifest(folder_path, exclude_files, exclude_dirs)
+        url = rf"http://{dest}:{port}/folder_manifest?target={target}"
+        remote_manifest = ResponseMethod.get_json(url).get("files", {})
+
+        changed = [
+            path
+            for path, digest in local_manifest.items()
+            if remote_manifest.get(path) != digest
+        ]
+        # agent 端產生的檔案 (ex: __pycache__) 若在排除清單中則保留
+        deleted = [
+            path
+            for path in remote_manifest
+            if path not in local_manifest
+            and not ZipTool.is_excluded(path, exclude_files, exclude_dirs)
+        ]
+
+        Logger.info(
+            f"Folder sync to {dest}:{port}: {len(changed)} changed, {len(deleted)} deleted,"
+            f" {len(local_manifest) - len(changed)} unchanged"
+        )
+        if not changed and not deleted:
+            return f"`{target}` is already up to date"
+
+        codec = Endpoint_Action._resolve_codec(dest, port, codec)
+        with Metrics.phase("zip"):
+            folder_content = ZipTool.zip_files(
+                folder_path, changed, exclude_files, exclude_dirs, codec
+            )
+        data = {
+            "target": target,
+            "folder_content": folder_content,
+            "deleted": deleted,
+            "codec": codec,
+        }
+        url = f"http://{dest}:{port}/sync_folder/"
+
+        start = time.perf_counter()
+        text = ResponseMethod.post_text(url, json=data)
+        Codec.record_link(
+            dest, len(folder_content) * 3 // 4, time.perf_counter() - start
+        )
+
+        return text
+
+    @staticmethod
+    def _resolve_codec(dest: str, port: int, codec: str) -> str:
+        """
+        Resolve codec against codecs supported by agent.
+        store / deflate 為 zip 本身的格式，任何 agent 都支援；zstd / lz4 需 agent 宣告
+        AgentCapability.CODEC_ZSTD / AgentCapability.CODEC_LZ4。
+
+        :param dest: [str] target host address.
+        :param port: [int] target host port.
+        :param codec: [str] codec 或 "auto"
+        :return: [str] codec
+        """
+        supported = {Codec.STORE, Codec.DEFLATE}
+
+        # 只有需要時才查詢 agent，避免 store / deflate 多一次請求
+        if codec == Codec.AUTO or Codec.parse(codec)[0] in Codec.FRAMED:
+            capabilities = AgentCapability.get(dest, port)
+            if AgentCapability.CODEC_ZSTD in capabilities:
+                supported.add(Codec.ZSTD)
+            if AgentCapability.CODEC_LZ4 in capabilities:
+                supported.add(Codec.LZ4)
+
+        return Codec.resolve(codec, dest, supported)
 
     @staticmethod
+    def _use_stream(dest: str, port: int, mode: str, capability: str) -> bool:
+        """
+        Decide whether to use streaming upload.
+
+        :param dest: [str] target host address.
+        :param port: [int] target host port.
+        :param mode: [str] "auto" / "stream" / "json"
+        :param capability: [str] 串流上傳所需的 agent 功能
+        :return: [bool] 是否使用串流上傳
+        """
+        if mode not in ("auto", "stream", "json"):
+            raise ValueError(f"Unknown upload mode: {mode}")
+
+        return mode == "stream" or (
+            mode == "auto" and AgentCapability.supports(dest, port, capability)
+        )
+
+    @staticmethod
+    @Metrics.instrument()
     def send_file_to_agent(
-        dest: str, filepath: str, target: str, port: int = setting.AGENT_PORT
+        dest: str,
+        filepath: str,
+        target: str,
+        port: int = setting.AGENT_PORT,
+        mode: str = setting.UPLOAD_MODE,
     ) -> str:
         """
         Send file to agent.
@@ -70,14 +290,22 @@ class Endpoint_Action:
         :param filepath: [str] filepath to send.
         :param target: [str] target filepath.
         :param port: [int] target host port (default: 8086).
+        :param mode: [str] "auto" / "stream" / "json" (default: UPLOAD_MODE).
         :return: [str] text
         """
 
         Logger.debug(filepath)
 
+        if Endpoint_Action._use_stream(
+            dest, port, mode, AgentCapability.UPLOAD_FILE_STREAM
+        ):
+            return Endpoint_Action.stream_file_to_agent(dest, filepath, target, port)
+
         Logger.info(f"Sending file to agent at {dest}:{port}")
-        with open(filepath, "rb") as f:
-            file_content = base64.b64encode(f.read()).decode("utf-8")
+        with Metrics.phase("read"), open(filepath, "rb") as f:
+            file_content = f.read()
+        with Metrics.phase("encode"):
+            file_content = base64.b64encode(file_content).decode("utf-8")
 
         data = {"target": target, "file_content": file_content}
         url = f"http://{dest}:{port}/upload_file/"
@@ -85,6 +313,43 @@ class Endpoint_Action:
         return ResponseMethod.post_text(url, json=data)
 
     @staticmethod
+    @Metrics.instrument()
+    def stream_file_to_agent(
+        dest: str,
+        filepath: str,
+        target: str,
+        port: int = setting.AGENT_PORT,
+        chunk_size: int = setting.UPLOAD_CHUNK_SIZE,
+    ) -> str:
+        """
+        Stream file to agent as raw chunked body, without base64 and full buffering.
+        Agent 需支援 AgentCapability.UPLOAD_FILE_STREAM。
+
+        :param dest: [str] target host address.
+        :param filepath: [str] filepath to send.
+        :param target: [str] target filepath.
+        :param port: [int] target host port (default: 8086).
+        :param chunk_size: [int] bytes per chunk (default: UPLOAD_CHUNK_SIZE).
+        :return: [str] text
+        """
+        file_size = os.path.getsize(filepath)
+
+        Logger.info(f"Streaming file ({file_size} bytes) to agent at {dest}:{port}")
+        url = f"http://{dest}:{port}/upload_file_stream/"
+        headers = {
+            "Content-Type": "application/octet-stream",
+            "X-Bond-File-Size": str(file_size),
+        }
+
+        return ResponseMethod.post_text(
+            url,
+            params={"target": target},
+            data=Metrics.timed_iter(StreamTool.iter_file(filepath, chunk_size), "read"),
+            headers=headers,
+        )
+
+    @staticmethod
+    @Metrics.instrument()
     def execute_file(
         dest: str,
         target: str,
@@ -111,6 +376,7 @@ class Endpoint_Action:
         return ResponseMethod.post_text(url, json=data)
 
     @staticmethod
+    @Metrics.instrument()
     def execute_python_folder(
         dest: str,
         target: str,
@@ -137,6 +403,112 @@ class Endpoint_Action:
         return ResponseMethod.post_text(url, json=data)
 
     @staticmethod
+    def _submit_job(
+        dest: str,
+        kind: str,
+        target: str,
+        timeout: int,
+        port: int,
+        extra_args: tuple,
+        execute: Callable[..., str],
+    ) -> Job:
+        """
+        Submit job to agent, fall back to running execute in a worker thread
+        if agent does not support AgentCapability.EXECUTE_JOB.
+
+        :param dest: [str] target host address.
+        :param kind: [str] "file" / "python_folder"
+        :param target: [str] target path.
+        :param timeout: [int] timeout.
+        :param port: [int] target host port.
+        :param extra_args: [tuple] extra args.
+        :param execute: [Callable[..., str]] 對應的同步 execute_* 方法
+        :return: [Job] job handle
+        """
+        if not AgentCapability.supports(dest, port, AgentCapability.EXECUTE_JOB):
+            Logger.info(f"Agent {dest}:{port} does not support jobs, wait in worker")
+            return JobPoller.submit_fallback(
+                dest,
+                port,
+                kind,
+                target,
+                lambda: execute(dest, target, timeout, port, extra_args),
+            )
+
+        data = {
+            "to_be_executed": target,
+            "timeout": timeout,
+            "extra_args": extra_args,
+        }
+
+        return JobPoller.submit(dest, port, kind, data)
+
+    @staticmethod
+    @Metrics.instrument()
+    def submit_execute_file(
+        dest: str,
+        target: str,
+        timeout: int = setting.EXECUTE_TIMEOUT,
+        port: int = setting.AGENT_PORT,
+        extra_args: tuple = (),
+    ) -> Job:
+        """
+        Submit file to execute at endpoint and return immediately.
+        Job.result() 會等待執行完成並回傳與 execute_file 相同的文字。
+
+        :param dest: [str] target host address.
+        :param target: [str] target filepath.
+        :param timeout: [int] timeout (default: 0).
+        :param port: [int] target host port (default: 8086).
+        :param extra_args: [str] extra args.
+        :return: [Job] job handle
+        """
+        Logger.info(f"Submitting file at {dest}:{port} on {target}")
+
+        return Endpoint_Action._submit_job(
+            dest,
+            "file",
+            target,
+            timeout,
+            port,
+            extra_args,
+            Endpoint_Action.execute_file,
+        )
+
+    @staticmethod
+    @Metrics.instrument()
+    def submit_execute_python_folder(
+        dest: str,
+        target: str,
+        timeout: int = setting.EXECUTE_TIMEOUT,
+        port: int = setting.AGENT_PORT,
+        extra_args: tuple = (),
+    ) -> Job:
+        """
+        Submit python folder to execute at endpoint and return immediately.
+        Job.result() 會等待執行完成並回傳與 execute_python_folder 相同的文字。
+
+        :param dest: [str] target host address.
+        :param target: [str] target folderpath.
+        :param timeout: [int] timeout (default: 0).
+        :param port: [int] target host port (default: 8086).
+        :param extra_args: [str] extra args.
+        :return: [Job] job handle
+        """
+        Logger.info(f"Submitting python folder at {dest}:{port} on {target}")
+
+        return Endpoint_Action._submit_job(
+            dest,
+            "python_folder",
+            target,
+            timeout,
+            port,
+            extra_args,
+            Endpoint_Action.execute_python_folder,
+        )
+
+    @staticmethod
+    @Metrics.instrument()
     def send_python_folder_to_execute(
         dest: str,
         folder_path: str,
@@ -146,6 +518,7 @@ class Endpoint_Action:
         exclude_dirs: tuple = (),
         timeout: int = setting.EXECUTE_TIMEOUT,
         extra_args: list = [],
+        sync: bool = False,
     ) -> dict:
         """
         Send python folder to endpoint to execute.
@@ -158,12 +531,18 @@ class Endpoint_Action:
         :param exclude_dirs: [tuple] directories to exclude.
         :param timeout: [int] timeout (default: 0).
         :param extra_args: [list] extra args.
+        :param sync: [bool] 只傳送有變更的檔案 (sync_folder_to_agent) (default: False).
         :return: [dict] result
         """
 
         result = {}
 
-        result["send_folder_to_agent"] = Endpoint_Action.send_folder_to_agent(
+        send_folder = (
+            Endpoint_Action.sync_folder_to_agent
+            if sync
+            else Endpoint_Action.send_folder_to_agent
+        )
+        result["send_folder_to_agent"] = send_folder(
             dest, folder_path, target, port, exclude_files, exclude_dirs
         )
         result["execute_file"] = Endpoint_Action.execute_python_folder(
@@ -173,6 +552,7 @@ class Endpoint_Action:
         return result
 
     @staticmethod
+    @Metrics.instrument()
     def send_file_to_execute(
         dest: str,
         filepath: str,
@@ -205,68 +585,119 @@ class Endpoint_Action:
         return result
 
     @staticmethod
+    def _filename_from_disposition(content_disposition: str, default: str) -> str:
+        """
+        Get filename from Content-Disposition header.
+
+        :param content_disposition: [str] Content-Disposition header
+        :param default: [str] 沒有 Content-Disposition 時使用的檔名
+        :return: [str] 檔名
+        """
+        if content_disposition and "filename=" in content_disposition:
+            return content_disposition.split("filename=")[-1].strip('"')
+
+        return default
+
+    @staticmethod
+    @Metrics.instrument()
     def get_physical_file(
-        dest: str, target: str, host_name: str, port: int = setting.AGENT_PORT
+        dest: str,
+        target: str,
+        host_name: str,
+        port: int = setting.AGENT_PORT,
+        chunk_size: int = setting.DOWNLOAD_CHUNK_SIZE,
+        progress: Callable[[int, int], None] = None,
     ) -> None:
         """
         Get physical file.
 
+        支援 AgentCapability.GET_PHYSICAL_FILE_STREAM 的 agent 直接串流檔案內容 (可續傳)，
+        舊版 agent 的 base64 JSON 回應則邊接收邊解碼寫入磁碟。
+
         :param dest: [str] target host address.
         :param target: [str] target file.
         :param host_name: [str] target host name.
         :param port: [int] target host port (default: 8086).
+        :param chunk_size: [int] bytes per chunk (default: DOWNLOAD_CHUNK_SIZE).
+        :param progress: [Callable[[int, int], None]] progress(已下載 bytes, 總 bytes 或 None) (default: None).
         """
 
         Folder.check_and_make_folder(setting.DOWNLOAD_PATH)
 
         Logger.info(f"Get physical file at {dest}:{port} on `{target}`")
-        url = rf"http://{dest}:{port}/get_physical_file?target={target}"
-
-        content = ResponseMethod.get_json(url)
-
-        decoded_content = base64.b64decode(content["file_base64"])
-        file_name = host_name + "_" + content["filename"]
-        file_path = os.path.join(setting.DOWNLOAD_PATH, file_name)
+        part_path = os.path.join(
+            setting.DOWNLOAD_PATH, f"{host_name}_{uuid.uuid4().hex}.part"
+        )
 
-        with open(file_path, "wb") as file:
-            file.write(decoded_content)
+        try:
+            if AgentCapability.supports(
+                dest, port, AgentCapability.GET_PHYSICAL_FILE_STREAM
+            ):
+                url = rf"http://{dest}:{port}/get_physical_file_stream?target={target}"
+                stream_part_path, meta = ResumableDownload.download(
+                    url, chunk_size, progress
+                )
+                os.replace(stream_part_path, part_path)
+                filename = Endpoint_Action._filename_from_disposition(
+                    meta.get("content_disposition"), os.path.basename(target)
+                )
+            else:
+                url = rf"http://{dest}:{port}/get_physical_file?target={target}"
+                with ResponseMethod.get_response(url, stream=True) as response, open(
+                    part_path, "wb"
+                ) as file:
+                    chunks = Metrics.timed_iter(
+                        response.iter_content(chunk_size), "receive", "received"
+                    )
+                    content = StreamTool.extract_json_base64(
+                        chunks, "file_base64", file, progress
+                    )
+                filename = content["filename"]
+
+            file_path = os.path.join(setting.DOWNLOAD_PATH, host_name + "_" + filename)
+            os.replace(part_path, file_path)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
 
         Logger.info(f"Get physical file at {dest}:{port} on `{target}` success")
 
     @staticmethod
+    @Metrics.instrument()
     def get_physical_folder_zip(
-        dest: str, target: str, port: int = setting.AGENT_PORT
+        dest: str,
+        target: str,
+        port: int = setting.AGENT_PORT,
+        chunk_size: int = setting.DOWNLOAD_CHUNK_SIZE,
+        progress: Callable[[int, int], None] = None,
     ) -> None:
         """
-        Get physical folder as ZIP.
+        Get physical folder as ZIP, interrupted transfers are resumed with HTTP Range.
 
         :param dest: [str] target host address.
         :param target: [str] target folder.
         :param port: [int] target host port (default: 8086).
+        :param chunk_size: [int] bytes per chunk (default: DOWNLOAD_CHUNK_SIZE).
+        :param progress: [Callable[[int, int], None]] progress(已下載 bytes, 總 bytes 或 None) (default: None).
         """
         Folder.check_and_make_folder(setting.DOWNLOAD_PATH)
 
         Logger.info(f"Getting physical folder as ZIP from {dest}:{port} for `{target}`")
         url = rf"http://{dest}:{port}/get_physical_folder_zip?target={target}"
 
-        response = ResponseMethod.get_response(url)
-
-        content_disposition = response.headers.get("Content-Disposition")
-        if content_disposition and "filename=" in content_disposition:
-            zip_filename = content_disposition.split("filename=")[-1].strip('"')
-        else:
-            zip_filename = "default_bond_get.zip"
+        part_path, meta = ResumableDownload.download(url, chunk_size, progress)
+        zip_filename = Endpoint_Action._filename_from_disposition(
+            meta.get("content_disposition"), "default_bond_get.zip"
+        )
 
         counter = 1
         base_filename, file_extension = os.path.splitext(zip_filename)
-        while os.path.exists(zip_filename):
+        while os.path.exists(os.path.join(setting.DOWNLOAD_PATH, zip_filename)):
             zip_filename = f"{base_filename} ({counter}){file_extension}"
             counter += 1
 
-        file_path = os.path.join(setting.DOWNLOAD_PATH, zip_filename)
-
-        with open(file_path, "wb") as f:
-            f.write(response.content)
+        os.replace(part_path, os.path.join(setting.DOWNLOAD_PATH, zip_filename))
 
         Logger.info(
             f"Successfully saved physical folder from {dest}:{port} as `{zip_filename}`"
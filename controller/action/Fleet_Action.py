@@ -0,0 +1,180 @@
+# -*- coding:utf-8 -*-
+import time
+from typing import Callable, Iterable, Iterator, Union
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from controller.action_config import setting
+from controller.action.Endpoint_Action import Endpoint_Action
+from controller.common.logger.info_logger_handle import Logger
+
+
+class Fleet_Action:
+    """
+    Fleet_Action 類別，將單一主機的操作 (例如 Endpoint_Action 的方法) 同時派送到多台主機。
+    """
+
+    @staticmethod
+    def _resolve_operation(operation: Union[str, Callable]) -> Callable:
+        """
+        Resolve operation name to Endpoint_Action method.
+
+        :param operation: [Union[str, Callable]] Endpoint_Action 的方法名稱，或是第一個參數為 dest 的函式
+        :return: [Callable] 要執行的函式
+        """
+        if callable(operation):
+            return operation
+
+        method = getattr(Endpoint_Action, operation, None)
+        if operation.startswith("_") or not callable(method):
+            raise ValueError(f"Unknown Endpoint_Action operation: {operation}")
+
+        return method
+
+    @staticmethod
+    def _run_on_host(
+        operation: Callable,
+        host: str,
+        started: dict,
+        args: tuple,
+        kwargs: dict,
+    ) -> dict:
+        """
+        Run operation on a single host and wrap the outcome.
+
+        :param operation: [Callable] 要執行的函式
+        :param host: [str] target host address.
+        :param started: [dict] 紀錄各主機開始執行時間的 dict
+        :param args: [tuple] operation 的其他參數
+        :param kwargs: [dict] operation 的其他參數
+        :return: [dict] host, result, error, elapsed
+        """
+        start = time.monotonic()
+        started[host] = start
+
+        try:
+            result = {"result": operation(host, *args, **kwargs), "error": None}
+        except Exception as e:
+            Logger.error(f"Fleet operation on {host} failed: {e!r}")
+            result = {"result": None, "error": e}
+
+        return {"host": host, **result, "elapsed": time.monotonic() - start}
+
+    @classmethod
+    def execute(
+        cls,
+        hosts: Iterable[str],
+        operation: Union[str, Callable],
+        *args,
+        max_workers: int = setting.FLEET_MAX_WORKERS,
+        host_timeout: float = setting.FLEET_HOST_TIMEOUT,
+        **kwargs,
+    ) -> Iterator[dict]:
+        """
+        Run operation on every host concurrently and yield results as they finish.
+
+        每筆結果為 {"host", "result", "error", "elapsed"}，失敗時 error 為例外物件。
+        超過 host_timeout 的主機會回報 TimeoutError，但該執行緒無法被中斷，
+        仍會佔用一個 worker 直到底層請求結束。
+
+        :param hosts: [Iterable[str]] target host addresses.
+        :param operation: [Union[str, Callable]] Endpoint_Action 的方法名稱 (ex: "bond_info")，或第一個參數為 dest 的函式
+        :param args: [all] operation 的其他參數
+        :param max_workers: [int] 同時執行的主機數上限 (default: FLEET_MAX_WORKERS)
+        :param host_timeout: [float] 每台主機的逾時秒數，None 代表不限制 (default: FLEET_HOST_TIMEOUT)
+        :param kwargs: [all] operation 的其他參數
+        :return: [Iterator[dict]] 每台主機的執行結果
+        """
+        operation = cls._resolve_operation(operation)
+        hosts = list(dict.fromkeys(hosts))
+        started = {}
+
+        Logger.info(
+            f"Fleet run `{getattr(operation, '__name__', operation)}` on {len(hosts)} hosts"
+            f" with {max_workers} workers"
+        )
+
+        executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bond-fleet"
+        )
+        pending = {}
+        try:
+            for host in hosts:
+                future = executor.submit(
+                    cls._run_on_host, operation, host, started, args, kwargs
+                )
+                pending[future] = host
+
+            while pending:
+                wait_timeout = None
+                if host_timeout:
+                    now = time.monotonic()
+                    deadlines = [
+                        started[host] + host_timeout
+                        for host in pending.values()
+                        if host in started
+                    ]
+                    wait_timeout = max(min(deadlines) - now, 0) if deadlines else 0.1
+
+                done, _ = wait(
+                    pending, timeout=wait_timeout, return_when=FIRST_COMPLETED
+                )
+
+                for future in done:
+                    pending.pop(future)
+                    yield future.result()
+
+                if not host_timeout:
+                    continue
+
+                now = time.monotonic()
+                for future, host in list(pending.items()):
+                    if host in started and now - started[host] >= host_timeout:
+                        pending.pop(future)
+                        Logger.error(f"Fleet operation on {host} timed out")
+                        yield {
+                            "host": host,
+                            "result": None,
+                            "error": TimeoutError(
+                                f"{host} did not finish within {host_timeout} seconds"
+                            ),
+                            "elapsed": now - started[host],
+                        }
+        finally:
+            # 呼叫端提早結束時取消尚未開始的主機
+            # (shutdown 的 cancel_futures 需要 Python 3.9)
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    @classmethod
+    def execute_all(
+        cls,
+        hosts: Iterable[str],
+        operation: Union[str, Callable],
+        *args,
+        max_workers: int = setting.FLEET_MAX_WORKERS,
+        host_timeout: float = setting.FLEET_HOST_TIMEOUT,
+        **kwargs,
+    ) -> dict:
+        """
+        Run operation on every host concurrently and wait for all of them.
+
+        :param hosts: [Iterable[str]] target host addresses.
+        :param operation: [Union[str, Callable]] Endpoint_Action 的方法名稱，或第一個參數為 dest 的函式
+        :param args: [all] operation 的其他參數
+        :param max_workers: [int] 同時執行的主機數上限 (default: FLEET_MAX_WORKERS)
+        :param host_timeout: [float] 每台主機的逾時秒數 (default: FLEET_HOST_TIMEOUT)
+        :param kwargs: [all] operation 的其他參數
+        :return: [dict] {host: 執行結果}
+        """
+        return {
+            item["host"]: item
+            for item in cls.execute(
+                hosts,
+                operation,
+                *args,
+                max_workers=max_workers,
+                host_timeout=host_timeout,
+                **kwargs,
+            )
+        }
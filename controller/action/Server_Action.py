@@ -1,14 +1,195 @@
 # -*- coding:utf-8 -*-
+import io
+import os
+import json
+import time
 import uuid
+import codecs
+import shlex
+import select
+from typing import Callable, Iterable, Iterator, Union
 
-from controller.common.SSH import SSH, SFTP
+import paramiko
+
+from controller.action_config import setting
+from controller.common.delta import Delta
+from controller.common.checksum import Checksum
+from controller.common.metrics import Metrics
+from controller.action.Fleet_Action import Fleet_Action
+from controller.common.ssh_pool import SSHPool
+from controller.common.sftp_transfer import SFTPTransfer
 from controller.common.logger.info_logger_handle import Logger
 
 
+class _OutputStream:
+    """
+    收集 SSH channel 的 stdout / stderr，並在每收到完整的一行時呼叫 callback。
+    """
+
+    def __init__(self, host: str, name: str, callback: Callable) -> None:
+        self.host = host
+        self.name = name
+        self.callback = callback
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._chunks = []
+        self._partial = ""
+        self.size = 0
+
+    def feed(self, data: bytes, final: bool = False) -> None:
+        """
+        Decode data and emit completed lines.
+
+        :param data: [bytes] 收到的資料
+        :param final: [bool] 是否為最後一段資料 (default: False)
+        """
+        self.size += len(data)
+        text = self._decoder.decode(data, final)
+        self._chunks.append(text)
+
+        if self.callback is None:
+            return
+
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        if final and self._partial:
+            lines.append(self._partial)
+            self._partial = ""
+
+        for line in lines:
+            self.callback(self.host, self.name, line)
+
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+
 class Server_Action:
     @staticmethod
+    def _remote_sha256(ssh: paramiko.SSHClient, path: str) -> str:
+        """
+        Get sha256 of remote file over the SSH connection.
+
+        :param ssh: [paramiko.SSHClient] SSHClient object
+        :param path: [str] remote file path.
+        :return: [str] sha256 hex digest，檔案不存在或無法計算時為 None
+        """
+        quoted = shlex.quote(path)
+        _, out_, _ = ssh.exec_command(
+            f"sha256sum -- {quoted} 2>/dev/null || shasum -a 256 -- {quoted}"
+        )
+        digest = out_.read().decode("utf-8", "replace").split(" ", 1)[0].strip()
+
+        return digest.lower() if len(digest) == 64 else None
+
+    @staticmethod
+    def _exec(ssh: paramiko.SSHClient, command: str) -> tuple:
+        """
+        Execute command and wait for its exit code.
+
+        :param ssh: [paramiko.SSHClient] SSHClient object
+        :param command: [str] the command string to execute.
+        :return: [tuple] (exit code, stdout bytes, stderr bytes)
+        """
+        _, out_, err_ = ssh.exec_command(command)
+        out, err = out_.read(), err_.read()
+
+        return out_.channel.recv_exit_status(), out, err
+
+    @staticmethod
+    def _delta_upload(
+        ssh: paramiko.SSHClient,
+        sftp: paramiko.SFTPClient,
+        filepath: str,
+        target: str,
+        remote_path: str,
+    ) -> dict:
+        """
+        Rebuild filepath at remote_path from the existing target and a block delta.
+
+        :param ssh: [paramiko.SSHClient] SSHClient object
+        :param sftp: [paramiko.SFTPClient] SFTPClient object
+        :param filepath: [str] local binary file path.
+        :param target: [str] 遠端現有的舊版 binary
+        :param remote_path: [str] 重建後的檔案路徑
+        :return: [dict] upload statistics，無法使用差異傳輸時為 None
+        """
+        start = time.monotonic()
+        try:
+            remote_size = sftp.stat(target).st_size
+        except IOError:
+            return None
+
+        # 每次呼叫上傳到 mktemp -d 建立的私有目錄 (0700)，
+        # 避免其他使用者預先放置同名的 script 而以部署帳號執行
+        code, out, err = Server_Action._exec(ssh, "mktemp -d")
+        if code != 0:
+            Logger.warning(f"Cannot create temp dir on remote: {err.decode().strip()}")
+            return None
+        work_dir = out.decode("utf-8", "replace").strip()
+
+        try:
+            script_path = f"{work_dir}/delta_remote.py"
+            sftp.putfo(io.BytesIO(Delta.script()), script_path)
+
+            python = f"{setting.DELTA_REMOTE_PYTHON} {shlex.quote(script_path)}"
+            code, out, err = Server_Action._exec(
+                ssh,
+                f"{python} signature {shlex.quote(target)}"
+                f" {Delta.block_size(remote_size)}",
+            )
+            if code != 0:
+                Logger.warning(
+                    f"Cannot get signature of {target}: {err.decode().strip()}"
+                )
+                return None
+
+            delta, stats = Delta.make_delta(filepath, json.loads(out))
+            if delta is None:
+                Logger.info(
+                    f"{filepath} differs too much from {target}, upload full file"
+                )
+                return None
+
+            delta_path = f"{work_dir}/delta"
+            sftp.putfo(io.BytesIO(delta), delta_path)
+            code, _, err = Server_Action._exec(
+                ssh,
+                f"{python} patch {shlex.quote(target)} {shlex.quote(delta_path)}"
+                f" {shlex.quote(remote_path)} {Checksum.sha256_file_cached(filepath)}",
+            )
+            if code != 0:
+                Logger.warning(
+                    f"Cannot apply delta to {target}: {err.decode().strip()}"
+                )
+                return None
+        finally:
+            Server_Action._exec(ssh, f"rm -rf -- {shlex.quote(work_dir)}")
+
+        elapsed = time.monotonic() - start
+        Logger.info(
+            f"Rebuilt {target} from delta: sent {stats['delta_size']} of"
+            f" {stats['size']} bytes in {elapsed:.2f}s"
+        )
+
+        return {
+            "mode": "delta",
+            "local": filepath,
+            "remote": remote_path,
+            "bytes": stats["delta_size"],
+            "elapsed": elapsed,
+            "throughput": stats["size"] / elapsed if elapsed else 0,
+            **stats,
+        }
+
+    @staticmethod
+    @Metrics.instrument()
     def only_update_binary_on_remote_server(
-        dest: str, filepath: str, target: str, key: str
+        dest: str,
+        filepath: str,
+        target: str,
+        key: str,
+        parallel: int = setting.SFTP_PARALLEL_CHUNKS,
+        skip_unchanged: bool = setting.DEPLOY_SKIP_UNCHANGED,
+        delta: bool = setting.DEPLOY_DELTA,
     ) -> dict:
         """
         Only update binary to remote server.
@@ -17,25 +198,57 @@ class Server_Action:
         :param filepath: [str] local binary file path.
         :param target: [str] target path on remote server.
         :param key: [str] private key file path.
-        :return: [dict] result
+        :param parallel: [int] 同時上傳的分段數，1 代表不分段 (default: SFTP_PARALLEL_CHUNKS).
+        :param skip_unchanged: [bool] 遠端檔案的 sha256 與本機相同時不上傳 (default: DEPLOY_SKIP_UNCHANGED).
+        :param delta: [bool] 遠端已有舊版時只傳送差異，失敗時改為完整上傳 (default: DEPLOY_DELTA).
+        :return: [dict] result with stdout, stderr, skipped and upload statistics
         """
         result = {}
 
-        with SSH(dest, key) as ssh, SFTP(dest, key) as sftp:
-            unique_id = uuid.uuid4()
-            target_remote_file = f"/tmp/remote{unique_id}"
+        # exec 與 SFTP 共用連線池中同一條 SSH transport
+        with SSHPool.connection(dest, key) as ssh:
+            with Metrics.phase("checksum"):
+                unchanged = skip_unchanged and Server_Action._remote_sha256(
+                    ssh, target
+                ) == Checksum.sha256_file_cached(filepath)
+            if unchanged:
+                Logger.info(f"{target} on {dest} is already up to date, skip upload")
+
+                return {"out": b"", "err": b"", "skipped": True, "upload": None}
 
-            sftp.put(filepath, target_remote_file)
-            Logger.info(f"Put {filepath} to {target_remote_file}")
+            with SFTPTransfer.open_sftp(ssh.get_transport()) as sftp:
+                unique_id = uuid.uuid4()
+                target_remote_file = f"/tmp/remote{unique_id}"
 
-            _, out_, err_ = ssh.exec_command(f"mv {target_remote_file} {target}")
-            Logger.info(f"Move {target_remote_file} to {target}")
+                upload = None
+                if delta and os.path.getsize(filepath) >= setting.DELTA_MIN_SIZE:
+                    with Metrics.phase("delta"):
+                        upload = Server_Action._delta_upload(
+                            ssh, sftp, filepath, target, target_remote_file
+                        )
+                if upload is None:
+                    with Metrics.phase("upload"):
+                        upload = SFTPTransfer.upload(
+                            sftp, filepath, target_remote_file, parallel=parallel
+                        )
+                    upload["mode"] = "full"
+                Metrics.add_bytes("sent", upload["bytes"])
 
-            result = {"out": out_.read(), "err": err_.read()}
+            with Metrics.phase("exec"):
+                _, out_, err_ = ssh.exec_command(f"mv {target_remote_file} {target}")
+                Logger.info(f"Move {target_remote_file} to {target}")
+
+                result = {
+                    "out": out_.read(),
+                    "err": err_.read(),
+                    "skipped": False,
+                    "upload": upload,
+                }
 
         return result
 
     @staticmethod
+    @Metrics.instrument()
     def execute_command(dest: str, key: str, command: str) -> dict:
         """
         Execute the provided command on remote server.
@@ -47,14 +260,17 @@ class Server_Action:
         """
         result = {}
 
-        with SSH(dest, key) as ssh:
-            _, out_, err_ = ssh.exec_command(command)
-            Logger.info(f"Executed command: {command}")
-            result = {"out": out_.read(), "err": err_.read()}
+        with SSHPool.connection(dest, key) as ssh:
+            with Metrics.phase("exec"):
+                _, out_, err_ = ssh.exec_command(command)
+                Logger.info(f"Executed command: {command}")
+                result = {"out": out_.read(), "err": err_.read()}
+            Metrics.add_bytes("received", len(result["out"]) + len(result["err"]))
 
         return result
 
     @staticmethod
+    @Metrics.instrument()
     def delete_target_file(dest: str, target: str, key: str) -> dict:
         """
         delete binary on remote server.
@@ -66,10 +282,168 @@ class Server_Action:
         """
         result = {}
 
-        with SSH(dest, key) as ssh:
-            _, out_, err_ = ssh.exec_command(f"rm {target}")
-            Logger.info(f"rm {target}")
+        with SSHPool.connection(dest, key) as ssh:
+            with Metrics.phase("exec"):
+                _, out_, err_ = ssh.exec_command(f"rm {target}")
+                Logger.info(f"rm {target}")
 
-            result = {"out": out_.read(), "err": err_.read()}
+                result = {"out": out_.read(), "err": err_.read()}
+            Metrics.add_bytes("received", len(result["out"]) + len(result["err"]))
 
         return result
+
+    @staticmethod
+    @Metrics.instrument()
+    def run_command(
+        dest: str,
+        key: str,
+        command: str,
+        username: str = None,
+        on_output: Callable[[str, str, str], None] = None,
+        timeout: float = setting.SSH_COMMAND_TIMEOUT,
+    ) -> dict:
+        """
+        Run command on remote server and stream its output while it is running.
+
+        :param dest: [str] target host address.
+        :param key: [str] private key file path.
+        :param command: [str] the command string to execute.
+        :param username: [str] SSH username (default: None).
+        :param on_output: [Callable[[str, str, str], None]] on_output(host, "out" 或 "err", 一行輸出)，在收到每一行時呼叫 (default: None).
+        :param timeout: [float] 逾時秒數，None 代表不限制 (default: SSH_COMMAND_TIMEOUT).
+        :return: [dict] command, exit_code, out, err, elapsed
+        """
+        start = time.monotonic()
+        deadline = start + timeout if timeout else None
+        out_ = _OutputStream(dest, "out", on_output)
+        err_ = _OutputStream(dest, "err", on_output)
+
+        with SSHPool.connection(dest, key, username) as ssh, Metrics.phase("exec"):
+            channel = ssh.get_transport().open_session()
+            try:
+                channel.exec_command(command)
+                Logger.info(f"Executed command on {dest}: {command}")
+
+                while True:
+                    wait_timeout = setting.SSH_POLL_INTERVAL
+                    if deadline is not None:
+                        if time.monotonic() >= deadline:
+                            raise TimeoutError(
+                                f"`{command}` on {dest} did not finish within {timeout} seconds"
+                            )
+                        wait_timeout = min(wait_timeout, deadline - time.monotonic())
+
+                    # 有新的 stdout / stderr 或 EOF 時 channel 的 fileno 會變成可讀
+                    select.select([channel], [], [], max(wait_timeout, 0))
+
+                    while channel.recv_ready():
+                        out_.feed(channel.recv(setting.SSH_RECV_SIZE))
+                    while channel.recv_stderr_ready():
+                        err_.feed(channel.recv_stderr(setting.SSH_RECV_SIZE))
+
+                    if (
+                        channel.eof_received
+                        and not channel.recv_ready()
+                        and not channel.recv_stderr_ready()
+                    ):
+                        break
+
+                exit_code = channel.recv_exit_status()
+            finally:
+                channel.close()
+
+        out_.feed(b"", final=True)
+        err_.feed(b"", final=True)
+        Metrics.add_bytes("received", out_.size + err_.size)
+
+        return {
+            "command": command,
+            "exit_code": exit_code,
+            "out": out_.text(),
+            "err": err_.text(),
+            "elapsed": time.monotonic() - start,
+        }
+
+    @staticmethod
+    @Metrics.instrument()
+    def run_commands(
+        dest: str,
+        key: str,
+        commands: Union[str, Iterable[str]],
+        username: str = None,
+        on_output: Callable[[str, str, str], None] = None,
+        timeout: float = setting.SSH_COMMAND_TIMEOUT,
+        stop_on_error: bool = True,
+    ) -> list:
+        """
+        Run commands one by one on remote server over one pooled connection.
+
+        :param dest: [str] target host address.
+        :param key: [str] private key file path.
+        :param commands: [Union[str, Iterable[str]]] 一個或多個指令
+        :param username: [str] SSH username (default: None).
+        :param on_output: [Callable[[str, str, str], None]] on_output(host, "out" 或 "err", 一行輸出) (default: None).
+        :param timeout: [float] 每個指令的逾時秒數，None 代表不限制 (default: SSH_COMMAND_TIMEOUT).
+        :param stop_on_error: [bool] exit code 不為 0 時停止執行後續指令 (default: True).
+        :return: [list] 每個指令的 command, exit_code, out, err, elapsed
+        """
+        if isinstance(commands, str):
+            commands = [commands]
+
+        results = []
+        for command in commands:
+            results.append(
+                Server_Action.run_command(
+                    dest, key, command, username, on_output, timeout
+                )
+            )
+            if stop_on_error and results[-1]["exit_code"] != 0:
+                Logger.warning(
+                    f"`{command}` on {dest} exited with {results[-1]['exit_code']},"
+                    " skip remaining commands"
+                )
+                break
+
+        return results
+
+    @staticmethod
+    def execute_on_hosts(
+        hosts: Iterable[str],
+        key: str,
+        commands: Union[str, Iterable[str]],
+        username: str = None,
+        on_output: Callable[[str, str, str], None] = None,
+        timeout: float = setting.SSH_COMMAND_TIMEOUT,
+        stop_on_error: bool = True,
+        max_workers: int = setting.FLEET_MAX_WORKERS,
+    ) -> Iterator[dict]:
+        """
+        Run commands on many hosts concurrently and yield results as each host finishes.
+
+        每筆結果為 {"host", "result", "error", "elapsed"}，result 為 Server_Action.run_commands 的回傳值，
+        連線失敗或逾時時 error 為例外物件。on_output 會在各主機的執行緒中被呼叫。
+
+        :param hosts: [Iterable[str]] target host addresses.
+        :param key: [str] private key file path.
+        :param commands: [Union[str, Iterable[str]]] 一個或多個指令
+        :param username: [str] SSH username (default: None).
+        :param on_output: [Callable[[str, str, str], None]] on_output(host, "out" 或 "err", 一行輸出) (default: None).
+        :param timeout: [float] 每個指令的逾時秒數，None 代表不限制 (default: SSH_COMMAND_TIMEOUT).
+        :param stop_on_error: [bool] exit code 不為 0 時停止執行該主機後續的指令 (default: True).
+        :param max_workers: [int] 同時執行的主機數上限 (default: FLEET_MAX_WORKERS).
+        :return: [Iterator[dict]] 每台主機的執行結果
+        """
+        if isinstance(commands, str):
+            commands = [commands]
+
+        return Fleet_Action.execute(
+            hosts,
+            Server_Action.run_commands,
+            key,
+            list(commands),
+            username,
+            on_output,
+            timeout,
+            stop_on_error,
+            max_workers=max_workers,
+        )
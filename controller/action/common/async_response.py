@@ -0,0 +1,230 @@
+# -*- coding:utf-8 -*-
+import asyncio
+import weakref
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 為選用套件，只有 AsyncEndpoint_Action 需要
+    aiohttp = None
+
+from controller.action_config import setting
+from controller.common.logger.payload import PayloadLog
+from controller.common.logger.info_logger_handle import Logger
+
+
+class AsyncResponseMethod:
+    """
+    AsyncResponseMethod 類別，ResponseMethod 的 asyncio 版本 (需要 aiohttp)。
+    每個 event loop 共用一個 aiohttp.ClientSession 及其 keep-alive 連線池。
+    """
+
+    _sessions = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def _get_session(cls) -> "aiohttp.ClientSession":
+        """
+        Get the ClientSession of the running event loop, create it if not exists.
+
+        :return: [aiohttp.ClientSession] 目前 event loop 的 session
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncEndpoint_Action requires aiohttp, install it by `pip install aiohttp`"
+            )
+
+        loop = asyncio.get_running_loop()
+        session = cls._sessions.get(loop)
+
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=setting.ASYNC_CONNECTION_LIMIT,
+                limit_per_host=setting.ASYNC_CONNECTION_LIMIT_PER_HOST,
+                keepalive_timeout=setting.SESSION_IDLE_TIMEOUT or None,
+                force_close=not setting.SESSION_KEEP_ALIVE,
+            )
+            # 與 requests 相同，預設不限制請求時間 (execute_file 可能執行很久)
+            session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=None)
+            )
+            cls._sessions[loop] = session
+
+        return session
+
+    @classmethod
+    async def close_sessions(cls) -> None:
+        """
+        Close the ClientSession of the running event loop.
+        """
+        session = cls._sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    @classmethod
+    async def get_response(cls, url: str, *args, **kwargs) -> "aiohttp.ClientResponse":
+        """
+        Get response from url. 呼叫端需自行 release (建議使用 async with)。
+
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [aiohttp.ClientResponse] 回應資料的物件
+        """
+        response = await cls._get_session().get(url, *args, **kwargs)
+        try:
+            response.raise_for_status()
+        except aiohttp.ClientResponseError:
+            # 呼叫端拿不到 response，明確將連線還給連線池 (不依賴 aiohttp 版本的行為)
+            await response.release()
+            raise
+
+        return response
+
+    @classmethod
+    async def post_response(cls, url: str, *args, **kwargs) -> "aiohttp.ClientResponse":
+        """
+        Post response to url. 呼叫端需自行 release (建議使用 async with)。
+
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [aiohttp.ClientResponse] 回應資料的物件
+        """
+        response = await cls._get_session().post(url, *args, **kwargs)
+        try:
+            response.raise_for_status()
+        except aiohttp.ClientResponseError:
+            # 呼叫端拿不到 response，明確將連線還給連線池 (不依賴 aiohttp 版本的行為)
+            await response.release()
+            raise
+
+        return response
+
+    @classmethod
+    async def _text(cls, method: str, url: str, *args, **kwargs) -> str:
+        """
+        Get text from response and log it.
+
+        :param method: [str] HTTP method
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [str] 回應資料的文字內容
+        """
+        async with cls._get_session().request(method, url, *args, **kwargs) as response:
+            text = await response.text()
+            PayloadLog.log(text, response.content_type)
+            try:
+                response.raise_for_status()
+            except aiohttp.ClientResponseError as e:
+                # 處理請求失敗的情況
+                Logger.error(f"HTTP request error: {e}")
+
+        return text
+
+    @classmethod
+    async def _content(cls, method: str, url: str, *args, **kwargs) -> bytes:
+        """
+        Get content from response and log it.
+
+        :param method: [str] HTTP method
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [bytes] 回應資料的內容
+        """
+        async with cls._get_session().request(method, url, *args, **kwargs) as response:
+            content = await response.read()
+            PayloadLog.log(content, response.content_type)
+            response.raise_for_status()
+
+        return content
+
+    @classmethod
+    async def _json(cls, method: str, url: str, *args, **kwargs) -> dict:
+        """
+        Get json from response and log it.
+
+        :param method: [str] HTTP method
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [dict] 回應資料的 json 內容
+        """
+        async with cls._get_session().request(method, url, *args, **kwargs) as response:
+            json = await response.json(content_type=None)
+            PayloadLog.log(await response.read(), response.content_type)
+            response.raise_for_status()
+
+        return json
+
+    @classmethod
+    async def get_text(cls, url: str, *args, **kwargs) -> str:
+        """
+        Get text from response and log it.
+
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [str] 回應資料的文字內容
+        """
+        return await cls._text("GET", url, *args, **kwargs)
+
+    @classmethod
+    async def post_text(cls, url: str, *args, **kwargs) -> str:
+        """
+        Get post text from response and log it.
+
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [str] 回應資料的文字內容
+        """
+        return await cls._text("POST", url, *args, **kwargs)
+
+    @classmethod
+    async def get_content(cls, url: str, *args, **kwargs) -> bytes:
+        """
+        Get content from response and log it.
+
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [bytes] 回應資料的內容
+        """
+        return await cls._content("GET", url, *args, **kwargs)
+
+    @classmethod
+    async def post_content(cls, url: str, *args, **kwargs) -> bytes:
+        """
+        Get post content from response and log it.
+
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [bytes] 回應資料的內容
+        """
+        return await cls._content("POST", url, *args, **kwargs)
+
+    @classmethod
+    async def get_json(cls, url: str, *args, **kwargs) -> dict:
+        """
+        Get json from response and log it.
+
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [dict] 回應資料的 Json 內容
+        """
+        return await cls._json("GET", url, *args, **kwargs)
+
+    @classmethod
+    async def post_json(cls, url: str, *args, **kwargs) -> dict:
+        """
+        Get post json from response and log it.
+
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [dict] 回應資料的 Json 內容
+        """
+        return await cls._json("POST", url, *args, **kwargs)
@@ -0,0 +1,94 @@
+# -*- coding:utf-8 -*-
+import time
+import threading
+
+import requests
+
+from controller.action_config import setting
+from controller.action.common.response import ResponseMethod
+from controller.common.logger.info_logger_handle import Logger
+
+
+class AgentCapability:
+    """
+    AgentCapability 類別，向 agent 查詢其支援的功能 (GET /capabilities/) 並快取結果。
+    舊版 agent 沒有此 endpoint，會被視為不支援任何新功能，呼叫端應退回原本的 JSON 格式。
+    查詢結果快取 CAPABILITY_CACHE_TTL 秒，其他錯誤 (5xx、格式不符) 只快取 CAPABILITY_FAILURE_TTL 秒。
+    """
+
+    # 新版 agent 回傳 {"capabilities": [...]} 中可能出現的功能名稱
+    UPLOAD_FILE_STREAM = "upload_file_stream"
+    UPLOAD_FOLDER_STREAM = "upload_folder_stream"
+    FOLDER_SYNC = "folder_sync"
+    GET_PHYSICAL_FILE_STREAM = "get_physical_file_stream"
+    CODEC_ZSTD = "codec_zstd"
+    CODEC_LZ4 = "codec_lz4"
+    EXECUTE_JOB = "execute_job"
+
+    _cache = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, dest: str, port: int) -> frozenset:
+        """
+        Get capabilities of agent, the result is cached per (dest, port).
+
+        :param dest: [str] target host address.
+        :param port: [int] target host port.
+        :return: [frozenset] agent 支援的功能名稱
+        """
+        with cls._lock:
+            cached = cls._cache.get((dest, port))
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0]
+
+        url = f"http://{dest}:{port}/capabilities/"
+        ttl = setting.CAPABILITY_CACHE_TTL
+        try:
+            content = ResponseMethod.get_response(url).json()
+            capabilities = frozenset(content.get("capabilities", ()))
+        except requests.exceptions.HTTPError as e:
+            capabilities = frozenset()
+            if e.response is None or e.response.status_code != 404:
+                # 暫時性錯誤，不要長時間把新版 agent 當成舊版
+                Logger.warning(f"Cannot get capabilities of {dest}:{port}: {e}")
+                ttl = setting.CAPABILITY_FAILURE_TTL
+            # 404: 舊版 agent 沒有 /capabilities/
+        except (ValueError, AttributeError) as e:
+            # 回傳格式不符
+            Logger.warning(f"Invalid capabilities from {dest}:{port}: {e!r}")
+            capabilities = frozenset()
+            ttl = setting.CAPABILITY_FAILURE_TTL
+
+        Logger.debug(f"Agent {dest}:{port} capabilities: {sorted(capabilities)}")
+
+        with cls._lock:
+            cls._cache[(dest, port)] = (capabilities, time.monotonic() + ttl)
+
+        return capabilities
+
+    @classmethod
+    def supports(cls, dest: str, port: int, feature: str) -> bool:
+        """
+        Check whether agent supports the feature.
+
+        :param dest: [str] target host address.
+        :param port: [int] target host port.
+        :param feature: [str] 功能名稱 (ex: AgentCapability.UPLOAD_FILE_STREAM)
+        :return: [bool] 是否支援
+        """
+        return feature in cls.get(dest, port)
+
+    @classmethod
+    def clear(cls, dest: str = None, port: int = None) -> None:
+        """
+        Clear cached capabilities of one agent, or all agents if dest is None.
+
+        :param dest: [str] target host address (default: None).
+        :param port: [int] target host port (default: None).
+        """
+        with cls._lock:
+            if dest is None:
+                cls._cache.clear()
+            else:
+                cls._cache.pop((dest, port), None)
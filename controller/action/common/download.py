@@ -0,0 +1,317 @@
+# -*- coding:utf-8 -*-
+import os
+import re
+import time
+import uuid
+import base64
+import hashlib
+from typing import Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import requests
+
+from controller.action_config import setting
+from controller.common.stream import StreamTool
+from controller.common.metrics import Metrics
+from controller.common.checksum import Checksum
+from controller.common.about_json import Json
+from controller.action.common.response import ResponseMethod
+from controller.common.logger.info_logger_handle import Logger
+
+
+class ResumableDownload:
+    """
+    ResumableDownload 類別，將下載內容寫入 DOWNLOAD_PATH 下的 .part 檔，
+    連線中斷後以 HTTP Range 從中斷處續傳，完成後以 sha256 檢查完整性。
+    續傳所需的資訊 (ETag、總大小、checksum 等) 存在同名的 .part.json 中，
+    因此即使程式重新啟動，同一個網址的下載仍可接續。
+    下載期間對 .part 檔持有 .part.lock 的獨占鎖，同一個網址同時有其他下載時，
+    後來者改用獨立的 .part 檔 (無法跨重啟續傳)，避免共用同一個 .part 檔。
+    """
+
+    _CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
+    @staticmethod
+    def part_path(url: str) -> str:
+        """
+        Get the .part file path of url.
+
+        :param url: [str] 下載網址
+        :return: [str] .part 檔路徑
+        """
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+        return os.path.join(setting.DOWNLOAD_PATH, f"bond_{digest}.part")
+
+    @staticmethod
+    def _expected_sha256(headers: requests.structures.CaseInsensitiveDict) -> str:
+        """
+        Get expected sha256 from DOWNLOAD_CHECKSUM_HEADER or Digest header.
+
+        :param headers: [CaseInsensitiveDict] 回應的 headers
+        :return: [str] sha256 hex digest，沒有提供時為 None
+        """
+        checksum = headers.get(setting.DOWNLOAD_CHECKSUM_HEADER)
+        if checksum:
+            return checksum.strip().lower()
+
+        # RFC 3230: Digest: sha-256=<base64>
+        for item in headers.get("Digest", "").split(","):
+            algorithm, _, value = item.strip().partition("=")
+            if algorithm.lower() == "sha-256" and value:
+                return base64.b64decode(value).hex()
+
+        return None
+
+    @classmethod
+    def _read_meta(cls, meta_path: str) -> dict:
+        """
+        Read sidecar meta of .part file.
+
+        :param meta_path: [str] .part.json 路徑
+        :return: [dict] meta
+        """
+        try:
+            return Json.load_json(meta_path)
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def _discard(cls, part_path: str) -> None:
+        """
+        Remove .part file and its meta.
+
+        :param part_path: [str] .part 檔路徑
+        """
+        for path in (part_path, part_path + ".json"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _lock(part_path: str):
+        """
+        Take exclusive lock of .part file without waiting.
+
+        :param part_path: [str] .part 檔路徑
+        :return: [BufferedRandom] lock 檔，已被其他下載鎖定時為 None
+        """
+        lock_path = part_path + ".lock"
+        while True:
+            lock = open(lock_path, "a+b")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                lock.close()
+                return None
+
+            # 取得鎖之前 lock 檔可能已被前一個下載刪除並重建
+            try:
+                if os.path.samestat(os.fstat(lock.fileno()), os.stat(lock_path)):
+                    return lock
+            except FileNotFoundError:
+                pass
+            lock.close()
+
+    @staticmethod
+    def _unlock(lock) -> None:
+        """
+        Release lock taken by _lock and remove the lock file.
+
+        :param lock: [BufferedRandom] lock 檔
+        """
+        if fcntl is None:
+            # Windows 無法刪除開啟中的檔案，先關閉 (同時釋放鎖)
+            lock.close()
+        try:
+            os.remove(lock.name)
+        except OSError:
+            # Windows 上其他下載正開啟 lock 檔，留給它刪除
+            pass
+        lock.close()
+
+    @classmethod
+    def _fetch(
+        cls,
+        url: str,
+        part_path: str,
+        chunk_size: int,
+        progress: Callable[[int, int], None],
+    ) -> dict:
+        """
+        Send one (range) request and append the body to .part file.
+
+        :param url: [str] 下載網址
+        :param part_path: [str] .part 檔路徑
+        :param chunk_size: [int] bytes per chunk
+        :param progress: [Callable[[int, int], None]] progress callback
+        :return: [dict] 更新後的 meta
+        """
+        meta = cls._read_meta(part_path + ".json")
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {}
+        if offset and meta:
+            headers["Range"] = f"bytes={offset}-"
+            validator = meta.get("etag") or meta.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+
+        with ResponseMethod.get_response(url, stream=True, headers=headers) as response:
+            content_range = cls._CONTENT_RANGE.match(
+                response.headers.get("Content-Range", "")
+            )
+
+            if response.status_code == 206 and content_range:
+                if int(content_range.group(1)) != offset:
+                    raise ValueError(
+                        f"Unexpected Content-Range: {content_range.group()}"
+                    )
+                total = content_range.group(3)
+                total = int(total) if total != "*" else meta.get("total")
+                mode = "ab"
+                Logger.info(f"Resume download of {url} from byte {offset}")
+            else:
+                # 伺服器不支援 Range 或檔案已變更，從頭開始
+                content_length = response.headers.get("Content-Length")
+                total = int(content_length) if content_length else None
+                offset = 0
+                mode = "wb"
+                meta = {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "content_disposition": response.headers.get("Content-Disposition"),
+                    "sha256": cls._expected_sha256(response.headers),
+                }
+
+            meta["total"] = total
+            Json.dump_json(part_path + ".json", meta)
+
+            with open(part_path, mode) as f:
+                chunks = Metrics.timed_iter(
+                    response.iter_content(chunk_size), "receive", "received"
+                )
+                written = StreamTool.write_chunks(chunks, f, progress, total, offset)
+
+        if total is not None and written != total:
+            raise requests.exceptions.ChunkedEncodingError(
+                f"Incomplete download: {written}/{total} bytes"
+            )
+
+        return meta
+
+    @classmethod
+    def download(
+        cls,
+        url: str,
+        chunk_size: int = setting.DOWNLOAD_CHUNK_SIZE,
+        progress: Callable[[int, int], None] = None,
+        retries: int = setting.DOWNLOAD_RETRIES,
+    ) -> tuple:
+        """
+        Download url into .part file with resume and checksum verification.
+        呼叫端需自行將 .part 檔搬移到最終位置。
+
+        :param url: [str] 下載網址
+        :param chunk_size: [int] bytes per chunk (default: DOWNLOAD_CHUNK_SIZE).
+        :param progress: [Callable[[int, int], None]] progress(已下載 bytes, 總 bytes 或 None) (default: None).
+        :param retries: [int] 中斷後的重試次數 (default: DOWNLOAD_RETRIES).
+        :return: [tuple] (.part 檔路徑, meta)
+        """
+        part_path = cls.part_path(url)
+        lock = cls._lock(part_path)
+        if lock is None:
+            Logger.warning(f"{url} is being downloaded elsewhere, download separately")
+            part_path = f"{os.path.splitext(part_path)[0]}_{uuid.uuid4().hex}.part"
+
+        try:
+            meta = cls._download(url, part_path, chunk_size, progress, retries)
+        except BaseException:
+            if lock is None:
+                # 獨立的 .part 檔之後不會再被續傳
+                cls._discard(part_path)
+            raise
+        finally:
+            if lock is not None:
+                cls._unlock(lock)
+
+        return part_path, meta
+
+    @classmethod
+    def _download(
+        cls,
+        url: str,
+        part_path: str,
+        chunk_size: int,
+        progress: Callable[[int, int], None],
+        retries: int,
+    ) -> dict:
+        """
+        Download url into part_path, retrying and resuming on interruption.
+
+        :param url: [str] 下載網址
+        :param part_path: [str] .part 檔路徑
+        :param chunk_size: [int] bytes per chunk
+        :param progress: [Callable[[int, int], None]] progress callback
+        :param retries: [int] 中斷後的重試次數
+        :return: [dict] meta
+        """
+        if cls._read_meta(part_path + ".json").get("url") != url:
+            cls._discard(part_path)
+
+        for attempt in range(retries + 1):
+            try:
+                meta = cls._fetch(url, part_path, chunk_size, progress)
+                break
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                meta = cls._read_meta(part_path + ".json")
+                if (
+                    status == 416
+                    and os.path.exists(part_path)
+                    and meta.get("total") == os.path.getsize(part_path)
+                ):
+                    # .part 檔已經完整
+                    break
+                if status == 416:
+                    cls._discard(part_path)
+                elif status is None or status < 500 or attempt == retries:
+                    raise
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout,
+            ) as e:
+                if attempt == retries:
+                    raise
+                Logger.warning(f"Download of {url} interrupted: {e}")
+
+            time.sleep(setting.DOWNLOAD_RETRY_BACKOFF * 2**attempt)
+        else:
+            raise requests.exceptions.RetryError(
+                f"Download of {url} failed after {retries} retries"
+            )
+
+        expected = meta.get("sha256")
+        if expected:
+            actual = Checksum.sha256_file(part_path, chunk_size)
+            if actual != expected:
+                cls._discard(part_path)
+                raise ValueError(
+                    f"Checksum mismatch for {url}: expected {expected}, got {actual}"
+                )
+            Logger.info(f"Checksum verified for {url}")
+        else:
+            Logger.warning(f"No checksum provided for {url}, skip verification")
+
+        os.remove(part_path + ".json")
+
+        return meta
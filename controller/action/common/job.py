@@ -0,0 +1,326 @@
+# -*- coding:utf-8 -*-
+import time
+import heapq
+import itertools
+import threading
+from typing import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from controller.action_config import setting
+from controller.action.common.response import ResponseMethod
+from controller.common.logger.info_logger_handle import Logger
+
+
+class JobError(RuntimeError):
+    """
+    Job 在 agent 上執行失敗，或無法取得其狀態。
+    """
+
+
+class Job(Future):
+    """
+    Job 類別，在 agent 上執行中的 execute_file / execute_python_folder 的 handle。
+    為 concurrent.futures.Future，可使用 result(timeout)、add_done_callback，
+    或以 concurrent.futures.wait / as_completed 同時等待多個 job。
+    成功時結果與同步的 execute_* 相同 (agent 回傳的文字)，失敗時拋出 JobError。
+    """
+
+    def __init__(self, dest: str, port: int, kind: str, target: str) -> None:
+        super().__init__()
+        self.dest = dest
+        self.port = port
+        self.kind = kind
+        self.target = target
+        self.job_id = None
+        self.submitted = time.monotonic()
+        self.finished = None
+        self.polls = 0
+        self._interval = setting.JOB_POLL_INTERVAL
+        self._errors = 0
+        self.set_running_or_notify_cancel()
+
+    def _finish(self, result: str = None, error: BaseException = None) -> None:
+        self.finished = time.monotonic()
+        if error is None:
+            self.set_result(result)
+        else:
+            self.set_exception(error)
+
+    def __repr__(self) -> str:
+        state = "done" if self.done() else "running"
+        return f"<Job {self.kind} `{self.target}` on {self.dest}:{self.port} {state}>"
+
+
+class JobPoller:
+    """
+    JobPoller 類別，以單一背景執行緒追蹤所有已送出的 job。
+
+    支援 AgentCapability.EXECUTE_JOB 的 agent：
+        POST /execute_job/  {"kind", "to_be_executed", "timeout", "extra_args"} -> {"job_id"}
+        POST /job_status/   {"job_ids": [...]} -> {"jobs": {job_id: {"status", "result"}}}
+        status 為 "running" / "done" / "failed"，不存在的 job_id 不會出現在回應中。
+
+    到期 (及 JOB_POLL_COALESCE 內即將到期) 的 job 依主機合併成一個狀態查詢，
+    查詢後仍在執行的 job 依 JOB_POLL_BACKOFF 拉長間隔，
+    因此數千個長時間執行的 job 只需少量請求。
+    不支援的舊版 agent 改以 JOB_FALLBACK_WORKERS 個執行緒呼叫同步的 execute_*，
+    呼叫端執行緒仍不會被阻塞。
+    """
+
+    _condition = threading.Condition()
+    _heap = []
+    _sequence = itertools.count()
+    _thread = None
+    # stop / _start 時遞增，舊的 poller 執行緒看到不同的 generation 即結束
+    _generation = 0
+    _poll_executor = None
+    _fallback_executor = None
+
+    @classmethod
+    def submit(
+        cls,
+        dest: str,
+        port: int,
+        kind: str,
+        data: dict,
+    ) -> Job:
+        """
+        Submit job to agent and start tracking it.
+
+        :param dest: [str] target host address.
+        :param port: [int] target host port.
+        :param kind: [str] "file" / "python_folder"
+        :param data: [dict] {"to_be_executed", "timeout", "extra_args"}
+        :return: [Job] job handle
+        """
+        job = Job(dest, port, kind, data["to_be_executed"])
+        url = f"http://{dest}:{port}/execute_job/"
+
+        job.job_id = ResponseMethod.post_json(url, json={"kind": kind, **data})[
+            "job_id"
+        ]
+        Logger.info(f"Submitted job {job.job_id} on {dest}:{port}")
+
+        with cls._condition:
+            cls._start()
+            cls._schedule(job)
+
+        return job
+
+    @classmethod
+    def submit_fallback(
+        cls, dest: str, port: int, kind: str, target: str, func: Callable[[], str]
+    ) -> Job:
+        """
+        Run blocking func in fallback worker for agents without job support.
+
+        :param dest: [str] target host address.
+        :param port: [int] target host port.
+        :param kind: [str] "file" / "python_folder"
+        :param target: [str] target path.
+        :param func: [Callable[[], str]] 同步的 execute_* 呼叫
+        :return: [Job] job handle
+        """
+        job = Job(dest, port, kind, target)
+
+        def run() -> None:
+            try:
+                result = func()
+            except Exception as e:
+                job._finish(error=e)
+            else:
+                job._finish(result)
+
+        with cls._condition:
+            if cls._fallback_executor is None:
+                cls._fallback_executor = ThreadPoolExecutor(
+                    setting.JOB_FALLBACK_WORKERS, thread_name_prefix="bond-job-fallback"
+                )
+            cls._fallback_executor.submit(run)
+
+        return job
+
+    @classmethod
+    def _start(cls) -> None:
+        """
+        Start the poller thread if not running. Caller must hold the condition.
+        """
+        if cls._thread is not None:
+            return
+
+        # 前一次 stop 的執行緒可能尚未結束，新的執行緒使用新的 generation 及 executor
+        cls._generation += 1
+        cls._poll_executor = ThreadPoolExecutor(
+            setting.JOB_POLL_WORKERS, thread_name_prefix="bond-job-poll"
+        )
+        cls._thread = threading.Thread(
+            target=cls._run,
+            args=(cls._generation, cls._poll_executor),
+            name="bond-job-poller",
+            daemon=True,
+        )
+        cls._thread.start()
+
+    @classmethod
+    def _schedule(cls, job: Job) -> None:
+        """
+        Schedule next status check of job. Caller must hold the condition.
+
+        :param job: [Job] job handle
+        """
+        due = time.monotonic() + job._interval
+        heapq.heappush(cls._heap, (due, next(cls._sequence), job))
+        cls._condition.notify()
+
+    @classmethod
+    def _run(cls, generation: int, executor: ThreadPoolExecutor) -> None:
+        """
+        Poller loop: wait for due jobs, group them by host and dispatch status checks.
+
+        :param generation: [int] 此執行緒的 generation，與目前的不同時結束
+        :param executor: [ThreadPoolExecutor] 此執行緒使用的 poll executor
+        """
+        while True:
+            with cls._condition:
+                while cls._generation == generation:
+                    now = time.monotonic()
+                    if cls._heap and cls._heap[0][0] <= now:
+                        break
+                    cls._condition.wait(cls._heap[0][0] - now if cls._heap else None)
+
+                if cls._generation != generation:
+                    return
+
+                # 即將到期的 job 也一起查詢，讓同一台 agent 的 job 對齊到同一批，
+                # 但最多只提早間隔的一半，避免間隔短的 job 被連續查詢
+                batches, deferred = {}, []
+                while cls._heap and cls._heap[0][0] <= now + setting.JOB_POLL_COALESCE:
+                    entry = heapq.heappop(cls._heap)
+                    due, job = entry[0], entry[2]
+                    if job.done():
+                        continue
+                    if due - now > job._interval / 2:
+                        deferred.append(entry)
+                    else:
+                        batches.setdefault((job.dest, job.port), []).append(job)
+                for entry in deferred:
+                    heapq.heappush(cls._heap, entry)
+
+            for (dest, port), jobs in batches.items():
+                for i in range(0, len(jobs), setting.JOB_POLL_BATCH_SIZE):
+                    executor.submit(
+                        cls._poll,
+                        generation,
+                        dest,
+                        port,
+                        jobs[i : i + setting.JOB_POLL_BATCH_SIZE],
+                    )
+
+    @classmethod
+    def _poll(cls, generation: int, dest: str, port: int, jobs: list) -> None:
+        """
+        Check status of jobs on one agent, finish completed ones and reschedule the others.
+
+        :param generation: [int] 送出此查詢的 poller generation
+        :param dest: [str] target host address.
+        :param port: [int] target host port.
+        :param jobs: [list] 同一台 agent 上的 Job
+        """
+        url = f"http://{dest}:{port}/job_status/"
+        try:
+            statuses = ResponseMethod.post_json(
+                url,
+                json={"job_ids": [job.job_id for job in jobs]},
+                timeout=setting.JOB_POLL_TIMEOUT,
+            ).get("jobs", {})
+        except Exception as e:
+            Logger.warning(f"Cannot get job status from {dest}:{port}: {e!r}")
+            statuses = None
+
+        running = []
+        for job in jobs:
+            job.polls += 1
+            if statuses is None:
+                job._errors += 1
+                if job._errors >= setting.JOB_POLL_MAX_ERRORS:
+                    job._finish(
+                        error=JobError(
+                            f"Cannot get status of job {job.job_id} on {dest}:{port}"
+                        )
+                    )
+                    continue
+            else:
+                job._errors = 0
+                status = statuses.get(job.job_id)
+                if status is None:
+                    # agent 重新啟動等原因遺失 job
+                    job._finish(
+                        error=JobError(f"Job {job.job_id} not found on {dest}:{port}")
+                    )
+                    continue
+                if status.get("status") == "done":
+                    job._finish(status.get("result"))
+                    continue
+                if status.get("status") == "failed":
+                    job._finish(
+                        error=JobError(
+                            f"Job {job.job_id} on {dest}:{port} failed: {status.get('result')}"
+                        )
+                    )
+                    continue
+
+            job._interval = min(
+                job._interval * setting.JOB_POLL_BACKOFF, setting.JOB_POLL_MAX_INTERVAL
+            )
+            running.append(job)
+
+        with cls._condition:
+            stopping = cls._generation != generation
+            if not stopping:
+                for job in running:
+                    cls._schedule(job)
+
+        if stopping:
+            cls._abort(running)
+
+    @staticmethod
+    def _abort(jobs: list) -> None:
+        """
+        Finish unfinished jobs with JobError, so waiting callers are not blocked forever.
+
+        :param jobs: [list] Job
+        """
+        for job in jobs:
+            if not job.done():
+                job._finish(error=JobError(f"Poller stopped, {job!r} is not tracked"))
+
+    @classmethod
+    def pending(cls) -> int:
+        """
+        Get the number of jobs tracked by the poller.
+
+        :return: [int] 等待查詢的 job 數 (不含查詢中的 job)
+        """
+        with cls._condition:
+            return sum(not job.done() for _, _, job in cls._heap)
+
+    @classmethod
+    def stop(cls) -> None:
+        """
+        Stop the poller thread, unfinished jobs (waiting or being checked) fail with JobError.
+        """
+        with cls._condition:
+            thread, cls._thread = cls._thread, None
+            executor, cls._poll_executor = cls._poll_executor, None
+            cls._generation += 1
+            waiting = [job for _, _, job in cls._heap]
+            cls._heap.clear()
+            cls._condition.notify_all()
+
+        if thread is not None:
+            thread.join()
+        if executor is not None:
+            # 查詢中的 job 由 _poll 在看到 generation 改變後結束
+            executor.shutdown(wait=True)
+
+        cls._abort(waiting)
@@ -1,6 +1,8 @@
 import requests
 
-from controller.common.logger.info_logger_handle import Logger
+from controller.common.metrics import Metrics
+from controller.action.common.session_pool import SessionPool
+from controller.common.logger.payload import PayloadLog
 
 
 class ResponseMethod:
@@ -14,7 +16,7 @@ class ResponseMethod:
         """
         headers = response.headers
 
-        Logger.info(headers)
+        PayloadLog.log(headers)
         response.raise_for_status()
 
         return headers
@@ -28,7 +30,7 @@ class ResponseMethod:
         :return: [str] 回應資料的文字內容
         """
         text = response.text
-        Logger.info(text)
+        PayloadLog.log(text, response.headers.get("Content-Type"))
         try:
             response.raise_for_status()
         except requests.exceptions.HTTPError as e:
@@ -50,7 +52,7 @@ class ResponseMethod:
         """
         content = response.content
 
-        Logger.info(content)
+        PayloadLog.log(content, response.headers.get("Content-Type"))
         response.raise_for_status()
 
         return content
@@ -65,7 +67,7 @@ class ResponseMethod:
         """
         json = response.json()
 
-        Logger.info(json)
+        PayloadLog.log(response.content, response.headers.get("Content-Type"))
         response.raise_for_status()
 
         return json
@@ -80,7 +82,9 @@ class ResponseMethod:
         :param kwargs: [all] kwargs
         :return: [requests.Session] 回應資料的物件
         """
-        return requests.get(url, *args, **kwargs)
+        return ResponseMethod.__send(
+            SessionPool.get_session(url).get, url, *args, **kwargs
+        )
 
     @staticmethod
     def __post(url: requests.Session, *args, **kwargs) -> requests.Session:
@@ -92,7 +96,33 @@ class ResponseMethod:
         :param kwargs: [all] kwargs
         :return:  [requests.Session] 回應資料的物件
         """
-        return requests.post(url, *args, **kwargs)
+        return ResponseMethod.__send(
+            SessionPool.get_session(url).post, url, *args, **kwargs
+        )
+
+    @staticmethod
+    def __send(method, url: str, *args, **kwargs) -> requests.Response:
+        """
+        Send request, record receive time and bytes to Metrics if recording.
+
+        :param method: [Callable] session.get / session.post
+        :param url: [str] 請求的網址
+        :param args: [all] args
+        :param kwargs: [all] kwargs
+        :return: [requests.Response] 回應資料的物件
+        """
+        # 串流的回應由讀取端 (StreamTool) 記錄接收時間
+        if Metrics.current() is None or kwargs.get("stream"):
+            return method(url, *args, **kwargs)
+
+        # 以串流方式送出，再自行讀取 body，才能分開等待回應與接收的時間
+        kwargs["stream"] = True
+        response = method(url, *args, **kwargs)
+        with Metrics.phase("receive"):
+            content = response.content
+        Metrics.add_bytes("received", len(content))
+
+        return response
 
     @classmethod
     def get_response(cls, url: requests.Session, *args, **kwargs) -> requests.Session:
@@ -219,3 +249,12 @@ class ResponseMethod:
         :return: [dict] 回應資料的 Json 內容
         """
         return cls.__get_json_and_logger(cls.__post(url, *args, **kwargs))
+
+    @staticmethod
+    def close_sessions(url: str = None) -> None:
+        """
+        Close pooled HTTP sessions.
+
+        :param url: [str] 只關閉該網址主機的 session，None 則全部關閉 (default: None)
+        """
+        SessionPool.close(url)
@@ -0,0 +1,208 @@
+# -*- coding:utf-8 -*-
+import time
+import atexit
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import connection, connectionpool
+
+from controller.action_config import setting
+from controller.common.metrics import Metrics
+from controller.common.logger.info_logger_handle import Logger
+
+
+class _MetricsConnectionMixin:
+    """
+    將連線 (含 DNS 查詢)、傳送、等待回應的時間與傳送的 bytes 記到 Metrics 目前的呼叫紀錄，
+    沒有呼叫紀錄時只多一次檢查。
+    """
+
+    def connect(self) -> None:
+        with Metrics.phase("connect"):
+            super().connect()
+
+    def _exclusive(self, name: str, func, *args, **kwargs):
+        """
+        Call func and add its time to phase, excluding phases recorded inside it
+        (ex: connect, or zip / read while consuming a streaming body).
+        """
+        record = Metrics.current()
+        if record is None:
+            return func(*args, **kwargs)
+
+        phases = record["phases"]
+        before = sum(phases.values())
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start - (sum(phases.values()) - before)
+            phases[name] = phases.get(name, 0.0) + elapsed
+
+    def request(self, *args, **kwargs):
+        return self._exclusive("send", super().request, *args, **kwargs)
+
+    def request_chunked(self, *args, **kwargs):
+        # urllib3 1.x 以 request_chunked 傳送 chunked body
+        return self._exclusive("send", super().request_chunked, *args, **kwargs)
+
+    def getresponse(self, *args, **kwargs):
+        return self._exclusive("wait", super().getresponse, *args, **kwargs)
+
+    def send(self, data) -> None:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            Metrics.add_bytes("sent", len(data))
+        super().send(data)
+
+
+class _MetricsHTTPConnection(_MetricsConnectionMixin, connection.HTTPConnection):
+    pass
+
+
+class _MetricsHTTPSConnection(_MetricsConnectionMixin, connection.HTTPSConnection):
+    pass
+
+
+class _MetricsHTTPConnectionPool(connectionpool.HTTPConnectionPool):
+    ConnectionCls = _MetricsHTTPConnection
+
+
+class _MetricsHTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+    ConnectionCls = _MetricsHTTPSConnection
+
+
+class MetricsHTTPAdapter(HTTPAdapter):
+    """
+    MetricsHTTPAdapter 類別，使用記錄 Metrics 的連線。
+    """
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _MetricsHTTPConnectionPool,
+            "https": _MetricsHTTPSConnectionPool,
+        }
+
+
+class SessionPool:
+    """
+    SessionPool 類別，依照目標主機保存可重複使用的 requests.Session，
+    讓同一台 agent 的多次請求共用 keep-alive 連線。
+    """
+
+    _sessions = {}
+    _last_used = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        """
+        Get pool key (scheme://host:port) from url.
+
+        :param url: [str] 請求的網址
+        :return: [str] 連線池的 key
+        """
+        parts = urlsplit(url)
+
+        return f"{parts.scheme}://{parts.netloc}"
+
+    @staticmethod
+    def _new_session() -> requests.Session:
+        """
+        Create a session with the configured connection pool.
+
+        :return: [requests.Session] 新建立的 session
+        """
+        session = requests.Session()
+        adapter = MetricsHTTPAdapter(
+            pool_connections=setting.SESSION_POOL_CONNECTIONS,
+            pool_maxsize=setting.SESSION_POOL_MAXSIZE,
+            pool_block=setting.SESSION_POOL_BLOCK,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        if not setting.SESSION_KEEP_ALIVE:
+            session.headers["Connection"] = "close"
+
+        return session
+
+    @classmethod
+    def get_session(cls, url: str) -> requests.Session:
+        """
+        Get the pooled session of the url's host, create it if not exists.
+
+        :param url: [str] 請求的網址
+        :return: [requests.Session] 該主機的 session
+        """
+        key = cls._host_key(url)
+        now = time.monotonic()
+
+        with cls._lock:
+            cls._evict_idle(now)
+
+            session = cls._sessions.get(key)
+            if session is None:
+                session = cls._new_session()
+                cls._sessions[key] = session
+                Logger.debug(f"Create HTTP session for {key}")
+
+            cls._last_used[key] = now
+
+        return session
+
+    @classmethod
+    def _evict_idle(cls, now: float) -> None:
+        """
+        Close sessions which are idle longer than SESSION_IDLE_TIMEOUT.
+        Caller must hold the lock.
+
+        :param now: [float] 目前的 monotonic 時間
+        """
+        if not setting.SESSION_IDLE_TIMEOUT:
+            return
+
+        for key, last_used in list(cls._last_used.items()):
+            if now - last_used > setting.SESSION_IDLE_TIMEOUT:
+                cls._sessions.pop(key).close()
+                del cls._last_used[key]
+                Logger.debug(f"Close idle HTTP session for {key}")
+
+    @classmethod
+    def evict_idle(cls) -> None:
+        """
+        Close sessions which are idle longer than SESSION_IDLE_TIMEOUT.
+        """
+        with cls._lock:
+            cls._evict_idle(time.monotonic())
+
+    @classmethod
+    def close(cls, url: str = None) -> None:
+        """
+        Close the session of the url's host, or all sessions if url is None.
+
+        :param url: [str] 請求的網址 (default: None)
+        """
+        with cls._lock:
+            keys = list(cls._sessions) if url is None else [cls._host_key(url)]
+
+            for key in keys:
+                session = cls._sessions.pop(key, None)
+                cls._last_used.pop(key, None)
+                if session is not None:
+                    session.close()
+
+    @classmethod
+    def size(cls) -> int:
+        """
+        Get the number of pooled sessions.
+
+        :return: [int] session 的數量
+        """
+        with cls._lock:
+            return len(cls._sessions)
+
+
+atexit.register(SessionPool.close)
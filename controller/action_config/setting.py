@@ -1,3 +1,5 @@
+import os
+
 from controller.action_config.__version__ import __version__
 
 DEBUG = False
@@ -6,9 +8,109 @@ VERSION = __version__
 # *------ Agent Config ------*
 AGENT_PORT = 8086
 EXECUTE_TIMEOUT = 0  # 單位為秒
+CAPABILITY_CACHE_TTL = (
+    300  # 單位為秒，agent 能力的快取時間 (agent 升級後最晚在此時間後生效)
+)
+CAPABILITY_FAILURE_TTL = 10  # 單位為秒，查詢失敗 (非 404) 時暫時視為舊版 agent 的時間
+
+# *------ Upload Config ------*
+UPLOAD_MODE = "auto"  # auto: 依 agent 能力選擇 / stream: 串流上傳 / json: base64 JSON
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 單位為 bytes
+
+# *------ HTTP Session Pool Config ------*
+SESSION_POOL_CONNECTIONS = 10  # 每個 session 快取的 connection pool 數量
+SESSION_POOL_MAXSIZE = 10  # 每個 connection pool 保留的連線數
+SESSION_POOL_BLOCK = False  # 連線數用盡時是否等待
+SESSION_KEEP_ALIVE = True
+SESSION_IDLE_TIMEOUT = 300  # 單位為秒，0 代表不回收閒置 session
+
+# *------ SSH Config ------*
+SSH_PORT = 22
+SSH_CONNECT_TIMEOUT = 10  # 單位為秒
+SSH_KEEPALIVE_INTERVAL = 30  # 單位為秒，0 代表不送 keepalive
+SSH_IDLE_TIMEOUT = 300  # 單位為秒，0 代表不回收閒置連線
+SSH_COMMAND_TIMEOUT = None  # 單位為秒，None 代表不限制
+SSH_RECV_SIZE = 32 * 1024  # 每次從 channel 讀取的 bytes
+SSH_POLL_INTERVAL = 1  # 等待輸出時最長的阻塞秒數
+INTERACTIVE_PROMPT = r"[$#>]\s*$"  # InteractiveSSH 判斷指令結束的 prompt regex
+INTERACTIVE_PROMPT_WINDOW = 1024  # 比對 prompt 時只看輸出最後的字元數
+INTERACTIVE_IDLE_TIMEOUT = 5  # 單位為秒，沒有新輸出超過此時間即返回
+INTERACTIVE_TIMEOUT = 60  # 單位為秒，每個指令最長等待時間
+
+# *------ SFTP Config ------*
+SFTP_WINDOW_SIZE = 8 * 1024 * 1024  # SFTP channel window，單位為 bytes
+SFTP_BLOCK_SIZE = 1024 * 1024  # 每次從本機檔案讀取的 bytes
+SFTP_PARALLEL_CHUNKS = 1  # 大檔案同時上傳的分段數，1 代表不分段
+SFTP_PARALLEL_MIN_CHUNK = 8 * 1024 * 1024  # 每個分段的最小 bytes
+DEPLOY_SKIP_UNCHANGED = False  # 上傳前比對遠端 sha256，相同時不上傳 (選用)
+DEPLOY_DELTA = False  # 只傳送差異的 block (選用，遠端需有 python3 與可寫的暫存目錄)
+DELTA_MIN_SIZE = 1024 * 1024  # 小於此大小的 binary 直接完整上傳，單位為 bytes
+DELTA_BLOCK_SIZE = 0  # 單位為 bytes，0 代表依檔案大小自動決定
+DELTA_MAX_LITERAL_RATIO = 0.5  # 新資料超過檔案大小的此比例時改為完整上傳
+DELTA_REMOTE_PYTHON = "python3"
+
+# *------ Async HTTP Config ------*
+ASYNC_CONNECTION_LIMIT = 1000  # AsyncEndpoint_Action 同時開啟的連線總數上限
+ASYNC_CONNECTION_LIMIT_PER_HOST = 10  # 每台主機的連線數上限
+
+# *------ Fleet Config ------*
+FLEET_MAX_WORKERS = 32  # 同時執行的主機數上限
+FLEET_HOST_TIMEOUT = None  # 單位為秒，None 代表不限制
+
+# *------ Job Config ------*
+JOB_POLL_INTERVAL = 0.5  # 單位為秒，第一次查詢 job 狀態前的等待時間
+JOB_POLL_MAX_INTERVAL = 10  # 單位為秒，查詢間隔的上限
+JOB_POLL_BACKOFF = 1.5  # 每次查詢後 job 仍在執行時，間隔乘上此倍數
+JOB_POLL_COALESCE = (
+    0.5  # 單位為秒，提早查詢此時間內即將到期的 job，與同主機的其他 job 合併
+)
+JOB_POLL_BATCH_SIZE = 1000  # 每個請求查詢的 job 數上限
+JOB_POLL_WORKERS = 8  # 同時送出狀態查詢的主機數
+JOB_POLL_TIMEOUT = 10  # 單位為秒，狀態查詢請求的逾時
+JOB_POLL_MAX_ERRORS = 5  # 連續查詢失敗超過此次數時 job 視為失敗
+JOB_FALLBACK_WORKERS = 32  # 不支援 job 的舊版 agent 改以執行緒等待結果，同時等待的上限
+
+# *------ Metrics Config ------*
+METRICS_ENABLED = False  # 記錄每次呼叫的階段耗時與傳輸量，見 Metrics
+METRICS_PREFIX = "bond_controller"  # Prometheus metric 名稱的前綴
+METRICS_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)  # 單位為秒
+
+# *------ Zip Config ------*
+ZIP_PARALLEL = True  # 多執行緒壓縮資料夾
+ZIP_PARALLEL_WORKERS = min(8, os.cpu_count() or 1)
+# 已壓縮過的格式直接儲存，不再浪費 CPU 壓縮
+ZIP_STORED_EXTENSIONS = (
+    ".zip",
+    ".gz",
+    ".tgz",
+    ".bz2",
+    ".xz",
+    ".zst",
+    ".7z",
+    ".whl",
+    ".jar",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".mp4",
+)
+# 資料夾傳輸的壓縮方式: store / deflate[:等級] / zstd[:等級] / lz4 / auto
+# zstd 需要 zstandard 套件、lz4 需要 lz4 套件，且 agent 也需支援
+ZIP_CODEC = "deflate"
+ZIP_CODEC_AUTO_DEFAULT = "deflate"  # auto 尚未量測到連線速度前使用的 codec
+ZIP_CODEC_MIN_SAMPLE = 256 * 1024  # 小於此大小的傳輸不列入量測，單位為 bytes
+ZIP_CACHE_ENABLED = True  # 重複使用未變更資料夾的壓縮結果
+ZIP_CACHE_MAX_ENTRIES = 16
+ZIP_CACHE_MAX_BYTES = 256 * 1024 * 1024  # 記憶體快取上限，單位為 bytes
+ZIP_CACHE_PATH = None  # 磁碟快取目錄，None 代表只使用記憶體快取
 
 # *------ Download Config ------*
 DOWNLOAD_PATH = "./Downloads"
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 單位為 bytes
+DOWNLOAD_RETRIES = 5  # 連線中斷後續傳的次數
+DOWNLOAD_RETRY_BACKOFF = 1  # 單位為秒，每次重試加倍
+DOWNLOAD_CHECKSUM_HEADER = "X-Checksum-Sha256"  # agent 提供 sha256 的 header
 
 
 # *----- All Logger Setting -----*
@@ -19,6 +121,8 @@ LOG_COLOR = {
     "ERROR": "red",
     "CRITICAL": "red",
 }
+LOG_PAYLOAD_MODE = "truncate"  # HTTP 回應內容的 log: off / truncate / summary / full
+LOG_PAYLOAD_MAX_BYTES = 1024  # truncate 時最多記錄的 bytes
 
 # *----- Server INFO Log Setting -----*
 INFO_LOG_NAME = "Bond Controller"
@@ -29,3 +133,6 @@ INFO_LOG_FILE_NAME = "Bond_Controller_INFO_LOG.log"
 INFO_LOG_BACKUP_COUNT = 5
 INFO_LOG_MODE = "a"
 INFO_LOG_ENCODING = "utf-8"
+INFO_LOG_ASYNC = False  # 由背景執行緒寫出 log，呼叫端只放入 queue
+INFO_LOG_QUEUE_SIZE = 10000  # 非同步模式 queue 的上限筆數
+INFO_LOG_QUEUE_OVERFLOW = "block"  # queue 滿時: block / drop_new / drop_oldest
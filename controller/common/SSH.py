@@ -1,7 +1,14 @@
 # -*- coding:utf-8 -*-
+import re
 import time
+import codecs
+import socket
 import paramiko
 
+from controller.action_config import setting
+from controller.common.sftp_transfer import SFTPTransfer
+from controller.common.logger.info_logger_handle import Logger
+
 
 class SSH:
     """
@@ -73,6 +80,9 @@ class SSH:
 class InteractiveSSH:
     """
     Interactive SSH Client
+
+    進入 context manager 後可用 execute 在同一個 shell session 中依序執行多個指令，
+    每個指令讀到 prompt、閒置超過 idle_timeout 或超過 timeout 時返回。
     """
 
     def __init__(
@@ -91,6 +101,7 @@ class InteractiveSSH:
         self.username = username
         self.password = password
         self.client = paramiko.SSHClient()
+        self.shell = None
 
     def __enter__(self) -> paramiko.Channel:
         """
@@ -108,7 +119,9 @@ class InteractiveSSH:
                 self.dest, username=self.username, password=self.password
             )
 
-        return self.client.invoke_shell()
+        self.shell = self.client.invoke_shell()
+
+        return self.shell
 
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         """
@@ -122,6 +135,119 @@ class InteractiveSSH:
         """
         self.__exit__(None, None, None)
 
+    @staticmethod
+    def read_until(
+        shell: paramiko.Channel,
+        prompt: str = setting.INTERACTIVE_PROMPT,
+        idle_timeout: float = setting.INTERACTIVE_IDLE_TIMEOUT,
+        timeout: float = setting.INTERACTIVE_TIMEOUT,
+    ) -> str:
+        """
+        Read shell output until prompt appears, no output for idle_timeout, or timeout.
+
+        :param shell: [paramiko.Channel] interactive shell session
+        :param prompt: [str] prompt 的 regex，比對輸出的結尾，None 代表不比對 (default: INTERACTIVE_PROMPT)
+        :param idle_timeout: [float] 沒有新輸出超過此秒數即返回，None 代表不限制 (default: INTERACTIVE_IDLE_TIMEOUT)
+        :param timeout: [float] 最長等待秒數，None 代表不限制 (default: INTERACTIVE_TIMEOUT)
+        :return: [str] 讀到的輸出
+        """
+        pattern = re.compile(prompt) if prompt else None
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        deadline = time.monotonic() + timeout if timeout else None
+        output = []
+        tail = ""
+
+        while True:
+            wait = idle_timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    Logger.warning(f"Interactive command did not finish in {timeout}s")
+                    break
+                wait = remaining if wait is None else min(wait, remaining)
+
+            shell.settimeout(wait)
+            try:
+                data = shell.recv(setting.SSH_RECV_SIZE)
+            except socket.timeout:
+                # 閒置或逾時，下一輪迴圈會判斷是否已超過 timeout
+                if deadline is None or time.monotonic() < deadline:
+                    break
+                continue
+
+            if not data:
+                # shell 已關閉
+                break
+
+            text = decoder.decode(data)
+            output.append(text)
+            # prompt 只會出現在結尾，只保留最後一段避免每次比對整個輸出
+            tail = (tail + text)[-setting.INTERACTIVE_PROMPT_WINDOW :]
+            if pattern and pattern.search(tail):
+                break
+
+        output.append(decoder.decode(b"", True))
+
+        return "".join(output)
+
+    def execute(
+        self,
+        command: str,
+        prompt: str = setting.INTERACTIVE_PROMPT,
+        idle_timeout: float = setting.INTERACTIVE_IDLE_TIMEOUT,
+        timeout: float = setting.INTERACTIVE_TIMEOUT,
+    ) -> str:
+        """
+        Send a command in the current shell session and read its output.
+
+        :param command: [str] The command to be executed
+        :param prompt: [str] prompt 的 regex (default: INTERACTIVE_PROMPT)
+        :param idle_timeout: [float] 沒有新輸出超過此秒數即返回 (default: INTERACTIVE_IDLE_TIMEOUT)
+        :param timeout: [float] 最長等待秒數 (default: INTERACTIVE_TIMEOUT)
+        :return: [str] command output
+        """
+        if self.shell is None:
+            raise RuntimeError("InteractiveSSH.execute must be used inside `with`")
+
+        self.shell.send(command + "\n")
+
+        return self.read_until(self.shell, prompt, idle_timeout, timeout)
+
+    @staticmethod
+    def send_commands(
+        dest: str,
+        key: str = None,
+        username: str = None,
+        password: str = None,
+        commands: list = (),
+        prompt: str = setting.INTERACTIVE_PROMPT,
+        idle_timeout: float = setting.INTERACTIVE_IDLE_TIMEOUT,
+        timeout: float = setting.INTERACTIVE_TIMEOUT,
+    ) -> list:
+        """
+        Send commands one by one in one interactive SSH session.
+
+        :param dest: [str] target host address
+        :param key: [str] private key file path (default: None)
+        :param username: [str] SSH username (default: None)
+        :param password: [str] SSH password (default: None)
+        :param commands: [list] command list (ex: ["cd /tmp", "ls"])
+        :param prompt: [str] prompt 的 regex (default: INTERACTIVE_PROMPT)
+        :param idle_timeout: [float] 沒有新輸出超過此秒數即返回 (default: INTERACTIVE_IDLE_TIMEOUT)
+        :param timeout: [float] 每個指令最長等待秒數 (default: INTERACTIVE_TIMEOUT)
+        :return: [list] 每個指令的輸出
+        """
+        interactive = InteractiveSSH(dest, key, username, password)
+
+        with interactive as shell:
+            # 略過登入訊息與第一個 prompt
+            InteractiveSSH.read_until(shell, prompt, idle_timeout, timeout)
+
+            return [
+                interactive.execute(command, prompt, idle_timeout, timeout)
+                for command in commands
+            ]
+
     @staticmethod
     def send_command(
         dest: str,
@@ -129,6 +255,9 @@ class InteractiveSSH:
         username: str = None,
         password: str = None,
         command: str = "",
+        prompt: str = setting.INTERACTIVE_PROMPT,
+        idle_timeout: float = setting.INTERACTIVE_IDLE_TIMEOUT,
+        timeout: float = setting.INTERACTIVE_TIMEOUT,
     ) -> str:
         """
         Send a command in the interactive SSH session.
@@ -138,17 +267,14 @@ class InteractiveSSH:
         :param username: [str] SSH username (default: None)
         :param password: [str] SSH password (default: None)
         :param command: [str] The command to be executed
+        :param prompt: [str] prompt 的 regex (default: INTERACTIVE_PROMPT)
+        :param idle_timeout: [float] 沒有新輸出超過此秒數即返回 (default: INTERACTIVE_IDLE_TIMEOUT)
+        :param timeout: [float] 最長等待秒數 (default: INTERACTIVE_TIMEOUT)
         :return: [str] command output
         """
-
-        with InteractiveSSH(dest, key, username, password) as shell:
-            shell.send(command + "\n")
-
-            time.sleep(60)
-
-            output = shell.recv(2048).decode("utf-8")
-
-        return output
+        return InteractiveSSH.send_commands(
+            dest, key, username, password, [command], prompt, idle_timeout, timeout
+        )[0]
 
 
 class SFTP:
@@ -187,7 +313,7 @@ class SFTP:
         else:
             self.transport.connect(username=self.username, password=self.password)
 
-        self.client = paramiko.SFTPClient.from_transport(self.transport)
+        self.client = SFTPTransfer.open_sftp(self.transport)
 
         return self.client
 
@@ -206,11 +332,30 @@ class SFTP:
         """
         self.__exit__(None, None, None)
 
-    def upload_file(self, local_path: str, remote_path: str) -> None:
+    def upload_file(
+        self,
+        local_path: str,
+        remote_path: str,
+        parallel: int = setting.SFTP_PARALLEL_CHUNKS,
+    ) -> dict:
         """
-        Upload file to remote host.
+        Upload file to remote host with pipelined writes.
 
         :param local_path: [str] local file path (ex: ./test.txt)
         :param remote_path: [str] remote file path (ex: /home/sonar/test.txt)
+        :param parallel: [int] 同時上傳的分段數，1 代表不分段 (default: SFTP_PARALLEL_CHUNKS)
+        :return: [dict] local, remote, bytes, elapsed, throughput (bytes/s)
+        """
+        return SFTPTransfer.upload(self.client, local_path, remote_path, parallel)
+
+    def upload_files(
+        self, files: list, parallel: int = setting.SFTP_PARALLEL_CHUNKS
+    ) -> list:
+        """
+        Upload many files to remote host over this SFTP session.
+
+        :param files: [list] (local file path, remote file path) list
+        :param parallel: [int] 每個檔案同時上傳的分段數 (default: SFTP_PARALLEL_CHUNKS)
+        :return: [list] 每個檔案的 local, remote, bytes, elapsed, throughput
         """
-        self.client.put(local_path, remote_path)
+        return SFTPTransfer.upload_files(self.client, files, parallel)
@@ -0,0 +1,56 @@
+# -*- coding:utf-8 -*-
+import os
+import hashlib
+import threading
+
+from controller.action_config import setting
+
+
+class Checksum:
+    _cache = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def sha256_file(
+        filepath: str, chunk_size: int = setting.DOWNLOAD_CHUNK_SIZE
+    ) -> str:
+        """
+        Calculate sha256 of file chunk by chunk.
+
+        :param filepath: [str] file path.
+        :param chunk_size: [int] bytes per read (default: DOWNLOAD_CHUNK_SIZE).
+        :return: [str] sha256 hex digest
+        """
+        sha256 = hashlib.sha256()
+
+        with open(filepath, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+
+        return sha256.hexdigest()
+
+    @classmethod
+    def sha256_file_cached(cls, filepath: str) -> str:
+        """
+        Calculate sha256 of file, reuse the result while size and mtime are unchanged.
+
+        :param filepath: [str] file path.
+        :return: [str] sha256 hex digest
+        """
+        stat = os.stat(filepath)
+        key = os.path.realpath(filepath)
+        signature = (stat.st_size, stat.st_mtime_ns)
+
+        with cls._lock:
+            cached = cls._cache.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        digest = cls.sha256_file(filepath)
+        with cls._lock:
+            cls._cache[key] = (signature, digest)
+
+        return digest
@@ -0,0 +1,211 @@
+# -*- coding:utf-8 -*-
+import io
+import os
+import zlib
+import mmap
+from typing import BinaryIO
+
+from controller.action_config import setting
+from controller.common import delta_remote
+
+
+class Delta:
+    """
+    Delta 類別，rsync 式的 block 差異傳輸。
+    遠端以 delta_remote.py 計算舊檔每個 block 的 checksum (signature)，
+    本機以 rolling checksum 在新檔中尋找相同的 block，只有找不到的資料才寫入 delta，
+    遠端再以舊檔加上 delta 重建新檔。
+    """
+
+    REMOTE_SCRIPT = delta_remote.__file__
+
+    @staticmethod
+    def block_size(size: int) -> int:
+        """
+        Get block size for file of size, like rsync it grows with sqrt(size).
+
+        :param size: [int] 遠端舊檔大小
+        :return: [int] block size
+        """
+        if setting.DELTA_BLOCK_SIZE:
+            return setting.DELTA_BLOCK_SIZE
+
+        block_size = int(size**0.5) // 1024 * 1024
+
+        return max(2 * 1024, min(block_size, 128 * 1024))
+
+    @classmethod
+    def script(cls) -> bytes:
+        """
+        Get source of the remote helper script.
+
+        :return: [bytes] delta_remote.py 的內容
+        """
+        with open(cls.REMOTE_SCRIPT, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _write_data(out: BinaryIO, data: bytes) -> int:
+        """
+        Write new data records, compressed with zlib.
+
+        :param out: [BinaryIO] delta 檔
+        :param data: [bytes] 新資料
+        :return: [int] 寫入的 bytes
+        """
+        written = 0
+
+        for offset in range(0, len(data), delta_remote.READ_SIZE):
+            compressed = zlib.compress(data[offset : offset + delta_remote.READ_SIZE])
+            out.write(delta_remote.DATA)
+            out.write(delta_remote.LENGTH.pack(len(compressed)))
+            out.write(compressed)
+            written += 1 + delta_remote.LENGTH.size + len(compressed)
+
+        return written
+
+    @classmethod
+    def write_delta(
+        cls,
+        local_path: str,
+        signature: dict,
+        out: BinaryIO,
+        max_literal_ratio: float = setting.DELTA_MAX_LITERAL_RATIO,
+    ) -> dict:
+        """
+        Write delta which rebuilds local file from the remote file of signature.
+
+        :param local_path: [str] 新檔路徑
+        :param signature: [dict] delta_remote.signature 的結果
+        :param out: [BinaryIO] 寫入 delta 的檔案物件
+        :param max_literal_ratio: [float] 新資料超過新檔大小的此比例時放棄 (default: DELTA_MAX_LITERAL_RATIO)
+        :return: [dict] size, literal, copied, delta_size，放棄時為 None
+        """
+        block_size = signature["block_size"]
+        blocks = signature["blocks"]
+        table = {}
+        for index, (weak, strong) in enumerate(blocks):
+            # 檔尾較短的 block 不參與比對，其資料會被當成新資料
+            if index < len(blocks) - 1 or signature["size"] % block_size == 0:
+                table.setdefault(weak, []).append(index)
+
+        with open(local_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+            try:
+                return cls._diff(
+                    data, size, block_size, blocks, table, out, max_literal_ratio
+                )
+            finally:
+                if size:
+                    data.close()
+
+    @classmethod
+    def _diff(
+        cls,
+        data,
+        size: int,
+        block_size: int,
+        blocks: list,
+        table: dict,
+        out: BinaryIO,
+        max_literal_ratio: float,
+    ) -> dict:
+        """
+        Find blocks of the remote file in data and write delta records.
+
+        :param data: [mmap.mmap] 新檔內容
+        :param size: [int] 新檔大小
+        :param block_size: [int] block size
+        :param blocks: [list] 遠端每個 block 的 [weak, strong]
+        :param table: [dict] weak checksum -> block indexes
+        :param out: [BinaryIO] 寫入 delta 的檔案物件
+        :param max_literal_ratio: [float] 新資料超過新檔大小的此比例時放棄
+        :return: [dict] size, literal, copied, delta_size，放棄時為 None
+        """
+        max_literal = size * max_literal_ratio
+        mod = delta_remote.MOD
+        literal = copied = 0
+        delta_size = out.write(delta_remote.MAGIC) + out.write(
+            delta_remote.LENGTH.pack(block_size)
+        )
+        run = None  # 連續複製的 [起始 block, 數量]
+
+        def flush_run() -> int:
+            if run is None:
+                return 0
+            out.write(delta_remote.COPY)
+            out.write(delta_remote.COPY_RECORD.pack(*run))
+            return 1 + delta_remote.COPY_RECORD.size
+
+        pos = literal_start = 0
+        a = b = None
+
+        while pos + block_size <= size:
+            if a is None:
+                a, b = delta_remote.weak_checksum(data[pos : pos + block_size])
+
+            candidates = table.get(a | b << 16)
+            if candidates:
+                strong = delta_remote.strong_checksum(data[pos : pos + block_size])
+                match = next((i for i in candidates if blocks[i][1] == strong), None)
+
+                if match is not None:
+                    if literal_start < pos:
+                        delta_size += flush_run()
+                        run = None
+                        delta_size += cls._write_data(out, data[literal_start:pos])
+                        literal += pos - literal_start
+
+                    if run is not None and run[0] + run[1] == match:
+                        run[1] += 1
+                    else:
+                        delta_size += flush_run()
+                        run = [match, 1]
+
+                    copied += block_size
+                    pos += block_size
+                    literal_start = pos
+                    a = None
+                    continue
+
+            if literal + pos - literal_start > max_literal:
+                return None
+
+            # 往後滾動一個 byte
+            if pos + block_size < size:
+                old, new = data[pos], data[pos + block_size]
+                a = (a - old + new) % mod
+                b = (b - block_size * old + a) % mod
+            pos += 1
+
+        delta_size += flush_run()
+        if literal_start < size:
+            delta_size += cls._write_data(out, data[literal_start:size])
+            literal += size - literal_start
+        if literal > max_literal:
+            return None
+
+        out.write(delta_remote.END)
+
+        return {
+            "size": size,
+            "literal": literal,
+            "copied": copied,
+            "delta_size": delta_size + 1,
+        }
+
+    @classmethod
+    def make_delta(cls, local_path: str, signature: dict, **kwargs) -> tuple:
+        """
+        Build delta in memory.
+
+        :param local_path: [str] 新檔路徑
+        :param signature: [dict] delta_remote.signature 的結果
+        :return: [tuple] (delta bytes, 統計資料)，放棄時為 (None, None)
+        """
+        out = io.BytesIO()
+        stats = cls.write_delta(local_path, signature, out, **kwargs)
+
+        return (out.getvalue(), stats) if stats else (None, None)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+"""
+Delta 在遠端主機執行的部分，只使用標準函式庫 (相容 Python 3.5)，會以 SFTP 上傳到遠端後執行。
+
+    python3 delta_remote.py signature <path> <block_size>
+    python3 delta_remote.py patch <old_path> <delta_path> <out_path> <sha256>
+
+signature 將檔案每個 block 的 weak / strong checksum 以 JSON 輸出到 stdout；
+patch 依照 delta 檔的指令 (複製舊檔的 block 或寫入新資料) 產生新檔，並檢查 sha256。
+"""
+
+import os
+import sys
+import json
+import zlib
+import struct
+import hashlib
+from itertools import accumulate
+
+MAGIC = b"BONDDELTA1\n"
+MOD = 1 << 16
+COPY = b"C"
+DATA = b"Z"
+END = b"E"
+COPY_RECORD = struct.Struct(">QI")
+LENGTH = struct.Struct(">I")
+READ_SIZE = 1024 * 1024
+
+
+def weak_checksum(block: bytes) -> tuple:
+    """
+    rsync 的 rolling checksum，回傳 (a, b)，weak = a | b << 16。
+    b = sum((len - i) * x_i) 等於前綴和的總和，可以完全在 C 中計算。
+    """
+    return sum(block) % MOD, sum(accumulate(block)) % MOD
+
+
+def strong_checksum(block: bytes) -> str:
+    return hashlib.sha1(block).hexdigest()
+
+
+def signature(path: str, block_size: int) -> dict:
+    blocks = []
+    size = 0
+
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            size += len(block)
+            a, b = weak_checksum(block)
+            blocks.append([a | b << 16, strong_checksum(block)])
+
+    return {"size": size, "block_size": block_size, "blocks": blocks}
+
+
+def patch(old_path: str, delta_path: str, out_path: str, expected: str) -> None:
+    try:
+        _patch(old_path, delta_path, out_path, expected)
+    except BaseException:
+        # 不留下不完整的新檔，呼叫端會改為完整上傳
+        if os.path.exists(out_path):
+            os.remove(out_path)
+        raise
+
+
+def _patch(old_path: str, delta_path: str, out_path: str, expected: str) -> None:
+    sha256 = hashlib.sha256()
+
+    with open(old_path, "rb") as old, open(delta_path, "rb") as delta, open(
+        out_path, "wb"
+    ) as out:
+
+        def write(data: bytes) -> None:
+            sha256.update(data)
+            out.write(data)
+
+        if delta.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not a delta file")
+        block_size = LENGTH.unpack(delta.read(LENGTH.size))[0]
+
+        while True:
+            kind = delta.read(1)
+            if kind == END:
+                break
+            elif kind == COPY:
+                start, count = COPY_RECORD.unpack(delta.read(COPY_RECORD.size))
+                old.seek(start * block_size)
+                remaining = count * block_size
+                while remaining:
+                    # 最後一個 block 可能較短，讀到檔尾即結束
+                    data = old.read(min(remaining, READ_SIZE))
+                    if not data:
+                        break
+                    remaining -= len(data)
+                    write(data)
+            elif kind == DATA:
+                length = LENGTH.unpack(delta.read(LENGTH.size))[0]
+                write(zlib.decompress(delta.read(length)))
+            else:
+                raise ValueError("corrupt delta file")
+
+    if sha256.hexdigest() != expected:
+        raise ValueError(
+            "checksum mismatch: expected {}, got {}".format(
+                expected, sha256.hexdigest()
+            )
+        )
+
+
+def main(argv: list) -> int:
+    if len(argv) == 3 and argv[0] == "signature":
+        json.dump(signature(argv[1], int(argv[2])), sys.stdout)
+        return 0
+    if len(argv) == 5 and argv[0] == "patch":
+        patch(*argv[1:])
+        return 0
+
+    sys.stderr.write(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
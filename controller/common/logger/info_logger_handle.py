@@ -1,15 +1,30 @@
 # -*- coding:utf-8 -*-
 import os
+import queue
+import atexit
 import logging
+import threading
 import logging.handlers
 
 from controller.action_config import setting
 from controller.action_config.system import CHECK_SYSTEM
 from controller.common.logger.logger_format import ColoredFormatter
+from controller.common.logger.queue_handler import (
+    BoundedQueueHandler,
+    BoundedQueueListener,
+)
 
 
 class Logger:
+    # logger 物件本身不會建立檔案，import 後即可使用 (ex: 設定等級)
+    info_logger = logging.getLogger(setting.INFO_LOG_NAME)
+
     _handler_setup = False
+    _setup_lock = threading.Lock()
+    # flush 會暫停並重啟 listener，同時只能有一個執行緒進行 (shutdown 會呼叫 flush)
+    _flush_lock = threading.RLock()
+    _listener = None
+    _queue_handler = None
 
     @classmethod
     def _setup_log_directory(cls) -> None:
@@ -31,19 +46,30 @@ class Logger:
     @classmethod
     def setup_info_log_handler(cls) -> None:
         """
-        建立 info log handler，並定義 log 的等級及格式
+        建立 info log handler，並定義 log 的等級及格式。
+        第一次寫 log 時會自動呼叫，import 時不會建立 Logs 目錄及 log 檔
         """
 
         if cls._handler_setup:
             return
 
+        with cls._setup_lock:
+            if not cls._handler_setup:
+                cls._setup_handlers()
+
+    @classmethod
+    def _setup_handlers(cls) -> None:
+        """
+        建立 console 及 log file 的 handler
+        """
+
         cls._setup_log_directory()
 
-        # 取得 info log handler 物件，並設定 log 等級
-        cls.info_logger = logging.getLogger(setting.INFO_LOG_NAME)
-        cls.info_logger.setLevel(
-            logging.DEBUG if setting.DEBUG else setting.INFO_LOG_LEVEL
-        )
+        # 設定 log 等級，呼叫端已自行設定時保留其設定
+        if cls.info_logger.level == logging.NOTSET:
+            cls.info_logger.setLevel(
+                logging.DEBUG if setting.DEBUG else setting.INFO_LOG_LEVEL
+            )
 
         log_file_name = (
             f"{'DEBUG_' if setting.DEBUG else ''}{setting.INFO_LOG_FILE_NAME}"
@@ -66,6 +92,7 @@ class Logger:
             "%(asctime)s %(name)s [%(levelname)s] %(message)s",
             "%Y-%m-%d %H:%M:%S",
             use_colors=True,
+            stream=console_handler.stream,
         )
         plain_formatter = ColoredFormatter(
             "%(asctime)s %(name)s [%(levelname)s] %(message)s",
@@ -77,11 +104,81 @@ class Logger:
         console_handler.setFormatter(colored_formatter)
         file_handler.setFormatter(plain_formatter)
 
-        # 將 handler 註冊進 logger
-        cls.info_logger.addHandler(console_handler)
-        cls.info_logger.addHandler(file_handler)
+        # 將 handler 註冊進 logger，非同步模式時改由背景執行緒寫出
+        if setting.INFO_LOG_ASYNC:
+            cls._setup_queue_listener(console_handler, file_handler)
+        else:
+            cls.info_logger.addHandler(console_handler)
+            cls.info_logger.addHandler(file_handler)
         cls._handler_setup = True
 
+    @classmethod
+    def _setup_queue_listener(cls, *handlers: logging.Handler) -> None:
+        """
+        建立有上限的 log queue，呼叫端只負責放入 queue，由 QueueListener 在背景執行緒寫出
+
+        :param *handlers: [logging.Handler] 實際寫出 log 的 handler
+        """
+
+        log_queue = queue.Queue(maxsize=setting.INFO_LOG_QUEUE_SIZE)
+        cls._queue_handler = BoundedQueueHandler(
+            log_queue, overflow=setting.INFO_LOG_QUEUE_OVERFLOW
+        )
+        cls._listener = BoundedQueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        cls._listener.start()
+        cls.info_logger.addHandler(cls._queue_handler)
+
+        # 程式結束時寫出 queue 中剩餘的 log
+        atexit.register(cls.shutdown)
+
+    @classmethod
+    def flush(cls) -> None:
+        """
+        等待 queue 中的 log 全部寫出，並回報因 queue 滿而丟棄的數量
+        """
+
+        with cls._flush_lock:
+            if cls._listener is None:
+                return
+
+            cls._listener.stop()
+            dropped = cls._queue_handler.pop_dropped()
+            if dropped:
+                for handler in cls._listener.handlers:
+                    handler.handle(
+                        cls.info_logger.makeRecord(
+                            cls.info_logger.name,
+                            logging.WARNING,
+                            __file__,
+                            0,
+                            f"Log queue overflow, dropped {dropped} records",
+                            None,
+                            None,
+                        )
+                    )
+            cls._listener.start()
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        停止背景寫出 log 的執行緒，並寫出 queue 中剩餘的 log
+        """
+
+        with cls._flush_lock:
+            if cls._listener is None:
+                return
+
+            cls.flush()
+            listener, cls._listener = cls._listener, None
+            listener.stop()
+
+        # 之後的 log 直接同步寫出
+        cls.info_logger.removeHandler(cls._queue_handler)
+        for handler in listener.handlers:
+            cls.info_logger.addHandler(handler)
+
     @classmethod
     def _log(cls, level: str, msg: str, msg_color: str = None, *args, **kwargs) -> None:
         """
@@ -102,9 +199,26 @@ class Logger:
             else:
                 kwargs["extra"] = extra
 
+        if not cls._handler_setup:
+            cls.setup_info_log_handler()
+
         # 透過 getattr 取得 logger 物件的方法，並執行
         getattr(cls.info_logger, level)(msg, *args, **kwargs)
 
+    @classmethod
+    def is_enabled(cls, level: str) -> bool:
+        """
+        檢查 log 等級是否啟用，用於避免建立不會輸出的 log 訊息
+
+        :param level: [str] log 的等級
+        :return: [bool] 是否啟用
+        """
+
+        if not cls._handler_setup:
+            cls.setup_info_log_handler()
+
+        return cls.info_logger.isEnabledFor(logging.getLevelName(level.upper()))
+
     @classmethod
     def supported_colors(cls) -> None:
         """
@@ -178,6 +292,3 @@ class Logger:
         """
 
         cls._log("critical", msg, color, *args, **kwargs)
-
-
-Logger.setup_info_log_handler()
@@ -1,7 +1,7 @@
 # -*- coding:utf-8 -*-
+import os
 import logging
-from typing import Iterable
-from termcolor import colored
+from typing import IO, Iterable
 
 from controller.action_config import setting
 
@@ -13,9 +13,39 @@ class ColoredFormatter(logging.Formatter):
         datefmt: str = None,
         style: str = "%",
         use_colors: bool = True,
+        stream: IO = None,
     ) -> None:
         super().__init__(fmt, datefmt, style)
-        self.use_colors = use_colors
+        # 有指定輸出的 stream 時，只有終端機才加上顏色，否則交由 termcolor 判斷
+        self.use_colors = use_colors and (
+            stream is None or self.stream_supports_color(stream)
+        )
+        self._force_color = True if stream is not None else None
+
+        # 快取: (logger 名稱, 等級) -> 等級前綴、顏色 -> ANSI 前後碼、最後一秒的時間字串
+        self._prefixes = {}
+        self._color_codes = {}
+        self._last_time = (None, None, None)
+
+    @staticmethod
+    def stream_supports_color(stream: IO) -> bool:
+        """
+        檢查 stream 是否支援顏色 (NO_COLOR / FORCE_COLOR 環境變數優先於 isatty)
+
+        :param stream: [IO] log 輸出的 stream
+        :return: [bool] 是否支援顏色
+        """
+
+        if os.environ.get("NO_COLOR"):
+            return False
+        if os.environ.get("FORCE_COLOR"):
+            return True
+
+        isatty = getattr(stream, "isatty", None)
+        try:
+            return bool(isatty and isatty())
+        except ValueError:  # stream 已關閉
+            return False
 
     def colored_text(self, text: str, color: str, attrs: Iterable[str] = ()) -> str:
         """
@@ -27,7 +57,69 @@ class ColoredFormatter(logging.Formatter):
         :return: [str] 帶有顏色的文字
         """
 
-        return colored(text, color, attrs=attrs) if self.use_colors else text
+        if not self.use_colors:
+            return text
+
+        key = (color, tuple(attrs))
+        codes = self._color_codes.get(key)
+        if codes is None:
+            # 只有需要顏色時才載入 termcolor
+            from termcolor import colored
+
+            # 以佔位字元取得 ANSI 前後碼，之後只需字串拼接
+            start, _, end = colored(
+                "\0", color, attrs=attrs, force_color=self._force_color
+            ).partition("\0")
+            codes = self._color_codes[key] = (start, end)
+
+        return f"{codes[0]}{text}{codes[1]}"
+
+    def _level_prefix(self, record: logging.LogRecord) -> str:
+        """
+        取得 (logger 名稱, 等級) 的前綴，同一組合只建立一次
+
+        :param record: [logging.LogRecord] log 的紀錄
+        :return: [str] 加上顏色的等級前綴
+        """
+
+        key = (record.name, record.levelname)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            dividing_line = self.colored_text("|", "white", attrs=["bold"])
+            prefix = self._prefixes[key] = "{} {} {} {} {}".format(
+                dividing_line,
+                self.colored_text(record.name.upper(), "magenta", attrs=["bold"]),
+                dividing_line,
+                self.colored_text(
+                    record.levelname.upper(),
+                    setting.LOG_COLOR.get(record.levelname),
+                    attrs=["bold"],
+                ),
+                dividing_line,
+            )
+
+        return prefix
+
+    def _asctime(self, record: logging.LogRecord) -> str:
+        """
+        取得 log 的時間字串，datefmt 精度為秒，因此同一秒內重複使用
+
+        :param record: [logging.LogRecord] log 的紀錄
+        :return: [str] 加上顏色的時間字串
+        """
+
+        second = int(record.created)
+        cached_second, asctime, colored_asctime = self._last_time
+
+        # 未指定 datefmt 時預設格式包含毫秒，不能快取
+        if cached_second != second or self.datefmt is None:
+            asctime = self.formatTime(record, self.datefmt)
+            colored_asctime = self.colored_text(asctime, "blue", attrs=["bold"])
+            self._last_time = (second, asctime, colored_asctime)
+
+        record.asctime = asctime
+
+        return colored_asctime
 
     def format(self, record: logging.LogRecord) -> str:
         """
@@ -37,26 +129,12 @@ class ColoredFormatter(logging.Formatter):
         :return: [str] 拼裝後的 log 訊息
         """
 
-        super().format(record)
-        color = setting.LOG_COLOR.get(record.levelname)
-
-        time_color = "blue"
-        name_color = "magenta"
+        record.message = record.getMessage()
         message_color = getattr(record, "message_color", "white")
-        dividing_line_color = "white"
-
-        # 建立 log 等級的文字並加上顏色
-        log_level = "{} {} {} {} {}".format(
-            self.colored_text("|", dividing_line_color, attrs=["bold"]),
-            self.colored_text(record.name.upper(), name_color, attrs=["bold"]),
-            self.colored_text("|", dividing_line_color, attrs=["bold"]),
-            self.colored_text(record.levelname.upper(), color, attrs=["bold"]),
-            self.colored_text("|", dividing_line_color, attrs=["bold"]),
-        )
 
         # 回傳拼裝後的 log 訊息
         return "{} {} {}".format(
-            self.colored_text(record.asctime, time_color, attrs=["bold"]),
-            log_level,
-            self.colored_text(record.getMessage(), message_color, attrs=["bold"]),
+            self._asctime(record),
+            self._level_prefix(record),
+            self.colored_text(record.message, message_color, attrs=["bold"]),
         )
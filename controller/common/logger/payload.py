@@ -0,0 +1,125 @@
+# -*- coding:utf-8 -*-
+import hashlib
+from typing import Any, Mapping
+
+from controller.action_config import setting
+from controller.common.logger.info_logger_handle import Logger
+
+
+class PayloadLog:
+    """
+    PayloadLog 類別，記錄 HTTP 回應內容 (body / headers) 的 log。
+    依 LOG_PAYLOAD_MODE 決定記錄方式:
+        off: 不記錄
+        truncate: 只記錄前 LOG_PAYLOAD_MAX_BYTES
+        summary: 只記錄大小、sha256 及 content type
+        full: 記錄完整內容
+    log 等級未啟用時不會建立任何訊息。
+    """
+
+    MODE_OFF = "off"
+    MODE_TRUNCATE = "truncate"
+    MODE_SUMMARY = "summary"
+    MODE_FULL = "full"
+    MODES = (MODE_OFF, MODE_TRUNCATE, MODE_SUMMARY, MODE_FULL)
+
+    @staticmethod
+    def _summary(payload: Any, content_type: str = None) -> str:
+        """
+        Summarize payload as size, sha256 and content type.
+
+        :param payload: [Any] bytes / str / headers
+        :param content_type: [str] 回應的 content type (default: None)
+        :return: [str] 摘要
+        """
+        if isinstance(payload, Mapping):
+            return "<headers: {} fields, content-type={}, content-length={}>".format(
+                len(payload),
+                payload.get("Content-Type"),
+                payload.get("Content-Length"),
+            )
+
+        data = payload.encode("utf-8") if isinstance(payload, str) else bytes(payload)
+
+        return "<{} bytes, sha256={}, content-type={}>".format(
+            len(data), hashlib.sha256(data).hexdigest(), content_type
+        )
+
+    @staticmethod
+    def _truncate(payload: Any, max_bytes: int) -> str:
+        """
+        Truncate payload to max_bytes.
+
+        :param payload: [Any] bytes / str / headers
+        :param max_bytes: [int] 最多記錄的 bytes (字串為字元數)
+        :return: [str] 截斷後的內容
+        """
+        if isinstance(payload, Mapping):
+            payload = str(dict(payload))
+
+        if len(payload) <= max_bytes:
+            return str(payload)
+
+        return "{}... ({} {} total)".format(
+            payload[:max_bytes],
+            len(payload),
+            "chars" if isinstance(payload, str) else "bytes",
+        )
+
+    @classmethod
+    def describe(
+        cls,
+        payload: Any,
+        content_type: str = None,
+        mode: str = None,
+        max_bytes: int = None,
+    ) -> str:
+        """
+        Build log message of payload.
+
+        :param payload: [Any] bytes / str / headers
+        :param content_type: [str] 回應的 content type (default: None)
+        :param mode: [str] off / truncate / summary / full (default: LOG_PAYLOAD_MODE)
+        :param max_bytes: [int] truncate 時最多記錄的 bytes (default: LOG_PAYLOAD_MAX_BYTES)
+        :return: [str] log 訊息，off 時為 None
+        """
+        mode = mode or setting.LOG_PAYLOAD_MODE
+        if mode not in cls.MODES:
+            raise ValueError(f"unknown payload log mode {mode!r}, expected {cls.MODES}")
+
+        if mode == cls.MODE_OFF:
+            return None
+        if mode == cls.MODE_SUMMARY:
+            return cls._summary(payload, content_type)
+        if mode == cls.MODE_TRUNCATE:
+            return cls._truncate(
+                payload,
+                setting.LOG_PAYLOAD_MAX_BYTES if max_bytes is None else max_bytes,
+            )
+
+        return str(payload)
+
+    @classmethod
+    def log(
+        cls,
+        payload: Any,
+        content_type: str = None,
+        level: str = "info",
+        mode: str = None,
+        max_bytes: int = None,
+    ) -> None:
+        """
+        Log payload if level is enabled.
+
+        :param payload: [Any] bytes / str / headers
+        :param content_type: [str] 回應的 content type (default: None)
+        :param level: [str] log 的等級 (default: info)
+        :param mode: [str] off / truncate / summary / full (default: LOG_PAYLOAD_MODE)
+        :param max_bytes: [int] truncate 時最多記錄的 bytes (default: LOG_PAYLOAD_MAX_BYTES)
+        """
+        if (mode or setting.LOG_PAYLOAD_MODE) == cls.MODE_OFF:
+            return
+        if not Logger.is_enabled(level):
+            return
+
+        getattr(Logger, level)(cls.describe(payload, content_type, mode, max_bytes))
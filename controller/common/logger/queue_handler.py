@@ -0,0 +1,90 @@
+# -*- coding:utf-8 -*-
+import queue
+import logging
+import threading
+import logging.handlers
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    BoundedQueueHandler 類別，將 log record 放入有上限的 queue，由 QueueListener 在背景執行緒寫出。
+    queue 滿時依 overflow 決定處理方式:
+        block: 等待 queue 有空間 (不遺失 log，但呼叫端可能被阻塞)
+        drop_new: 丟棄新的 record
+        drop_oldest: 丟棄 queue 中最舊的 record，放入新的 record
+    """
+
+    OVERFLOW_BLOCK = "block"
+    OVERFLOW_DROP_NEW = "drop_new"
+    OVERFLOW_DROP_OLDEST = "drop_oldest"
+    OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_NEW, OVERFLOW_DROP_OLDEST)
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = OVERFLOW_BLOCK) -> None:
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(
+                f"unknown overflow policy {overflow!r}, "
+                f"expected one of {self.OVERFLOW_POLICIES}"
+            )
+
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def _drop(self) -> None:
+        with self._dropped_lock:
+            self.dropped += 1
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        依 overflow 策略將 record 放入 queue
+
+        :param record: [logging.LogRecord] log 的紀錄
+        """
+
+        if self.overflow == self.OVERFLOW_BLOCK:
+            self.queue.put(record)
+            return
+
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if self.overflow == self.OVERFLOW_DROP_NEW:
+                self._drop()
+                return
+
+        # drop_oldest: 與 listener 競爭時可能需要重試
+        while True:
+            try:
+                self.queue.get_nowait()
+                self._drop()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                continue
+
+    def pop_dropped(self) -> int:
+        """
+        取得並歸零目前丟棄的 record 數量
+
+        :return: [int] 丟棄的 record 數量
+        """
+
+        with self._dropped_lock:
+            dropped, self.dropped = self.dropped, 0
+
+        return dropped
+
+
+class BoundedQueueListener(logging.handlers.QueueListener):
+    """
+    BoundedQueueListener 類別，在有上限的 queue 上 stop 時等待空間放入結束標記
+    (QueueListener 預設使用 put_nowait，queue 滿時會拋出 queue.Full)
+    """
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
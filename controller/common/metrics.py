@@ -0,0 +1,410 @@
+# -*- coding:utf-8 -*-
+import os
+import time
+import bisect
+import threading
+import functools
+import contextlib
+from typing import Callable, Iterable, Iterator
+
+from controller.action_config import setting
+
+_NOOP = contextlib.nullcontext()
+
+
+class _Phase:
+    """
+    記錄一個階段耗時的 context manager。
+    """
+
+    __slots__ = ("record", "name", "start")
+
+    def __init__(self, record: dict, name: str) -> None:
+        self.record = record
+        self.name = name
+
+    def __enter__(self) -> "_Phase":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args) -> None:
+        phases = self.record["phases"]
+        phases[self.name] = (
+            phases.get(self.name, 0.0) + time.perf_counter() - self.start
+        )
+
+
+class _Histogram:
+    """
+    Prometheus histogram，buckets 最後隱含 +Inf。
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[tuple]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class Metrics:
+    """
+    Metrics 類別，記錄 Endpoint_Action / Server_Action 每次呼叫的各階段耗時與傳輸量。
+
+    以 Metrics.instrument() 包裝的方法在執行期間會有一筆呼叫紀錄 (每個執行緒各自獨立)，
+    底層程式以 Metrics.phase() 等方法將耗時記到目前的紀錄中，
+    呼叫結束後彙整成 Prometheus 格式 (Metrics.prometheus()) 並傳給註冊的 callback。
+
+    階段: connect, read, zip, encode, send, wait, receive, decode, write, checksum, delta, upload, exec
+    串流傳輸時各階段交錯進行 (例如 send 包含產生串流資料的 zip / read 時間)。
+
+    停用時 (預設，見 METRICS_ENABLED) 包裝的方法只多一次屬性檢查，不會建立任何紀錄。
+    """
+
+    enabled = setting.METRICS_ENABLED
+
+    _local = threading.local()
+    _lock = threading.Lock()
+    _callbacks = []
+    _calls = {}
+    _durations = {}
+    _phases = {}
+    _bytes = {}
+
+    @classmethod
+    def enable(cls, callback: Callable[[dict], None] = None) -> None:
+        """
+        Enable metrics collection.
+
+        :param callback: [Callable[[dict], None]] 每次呼叫結束時以紀錄呼叫 (default: None)
+        """
+        if callback is not None:
+            cls.add_callback(callback)
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls) -> None:
+        """
+        Disable metrics collection, collected metrics are kept.
+        """
+        cls.enabled = False
+
+    @classmethod
+    def add_callback(cls, callback: Callable[[dict], None]) -> None:
+        """
+        Register callback which receives every finished call record:
+        {"operation", "host", "start", "elapsed", "error", "phases": {phase: 秒}, "bytes": {"sent", "received"}}
+
+        :param callback: [Callable[[dict], None]] callback
+        """
+        with cls._lock:
+            cls._callbacks.append(callback)
+
+    @classmethod
+    def remove_callback(cls, callback: Callable[[dict], None]) -> None:
+        with cls._lock:
+            if callback in cls._callbacks:
+                cls._callbacks.remove(callback)
+
+    @classmethod
+    def reset(cls) -> None:
+        """
+        Clear collected metrics.
+        """
+        with cls._lock:
+            cls._calls.clear()
+            cls._durations.clear()
+            cls._phases.clear()
+            cls._bytes.clear()
+
+    @classmethod
+    def current(cls) -> dict:
+        """
+        Get the call record of current thread.
+
+        :return: [dict] 目前的呼叫紀錄，停用或不在包裝的方法中時為 None
+        """
+        if not cls.enabled:
+            return None
+
+        stack = getattr(cls._local, "stack", None)
+
+        return stack[-1] if stack else None
+
+    @classmethod
+    def instrument(cls, operation: str = None) -> Callable:
+        """
+        Decorator which records a call of the function, the first argument (or `dest`) is the host.
+
+        :param operation: [str] 操作名稱 (default: 函式名稱)
+        :return: [Callable] decorator
+        """
+
+        def decorator(func: Callable) -> Callable:
+            name = operation or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not cls.enabled:
+                    return func(*args, **kwargs)
+
+                host = kwargs.get("dest", args[0] if args else None)
+                return cls._run(name, host, func, args, kwargs)
+
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def _run(cls, name: str, host: str, func: Callable, args: tuple, kwargs: dict):
+        record = {
+            "operation": name,
+            "host": host,
+            "start": time.time(),
+            "elapsed": None,
+            "error": None,
+            "phases": {},
+            "bytes": {"sent": 0, "received": 0},
+        }
+        stack = cls._local.__dict__.setdefault("stack", [])
+        stack.append(record)
+        start = time.perf_counter()
+
+        try:
+            return func(*args, **kwargs)
+        except BaseException as e:
+            record["error"] = repr(e)
+            raise
+        finally:
+            record["elapsed"] = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                # 巢狀呼叫 (例如 send_file_to_execute) 的階段與傳輸量也算入外層
+                outer = stack[-1]
+                for phase, seconds in record["phases"].items():
+                    outer["phases"][phase] = outer["phases"].get(phase, 0.0) + seconds
+                for direction, nbytes in record["bytes"].items():
+                    outer["bytes"][direction] += nbytes
+            cls._collect(record)
+
+    @classmethod
+    def _collect(cls, record: dict) -> None:
+        """
+        Aggregate record and pass it to callbacks.
+
+        :param record: [dict] 呼叫紀錄
+        """
+        operation = record["operation"]
+        status = "error" if record["error"] else "ok"
+
+        with cls._lock:
+            cls._calls[(operation, status)] = cls._calls.get((operation, status), 0) + 1
+            cls._histogram(cls._durations, (operation,)).observe(record["elapsed"])
+            for phase, seconds in record["phases"].items():
+                cls._histogram(cls._phases, (operation, phase)).observe(seconds)
+            for direction, nbytes in record["bytes"].items():
+                key = (operation, direction)
+                cls._bytes[key] = cls._bytes.get(key, 0) + nbytes
+            callbacks = list(cls._callbacks)
+
+        for callback in callbacks:
+            callback(record)
+
+    @staticmethod
+    def _histogram(histograms: dict, key: tuple) -> _Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = _Histogram(tuple(setting.METRICS_BUCKETS))
+
+        return histogram
+
+    @classmethod
+    def phase(cls, name: str):
+        """
+        Context manager which adds elapsed time to phase of current call.
+
+        :param name: [str] 階段名稱
+        :return: [ContextManager] context manager，沒有呼叫紀錄時不做任何事
+        """
+        record = cls.current()
+
+        return _NOOP if record is None else _Phase(record, name)
+
+    @classmethod
+    def add_time(cls, name: str, seconds: float) -> None:
+        """
+        Add measured time to phase of current call.
+
+        :param name: [str] 階段名稱
+        :param seconds: [float] 秒數
+        """
+        record = cls.current()
+        if record is not None:
+            record["phases"][name] = record["phases"].get(name, 0.0) + seconds
+
+    @classmethod
+    def add_bytes(cls, direction: str, nbytes: int) -> None:
+        """
+        Add transferred bytes to current call.
+
+        :param direction: [str] "sent" / "received"
+        :param nbytes: [int] bytes
+        """
+        record = cls.current()
+        if record is not None:
+            record["bytes"][direction] += nbytes
+
+    @classmethod
+    def timed(cls, func: Callable, name: str) -> Callable:
+        """
+        Wrap func so every call adds its time to phase, for use in loops.
+
+        :param func: [Callable] 要計時的函式
+        :param name: [str] 階段名稱
+        :return: [Callable] 沒有呼叫紀錄時直接回傳 func
+        """
+        record = cls.current()
+        if record is None:
+            return func
+
+        phases = record["phases"]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+        return wrapper
+
+    @classmethod
+    def timed_iter(
+        cls, iterable: Iterable[bytes], name: str, direction: str = None
+    ) -> Iterable[bytes]:
+        """
+        Wrap iterable of chunks so waiting for each chunk adds to phase.
+
+        :param iterable: [Iterable[bytes]] 資料片段
+        :param name: [str] 階段名稱
+        :param direction: [str] 同時累計傳輸量的方向 "sent" / "received" (default: None)
+        :return: [Iterable[bytes]] 沒有呼叫紀錄時直接回傳 iterable
+        """
+        record = cls.current()
+        if record is None:
+            return iterable
+
+        return cls._timed_iter(record, iter(iterable), name, direction)
+
+    @staticmethod
+    def _timed_iter(
+        record: dict, iterator: Iterator[bytes], name: str, direction: str
+    ) -> Iterator[bytes]:
+        phases = record["phases"]
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+            if direction:
+                record["bytes"][direction] += len(chunk)
+            yield chunk
+
+    @staticmethod
+    def _labels(**labels) -> str:
+        return ",".join(
+            '{}="{}"'.format(
+                key,
+                str(value)
+                .replace("\\", "\\\\")
+                .replace('"', '\\"')
+                .replace("\n", "\\n"),
+            )
+            for key, value in labels.items()
+        )
+
+    @classmethod
+    def _histogram_lines(
+        cls, metric: str, histogram: _Histogram, labels: dict
+    ) -> Iterator[str]:
+        for bound, count in histogram.cumulative():
+            yield f"{metric}_bucket{{{cls._labels(**labels, le=f'{bound:g}')}}} {count}"
+        yield f"{metric}_bucket{{{cls._labels(**labels, le='+Inf')}}} {histogram.count}"
+        yield f"{metric}_sum{{{cls._labels(**labels)}}} {histogram.sum:.6f}"
+        yield f"{metric}_count{{{cls._labels(**labels)}}} {histogram.count}"
+
+    @classmethod
+    def prometheus(cls) -> str:
+        """
+        Export collected metrics in Prometheus text exposition format.
+        為避免 label 過多，彙整資料不含主機，需要個別主機時請使用 callback。
+
+        :return: [str] Prometheus text format
+        """
+        prefix = setting.METRICS_PREFIX
+        lines = []
+
+        with cls._lock:
+            lines.append(f"# HELP {prefix}_calls_total Finished calls.")
+            lines.append(f"# TYPE {prefix}_calls_total counter")
+            for (operation, status), count in sorted(cls._calls.items()):
+                labels = cls._labels(operation=operation, status=status)
+                lines.append(f"{prefix}_calls_total{{{labels}}} {count}")
+
+            lines.append(f"# HELP {prefix}_call_seconds Duration of calls.")
+            lines.append(f"# TYPE {prefix}_call_seconds histogram")
+            for (operation,), histogram in sorted(cls._durations.items()):
+                lines.extend(
+                    cls._histogram_lines(
+                        f"{prefix}_call_seconds", histogram, {"operation": operation}
+                    )
+                )
+
+            lines.append(f"# HELP {prefix}_phase_seconds Duration of phases per call.")
+            lines.append(f"# TYPE {prefix}_phase_seconds histogram")
+            for (operation, phase), histogram in sorted(cls._phases.items()):
+                lines.extend(
+                    cls._histogram_lines(
+                        f"{prefix}_phase_seconds",
+                        histogram,
+                        {"operation": operation, "phase": phase},
+                    )
+                )
+
+            lines.append(f"# HELP {prefix}_transfer_bytes_total Transferred bytes.")
+            lines.append(f"# TYPE {prefix}_transfer_bytes_total counter")
+            for (operation, direction), nbytes in sorted(cls._bytes.items()):
+                labels = cls._labels(operation=operation, direction=direction)
+                lines.append(f"{prefix}_transfer_bytes_total{{{labels}}} {nbytes}")
+
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def write_prometheus(cls, path: str) -> None:
+        """
+        Write metrics for node_exporter textfile collector (atomic replace).
+
+        :param path: [str] 輸出的 .prom 檔案路徑
+        """
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(cls.prometheus())
+        os.replace(temp_path, path)
@@ -0,0 +1,176 @@
+# -*- coding:utf-8 -*-
+import os
+import time
+import threading
+from typing import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+
+from controller.action_config import setting
+from controller.common.logger.info_logger_handle import Logger
+
+
+class SFTPTransfer:
+    """
+    SFTPTransfer 類別，高吞吐量的 SFTP 上傳。
+    使用較大的 channel window 與 pipelined write，不必等每個寫入請求的回應；
+    大檔案可切成多段，在同一條 SSH transport 上開多個 SFTP channel 同時上傳。
+    """
+
+    @staticmethod
+    def open_sftp(transport: paramiko.Transport) -> paramiko.SFTPClient:
+        """
+        Open SFTP session with SFTP_WINDOW_SIZE.
+        (max packet 維持 paramiko 預設的 32 KiB，SFTP 寫入請求本身也以 32 KiB 為上限)
+
+        :param transport: [paramiko.Transport] 已認證的 SSH transport
+        :return: [paramiko.SFTPClient] SFTPClient object
+        """
+        return paramiko.SFTPClient.from_transport(
+            transport,
+            window_size=setting.SFTP_WINDOW_SIZE,
+        )
+
+    @staticmethod
+    def _write_range(
+        sftp: paramiko.SFTPClient,
+        local_path: str,
+        remote_path: str,
+        offset: int,
+        length: int,
+        block_size: int,
+        progress: Callable[[int], None],
+    ) -> int:
+        """
+        Write a byte range of local file to remote file with pipelined requests.
+
+        :param sftp: [paramiko.SFTPClient] SFTPClient object
+        :param local_path: [str] local file path
+        :param remote_path: [str] remote file path，需已存在
+        :param offset: [int] 起始位置
+        :param length: [int] 長度
+        :param block_size: [int] 每次讀取的 bytes
+        :param progress: [Callable[[int], None]] 每寫入一段時以該段大小呼叫
+        :return: [int] 寫入的 bytes
+        """
+        written = 0
+
+        with open(local_path, "rb") as src, sftp.open(remote_path, "r+b") as dst:
+            dst.set_pipelined(True)
+            src.seek(offset)
+            dst.seek(offset)
+
+            while written < length:
+                data = src.read(min(block_size, length - written))
+                if not data:
+                    break
+                dst.write(data)
+                written += len(data)
+                progress(len(data))
+
+        return written
+
+    @classmethod
+    def upload(
+        cls,
+        sftp: paramiko.SFTPClient,
+        local_path: str,
+        remote_path: str,
+        parallel: int = setting.SFTP_PARALLEL_CHUNKS,
+        block_size: int = setting.SFTP_BLOCK_SIZE,
+        callback: Callable[[int, int], None] = None,
+    ) -> dict:
+        """
+        Upload file with pipelined writes, optionally in parallel chunks.
+
+        :param sftp: [paramiko.SFTPClient] SFTPClient object
+        :param local_path: [str] local file path (ex: ./test.txt)
+        :param remote_path: [str] remote file path (ex: /home/sonar/test.txt)
+        :param parallel: [int] 同時上傳的分段數，1 代表不分段 (default: SFTP_PARALLEL_CHUNKS)
+        :param block_size: [int] 每次讀取的 bytes (default: SFTP_BLOCK_SIZE)
+        :param callback: [Callable[[int, int], None]] callback(已上傳 bytes, 總 bytes) (default: None)
+        :return: [dict] local, remote, bytes, elapsed, throughput (bytes/s)
+        """
+        start = time.monotonic()
+        size = os.path.getsize(local_path)
+        sent = [0]
+        lock = threading.Lock()
+
+        def progress(nbytes: int) -> None:
+            with lock:
+                sent[0] += nbytes
+                if callback:
+                    callback(sent[0], size)
+
+        # 每段至少 SFTP_PARALLEL_MIN_CHUNK，小檔案不值得多開 channel
+        parallel = max(1, min(parallel, size // setting.SFTP_PARALLEL_MIN_CHUNK))
+        chunk = -(-size // parallel) if size else 0
+
+        with sftp.open(remote_path, "wb"):
+            pass
+
+        if parallel == 1:
+            cls._write_range(
+                sftp, local_path, remote_path, 0, size, block_size, progress
+            )
+        else:
+            transport = sftp.get_channel().get_transport()
+
+            def upload_chunk(index: int) -> int:
+                with cls.open_sftp(transport) as chunk_sftp:
+                    return cls._write_range(
+                        chunk_sftp,
+                        local_path,
+                        remote_path,
+                        index * chunk,
+                        min(chunk, size - index * chunk),
+                        block_size,
+                        progress,
+                    )
+
+            with ThreadPoolExecutor(
+                max_workers=parallel, thread_name_prefix="bond-sftp"
+            ) as executor:
+                list(executor.map(upload_chunk, range(parallel)))
+
+        remote_size = sftp.stat(remote_path).st_size
+        if remote_size != size:
+            raise IOError(f"size mismatch in upload! {remote_size} != {size}")
+
+        elapsed = time.monotonic() - start
+        result = {
+            "local": local_path,
+            "remote": remote_path,
+            "bytes": size,
+            "elapsed": elapsed,
+            "throughput": size / elapsed if elapsed else 0,
+        }
+        Logger.info(
+            f"Uploaded {local_path} to {remote_path}: {size} bytes in {elapsed:.2f}s"
+            f" ({result['throughput'] / 1024 / 1024:.2f} MiB/s)"
+        )
+
+        return result
+
+    @classmethod
+    def upload_files(
+        cls,
+        sftp: paramiko.SFTPClient,
+        files: Iterable[tuple],
+        parallel: int = setting.SFTP_PARALLEL_CHUNKS,
+        block_size: int = setting.SFTP_BLOCK_SIZE,
+    ) -> list:
+        """
+        Upload many files over one SFTP session.
+
+        :param sftp: [paramiko.SFTPClient] SFTPClient object
+        :param files: [Iterable[tuple]] (local file path, remote file path)
+        :param parallel: [int] 每個檔案同時上傳的分段數 (default: SFTP_PARALLEL_CHUNKS)
+        :param block_size: [int] 每次讀取的 bytes (default: SFTP_BLOCK_SIZE)
+        :return: [list] 每個檔案的 local, remote, bytes, elapsed, throughput
+        """
+        return [
+            cls.upload(sftp, local_path, remote_path, parallel, block_size)
+            for local_path, remote_path in files
+        ]
@@ -0,0 +1,263 @@
+# -*- coding:utf-8 -*-
+import time
+import atexit
+import threading
+from typing import Iterator
+from contextlib import contextmanager
+
+import paramiko
+
+from controller.action_config import setting
+from controller.common.metrics import Metrics
+from controller.common.sftp_transfer import SFTPTransfer
+from controller.common.logger.info_logger_handle import Logger
+
+
+class SSHPool:
+    """
+    SSHPool 類別，依照 (host, port, username, key) 保存已連線的 paramiko.SSHClient，
+    同一台主機的 exec_command 與 SFTP 共用同一條 transport，只需一次金鑰交換與認證。
+    取出前會檢查 transport 是否存活，斷線時自動重新連線；閒置超過 SSH_IDLE_TIMEOUT 的連線會被關閉。
+    取得的 client 由連線池管理，呼叫端不應自行 close。
+    """
+
+    _clients = {}
+    _last_used = {}
+    _in_use = {}
+    _lock = threading.Lock()
+    # pool_key -> [建立連線用的 lock, 使用中的執行緒數]，沒有執行緒使用時移除
+    _connecting = {}
+
+    @staticmethod
+    def _is_alive(client: paramiko.SSHClient) -> bool:
+        """
+        Check whether the transport of client is still usable.
+
+        :param client: [paramiko.SSHClient] SSHClient object
+        :return: [bool] 連線是否存活
+        """
+        transport = client.get_transport()
+        if transport is None or not transport.is_active():
+            return False
+
+        try:
+            # 送出 SSH_MSG_IGNORE，對方已斷線時會在這裡失敗
+            transport.send_ignore()
+        except (EOFError, OSError, paramiko.SSHException):
+            return False
+
+        return True
+
+    @staticmethod
+    def _connect(
+        dest: str, port: int, key: str, username: str, password: str
+    ) -> paramiko.SSHClient:
+        """
+        Open a new SSH connection with keepalive.
+
+        :param dest: [str] target host address
+        :param port: [int] SSH port
+        :param key: [str] private key file path
+        :param username: [str] SSH username
+        :param password: [str] SSH password
+        :return: [paramiko.SSHClient] 已連線的 SSHClient
+        """
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+
+        if key:
+            client.connect(
+                dest,
+                port,
+                key_filename=key,
+                username=username,
+                timeout=setting.SSH_CONNECT_TIMEOUT,
+            )
+        else:
+            client.connect(
+                dest,
+                port,
+                username=username,
+                password=password,
+                timeout=setting.SSH_CONNECT_TIMEOUT,
+            )
+
+        if setting.SSH_KEEPALIVE_INTERVAL:
+            client.get_transport().set_keepalive(setting.SSH_KEEPALIVE_INTERVAL)
+
+        return client
+
+    @classmethod
+    def get_client(
+        cls,
+        dest: str,
+        key: str = None,
+        username: str = None,
+        password: str = None,
+        port: int = setting.SSH_PORT,
+    ) -> paramiko.SSHClient:
+        """
+        Get the pooled SSHClient of host, connect it if not exists or disconnected.
+
+        :param dest: [str] target host address
+        :param key: [str] private key file path (default: None)
+        :param username: [str] SSH username (default: None)
+        :param password: [str] SSH password (default: None)
+        :param port: [int] SSH port (default: SSH_PORT)
+        :return: [paramiko.SSHClient] 已連線的 SSHClient
+        """
+        pool_key = (dest, port, username, key)
+
+        with cls._lock:
+            cls._evict_idle(time.monotonic())
+            entry = cls._connecting.setdefault(pool_key, [threading.Lock(), 0])
+            entry[1] += 1
+
+        try:
+            # 同一台主機同時只建立一條連線，其他執行緒等待後共用
+            with entry[0]:
+                with cls._lock:
+                    client = cls._clients.get(pool_key)
+
+                if client is not None and not cls._is_alive(client):
+                    Logger.warning(
+                        f"SSH connection to {dest}:{port} is broken, reconnect"
+                    )
+                    client.close()
+                    client = None
+
+                if client is None:
+                    with Metrics.phase("connect"):
+                        client = cls._connect(dest, port, key, username, password)
+                    Logger.debug(f"Open SSH connection to {dest}:{port}")
+
+                with cls._lock:
+                    cls._clients[pool_key] = client
+                    cls._last_used[pool_key] = time.monotonic()
+        finally:
+            with cls._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del cls._connecting[pool_key]
+
+        return client
+
+    @classmethod
+    @contextmanager
+    def connection(
+        cls,
+        dest: str,
+        key: str = None,
+        username: str = None,
+        password: str = None,
+        port: int = setting.SSH_PORT,
+    ) -> Iterator[paramiko.SSHClient]:
+        """
+        Borrow the pooled SSHClient of host, it will not be evicted as idle while borrowed.
+
+        :param dest: [str] target host address
+        :param key: [str] private key file path (default: None)
+        :param username: [str] SSH username (default: None)
+        :param password: [str] SSH password (default: None)
+        :param port: [int] SSH port (default: SSH_PORT)
+        :return: [Iterator[paramiko.SSHClient]] 已連線的 SSHClient
+        """
+        pool_key = (dest, port, username, key)
+        client = cls.get_client(dest, key, username, password, port)
+
+        with cls._lock:
+            cls._in_use[pool_key] = cls._in_use.get(pool_key, 0) + 1
+
+        try:
+            yield client
+        finally:
+            with cls._lock:
+                cls._in_use[pool_key] -= 1
+                if not cls._in_use[pool_key]:
+                    del cls._in_use[pool_key]
+                if cls._clients.get(pool_key) is client:
+                    cls._last_used[pool_key] = time.monotonic()
+
+    @classmethod
+    @contextmanager
+    def open_sftp(
+        cls,
+        dest: str,
+        key: str = None,
+        username: str = None,
+        password: str = None,
+        port: int = setting.SSH_PORT,
+    ) -> Iterator[paramiko.SFTPClient]:
+        """
+        Open SFTP session on the pooled SSH transport of host.
+        離開 with 時關閉 SFTPClient (只會關閉 channel，不會關閉連線)，
+        使用期間與 connection() 相同，連線不會被當成閒置而回收。
+
+        :param dest: [str] target host address
+        :param key: [str] private key file path (default: None)
+        :param username: [str] SSH username (default: None)
+        :param password: [str] SSH password (default: None)
+        :param port: [int] SSH port (default: SSH_PORT)
+        :return: [Iterator[paramiko.SFTPClient]] SFTPClient object
+        """
+        with cls.connection(dest, key, username, password, port) as client:
+            with SFTPTransfer.open_sftp(client.get_transport()) as sftp:
+                yield sftp
+
+    @classmethod
+    def _evict_idle(cls, now: float) -> None:
+        """
+        Close connections which are idle longer than SSH_IDLE_TIMEOUT.
+        Caller must hold the lock.
+
+        :param now: [float] 目前的 monotonic 時間
+        """
+        if not setting.SSH_IDLE_TIMEOUT:
+            return
+
+        for pool_key, last_used in list(cls._last_used.items()):
+            if pool_key in cls._in_use:
+                continue
+            if now - last_used > setting.SSH_IDLE_TIMEOUT:
+                cls._clients.pop(pool_key).close()
+                del cls._last_used[pool_key]
+                Logger.debug(f"Close idle SSH connection to {pool_key[0]}")
+
+    @classmethod
+    def evict_idle(cls) -> None:
+        """
+        Close connections which are idle longer than SSH_IDLE_TIMEOUT.
+        """
+        with cls._lock:
+            cls._evict_idle(time.monotonic())
+
+    @classmethod
+    def close(cls, dest: str = None) -> None:
+        """
+        Close connections of dest, or all connections if dest is None.
+
+        :param dest: [str] target host address (default: None)
+        """
+        with cls._lock:
+            pool_keys = [
+                pool_key
+                for pool_key in cls._clients
+                if dest is None or pool_key[0] == dest
+            ]
+
+            for pool_key in pool_keys:
+                cls._last_used.pop(pool_key, None)
+                cls._clients.pop(pool_key).close()
+
+    @classmethod
+    def size(cls) -> int:
+        """
+        Get the number of pooled connections.
+
+        :return: [int] 連線的數量
+        """
+        with cls._lock:
+            return len(cls._clients)
+
+
+atexit.register(SSHPool.close)
@@ -0,0 +1,190 @@
+# -*- coding:utf-8 -*-
+import re
+import json
+import time
+import base64
+import binascii
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from controller.action_config import setting
+from controller.common.metrics import Metrics
+
+
+class Base64StreamDecoder:
+    """
+    Base64StreamDecoder 類別，分段解碼 base64 資料，只保留不足 4 個字元的尾巴。
+    """
+
+    _NON_ALPHABET = re.compile(rb"[^A-Za-z0-9+/=]")
+
+    def __init__(self) -> None:
+        self._pending = b""
+
+    def decode(self, data: bytes) -> bytes:
+        """
+        Decode as much of the data as possible.
+
+        :param data: [bytes] base64 資料片段
+        :return: [bytes] 解碼後的資料
+        """
+        data = self._pending + data
+        usable = len(data) - len(data) % 4
+        try:
+            # 大部分的片段不含換行或跳脫字元，不需要逐一過濾
+            decoded = base64.b64decode(data[:usable], validate=True)
+        except binascii.Error:
+            data = self._NON_ALPHABET.sub(b"", data)
+            usable = len(data) - len(data) % 4
+            decoded = base64.b64decode(data[:usable])
+        self._pending = data[usable:]
+
+        return decoded
+
+    def flush(self) -> bytes:
+        """
+        Decode the remaining data.
+
+        :return: [bytes] 解碼後的資料
+        """
+        data, self._pending = self._NON_ALPHABET.sub(b"", self._pending), b""
+        if not data:
+            return b""
+
+        return base64.b64decode(data + b"=" * (-len(data) % 4))
+
+
+class CountingIterator:
+    """
+    CountingIterator 類別，計算已產生的 bytes 數，以及等待下一個資料片段所花的秒數。
+    """
+
+    def __init__(self, iterable: Iterable[bytes]) -> None:
+        self._iterator = iter(iterable)
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def __iter__(self) -> "CountingIterator":
+        return self
+
+    def __next__(self) -> bytes:
+        start = time.perf_counter()
+        try:
+            chunk = next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
+        self.bytes += len(chunk)
+
+        return chunk
+
+
+class StreamTool:
+    # JSON 字串中可能出現在 base64 內容裡的跳脫字元
+    _JSON_ESCAPES = {b"\\/": b"/", b"\\n": b"", b"\\r": b""}
+
+    @staticmethod
+    def iter_file(
+        filepath: str, chunk_size: int = setting.UPLOAD_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Read file chunk by chunk, never hold the whole file in memory.
+
+        :param filepath: [str] file path to read.
+        :param chunk_size: [int] bytes per chunk (default: UPLOAD_CHUNK_SIZE).
+        :return: [Iterator[bytes]] file content chunks
+        """
+        with open(filepath, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    @staticmethod
+    def write_chunks(
+        chunks: Iterable[bytes],
+        file_obj: BinaryIO,
+        progress: Callable[[int, int], None] = None,
+        total: int = None,
+        written: int = 0,
+    ) -> int:
+        """
+        Write chunks to file and report progress.
+
+        :param chunks: [Iterable[bytes]] 資料片段
+        :param file_obj: [BinaryIO] 已開啟的檔案
+        :param progress: [Callable[[int, int], None]] progress(已寫入 bytes, 總 bytes 或 None) (default: None)
+        :param total: [int] 總 bytes，未知時為 None (default: None)
+        :param written: [int] 已寫入的 bytes (default: 0)
+        :return: [int] 已寫入的 bytes
+        """
+        write = Metrics.timed(file_obj.write, "write")
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            write(chunk)
+            written += len(chunk)
+            if progress:
+                progress(written, total)
+
+        return written
+
+    @classmethod
+    def extract_json_base64(
+        cls,
+        chunks: Iterable[bytes],
+        key: str,
+        file_obj: BinaryIO,
+        progress: Callable[[int, int], None] = None,
+    ) -> dict:
+        """
+        Stream-decode the base64 string value of `key` in a flat JSON object into file,
+        the other (small) fields are parsed and returned.
+
+        :param chunks: [Iterable[bytes]] JSON 回應的資料片段
+        :param key: [str] base64 內容的欄位名稱 (ex: "file_base64")
+        :param file_obj: [BinaryIO] 寫入解碼後內容的檔案
+        :param progress: [Callable[[int, int], None]] progress(已寫入 bytes, None) (default: None)
+        :return: [dict] 其他欄位 (key 的值為空字串)
+        """
+        key_pattern = re.compile(rb'(?<!\\)"' + re.escape(key.encode()) + rb'"\s*:\s*"')
+        decoder = Base64StreamDecoder()
+        decode = Metrics.timed(decoder.decode, "decode")
+        head, tail, carry = b"", b"", b""
+        state = "head"
+        written = 0
+
+        for chunk in chunks:
+            if state == "head":
+                head += chunk
+                match = key_pattern.search(head)
+                if not match:
+                    continue
+                head, chunk = head[: match.end()], head[match.end() :]
+                state = "value"
+
+            if state == "value":
+                chunk = carry + chunk
+                end = chunk.find(b'"')
+                if end >= 0:
+                    value, tail = chunk[:end], chunk[end:]
+                    state = "tail"
+                else:
+                    # 保留結尾的反斜線，避免跳脫字元被切斷
+                    split = len(chunk) - 1 if chunk.endswith(b"\\") else len(chunk)
+                    value, carry = chunk[:split], chunk[split:]
+
+                for escaped, raw in cls._JSON_ESCAPES.items():
+                    value = value.replace(escaped, raw)
+                written = cls.write_chunks(
+                    [decode(value)], file_obj, progress, written=written
+                )
+            elif state == "tail":
+                tail += chunk
+
+        if state != "tail":
+            raise ValueError(f"`{key}` not found in JSON response")
+
+        cls.write_chunks([decoder.flush()], file_obj, progress, written=written)
+
+        return json.loads(head + tail)
@@ -0,0 +1,157 @@
+# -*- coding:utf-8 -*-
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+from controller.action_config import setting
+from controller.common.about_folder import Folder
+from controller.common.logger.info_logger_handle import Logger
+
+
+class ArchiveCache:
+    """
+    ArchiveCache 類別，以資料夾的 manifest hash 為 key 快取壓縮結果 (base64 字串)。
+    同一個資料夾推送到多台主機時只需壓縮一次，任何檔案變更 (路徑、大小、mtime) 都會產生新的 key。
+    記憶體快取為 LRU，設定 ZIP_CACHE_PATH 時也會寫入磁碟。
+    """
+
+    _entries = OrderedDict()
+    _size = 0
+    _lock = threading.Lock()
+    _building = {}
+
+    @staticmethod
+    def manifest_key(files: Iterable[tuple], *extra) -> str:
+        """
+        Calculate manifest hash of files.
+
+        :param files: [Iterable[tuple]] (file path, relative file path)
+        :param extra: [all] 其他影響壓縮結果的參數 (ex: exclude 清單)
+        :return: [str] sha256 hex digest
+        """
+        manifest = hashlib.sha256(repr(extra).encode("utf-8"))
+
+        for file_path, relative_file_path in sorted(files, key=lambda item: item[1]):
+            stat = os.stat(file_path)
+            manifest.update(
+                f"{relative_file_path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode(
+                    "utf-8", "surrogateescape"
+                )
+            )
+
+        return manifest.hexdigest()
+
+    @staticmethod
+    def _disk_path(key: str) -> str:
+        """
+        Get disk cache path of key.
+
+        :param key: [str] manifest hash
+        :return: [str] 快取檔路徑
+        """
+        return os.path.join(setting.ZIP_CACHE_PATH, f"{key}.b64")
+
+    @classmethod
+    def _load_from_disk(cls, key: str) -> str:
+        """
+        Load cached archive from disk.
+
+        :param key: [str] manifest hash
+        :return: [str] base64 zip data，沒有快取時為 None
+        """
+        if not setting.ZIP_CACHE_PATH or not os.path.exists(cls._disk_path(key)):
+            return None
+
+        with open(cls._disk_path(key), "r", encoding="ascii") as f:
+            return f.read()
+
+    @classmethod
+    def _save_to_disk(cls, key: str, data: str) -> None:
+        """
+        Save archive to disk cache atomically.
+
+        :param key: [str] manifest hash
+        :param data: [str] base64 zip data
+        """
+        if not setting.ZIP_CACHE_PATH:
+            return
+
+        Folder.check_and_make_folder(setting.ZIP_CACHE_PATH)
+        tmp_path = f"{cls._disk_path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="ascii") as f:
+            f.write(data)
+        os.replace(tmp_path, cls._disk_path(key))
+
+    @classmethod
+    def _put(cls, key: str, data: str) -> None:
+        """
+        Put archive into memory cache and evict least recently used entries.
+        Caller must hold the lock.
+
+        :param key: [str] manifest hash
+        :param data: [str] base64 zip data
+        """
+        if len(data) > setting.ZIP_CACHE_MAX_BYTES:
+            return
+
+        if key in cls._entries:
+            cls._size -= len(cls._entries.pop(key))
+        cls._entries[key] = data
+        cls._size += len(data)
+
+        while (
+            len(cls._entries) > setting.ZIP_CACHE_MAX_ENTRIES
+            or cls._size > setting.ZIP_CACHE_MAX_BYTES
+        ):
+            _, evicted = cls._entries.popitem(last=False)
+            cls._size -= len(evicted)
+
+    @classmethod
+    def get_or_build(cls, key: str, builder: Callable[[], str]) -> str:
+        """
+        Get cached archive, or build it once even if many threads ask at the same time.
+
+        :param key: [str] manifest hash
+        :param builder: [Callable[[], str]] 快取不存在時產生 base64 zip data 的函式
+        :return: [str] base64 zip data
+        """
+        with cls._lock:
+            if key in cls._entries:
+                cls._entries.move_to_end(key)
+                return cls._entries[key]
+            build_lock = cls._building.setdefault(key, threading.Lock())
+
+        try:
+            with build_lock:
+                with cls._lock:
+                    if key in cls._entries:
+                        cls._entries.move_to_end(key)
+                        return cls._entries[key]
+
+                data = cls._load_from_disk(key)
+                if data is None:
+                    data = builder()
+                    cls._save_to_disk(key, data)
+                    Logger.debug(f"Archive cache miss, built {key[:12]}")
+                else:
+                    Logger.debug(f"Archive cache loaded {key[:12]} from disk")
+
+                with cls._lock:
+                    cls._put(key, data)
+        finally:
+            # builder 失敗時也要移除，避免 _building 無限增長
+            with cls._lock:
+                cls._building.pop(key, None)
+
+        return data
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Clear memory cache (disk cache files are kept).
+        """
+        with cls._lock:
+            cls._entries.clear()
+            cls._size = 0
@@ -0,0 +1,295 @@
+# -*- coding:utf-8 -*-
+import zipfile
+import threading
+from typing import Iterable, Iterator
+
+try:
+    import zstandard
+except ImportError:  # zstandard 為選用套件，只有 zstd codec 需要
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:  # lz4 為選用套件，只有 lz4 codec 需要
+    lz4 = None
+
+from controller.action_config import setting
+
+
+class _LZ4Compressor:
+    """
+    讓 lz4.frame.LZ4FrameCompressor 與 zlib / zstandard 的 compressobj 介面一致。
+    """
+
+    def __init__(self, level: int) -> None:
+        self._compressor = lz4.frame.LZ4FrameCompressor(compression_level=level)
+        self._header = self._compressor.begin()
+
+    def _take_header(self) -> bytes:
+        header, self._header = self._header, b""
+
+        return header
+
+    def compress(self, data: bytes) -> bytes:
+        return self._take_header() + self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._take_header() + self._compressor.flush()
+
+
+class Codec:
+    """
+    Codec 類別，資料夾傳輸使用的壓縮方式，以 "名稱:等級" 表示 (ex: "deflate:1", "zstd:3")。
+    store / deflate 直接作為 zip 成員的壓縮方式，任何 agent 都能解開；
+    zstd / lz4 則是先產生不壓縮的 zip 再整包壓縮，agent 需先解壓縮再解 zip。
+    "auto" 會依照量測到的連線速度與各 codec 的壓縮速度、壓縮率，選擇預估總時間最短的 codec。
+    """
+
+    STORE = "store"
+    DEFLATE = "deflate"
+    ZSTD = "zstd"
+    LZ4 = "lz4"
+    AUTO = "auto"
+
+    # 整包壓縮的 codec，其餘為 zip 成員的壓縮方式
+    FRAMED = (ZSTD, LZ4)
+    _DEFAULT_LEVELS = {STORE: 0, DEFLATE: 6, ZSTD: 3, LZ4: 0}
+
+    # 尚未量測前的預估值: (壓縮速度 bytes/s, 壓縮後大小比例)，實際壓縮後以 EWMA 更新
+    _profiles = {
+        "store": (float("inf"), 1.0),
+        "deflate:1": (60 * 1024 * 1024, 0.42),
+        "deflate:6": (20 * 1024 * 1024, 0.36),
+        "deflate:9": (6 * 1024 * 1024, 0.35),
+        "zstd:3": (250 * 1024 * 1024, 0.34),
+        "zstd:19": (4 * 1024 * 1024, 0.28),
+        "lz4:0": (500 * 1024 * 1024, 0.50),
+    }
+    # 每台主機量測到的有效傳輸速度 (未編碼的 bytes/s)
+    _links = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, codec: str) -> tuple:
+        """
+        Parse codec string.
+
+        :param codec: [str] codec (ex: "store", "deflate", "deflate:9", "zstd:3")
+        :return: [tuple] (codec 名稱, 壓縮等級)
+        """
+        name, _, level = codec.partition(":")
+        if name not in cls._DEFAULT_LEVELS:
+            raise ValueError(f"Unknown codec: {codec}")
+
+        return name, int(level) if level else cls._DEFAULT_LEVELS[name]
+
+    @classmethod
+    def normalize(cls, codec: str) -> str:
+        """
+        Normalize codec string with explicit level.
+
+        :param codec: [str] codec
+        :return: [str] "名稱:等級"，store 沒有等級
+        """
+        name, level = cls.parse(codec)
+
+        return name if name == cls.STORE else f"{name}:{level}"
+
+    @staticmethod
+    def installed() -> frozenset:
+        """
+        Get codecs which can be used on this host.
+
+        :return: [frozenset] codec 名稱
+        """
+        codecs = {Codec.STORE, Codec.DEFLATE}
+        if zstandard is not None:
+            codecs.add(Codec.ZSTD)
+        if lz4 is not None:
+            codecs.add(Codec.LZ4)
+
+        return frozenset(codecs)
+
+    @classmethod
+    def zip_params(cls, codec: str) -> tuple:
+        """
+        Get compress type and level of zip members.
+
+        :param codec: [str] codec
+        :return: [tuple] (zipfile.ZIP_STORED 或 zipfile.ZIP_DEFLATED, 壓縮等級)
+        """
+        name, level = cls.parse(codec)
+        if name == cls.DEFLATE:
+            return zipfile.ZIP_DEFLATED, level
+
+        return zipfile.ZIP_STORED, None
+
+    @classmethod
+    def compressor(cls, codec: str):
+        """
+        Get stream compressor of framed codec.
+
+        :param codec: [str] zstd 或 lz4 codec
+        :return: [object] 具有 compress(data) 與 flush() 的壓縮器
+        """
+        name, level = cls.parse(codec)
+        if name not in cls.installed():
+            raise ImportError(
+                f"Codec {name} requires {'zstandard' if name == cls.ZSTD else name},"
+                f" install it by `pip install {'zstandard' if name == cls.ZSTD else name}`"
+            )
+        if name == cls.ZSTD:
+            return zstandard.ZstdCompressor(level=level).compressobj()
+        if name == cls.LZ4:
+            return _LZ4Compressor(level)
+
+        raise ValueError(f"Codec {codec} is not a framed codec")
+
+    @classmethod
+    def compress_stream(cls, chunks: Iterable[bytes], codec: str) -> Iterator[bytes]:
+        """
+        Compress zip chunks with framed codec, other codecs are passed through.
+
+        :param chunks: [Iterable[bytes]] zip data chunks
+        :param codec: [str] codec
+        :return: [Iterator[bytes]] 壓縮後的 chunks
+        """
+        if cls.parse(codec)[0] not in cls.FRAMED:
+            yield from chunks
+            return
+
+        compressor = cls.compressor(codec)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+
+        yield compressor.flush()
+
+    @classmethod
+    def compress(cls, data: bytes, codec: str) -> bytes:
+        """
+        Compress zip data with framed codec, other codecs return data as is.
+
+        :param data: [bytes] zip data
+        :param codec: [str] codec
+        :return: [bytes] 壓縮後的資料
+        """
+        return b"".join(cls.compress_stream((data,), codec))
+
+    @classmethod
+    def decompress(cls, data: bytes, codec: str) -> bytes:
+        """
+        Decompress data compressed by Codec.compress.
+
+        :param data: [bytes] 壓縮後的資料
+        :param codec: [str] codec
+        :return: [bytes] zip data
+        """
+        name, _ = cls.parse(codec)
+        if name == cls.ZSTD:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        if name == cls.LZ4:
+            return lz4.frame.decompress(data)
+
+        return data
+
+    @staticmethod
+    def _ewma(old: float, new: float) -> float:
+        return new if old is None else old * 0.7 + new * 0.3
+
+    @classmethod
+    def record_link(cls, dest: str, nbytes: int, seconds: float) -> None:
+        """
+        Record a transfer to dest, used by "auto" codec.
+
+        :param dest: [str] target host address.
+        :param nbytes: [int] 傳送的資料大小 (未經 base64 編碼)
+        :param seconds: [float] 傳送花費的秒數
+        """
+        # 太小的傳輸主要是延遲，無法反映頻寬
+        if nbytes < setting.ZIP_CODEC_MIN_SAMPLE or seconds <= 0:
+            return
+
+        with cls._lock:
+            cls._links[dest] = cls._ewma(cls._links.get(dest), nbytes / seconds)
+
+    @classmethod
+    def record_compression(
+        cls, codec: str, in_bytes: int, out_bytes: int, seconds: float
+    ) -> None:
+        """
+        Record compression speed and ratio of codec, used by "auto" codec.
+
+        :param codec: [str] codec
+        :param in_bytes: [int] 原始資料大小
+        :param out_bytes: [int] 壓縮後大小
+        :param seconds: [float] 壓縮花費的秒數
+        """
+        codec = cls.normalize(codec)
+        if codec == cls.STORE or in_bytes < setting.ZIP_CODEC_MIN_SAMPLE:
+            return
+
+        with cls._lock:
+            speed, ratio = cls._profiles.get(codec, (None, None))
+            cls._profiles[codec] = (
+                cls._ewma(speed, in_bytes / max(seconds, 1e-6)),
+                cls._ewma(ratio, out_bytes / in_bytes),
+            )
+
+    @classmethod
+    def choose(cls, dest: str, supported: Iterable[str] = (STORE, DEFLATE)) -> str:
+        """
+        Choose codec with the shortest estimated compress + transfer time.
+
+        :param dest: [str] target host address.
+        :param supported: [Iterable[str]] agent 支援的 codec 名稱 (default: store, deflate).
+        :return: [str] codec
+        """
+        supported = cls.installed() & frozenset(supported)
+
+        with cls._lock:
+            link = cls._links.get(dest)
+            profiles = dict(cls._profiles)
+
+        if link is None:
+            return cls.normalize(setting.ZIP_CODEC_AUTO_DEFAULT)
+
+        def estimate(item: tuple) -> float:
+            speed, ratio = item[1]
+            return 1 / speed + ratio / link
+
+        candidates = [
+            item for item in profiles.items() if cls.parse(item[0])[0] in supported
+        ]
+
+        return min(candidates, key=estimate)[0]
+
+    @classmethod
+    def resolve(
+        cls, codec: str, dest: str, supported: Iterable[str] = (STORE, DEFLATE)
+    ) -> str:
+        """
+        Resolve "auto" codec of dest and normalize codec.
+
+        :param codec: [str] codec 或 "auto"
+        :param dest: [str] target host address.
+        :param supported: [Iterable[str]] agent 支援的 codec 名稱 (default: store, deflate).
+        :return: [str] codec
+        """
+        if codec == cls.AUTO:
+            return cls.choose(dest, supported)
+
+        name = cls.parse(codec)[0]
+        if name not in frozenset(supported):
+            raise ValueError(f"Codec {name} is not supported by agent {dest}")
+
+        return cls.normalize(codec)
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Clear measured link throughput.
+        """
+        with cls._lock:
+            cls._links.clear()
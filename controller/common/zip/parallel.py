@@ -0,0 +1,193 @@
+# -*- coding:utf-8 -*-
+import zlib
+import struct
+import zipfile
+from collections import deque
+from typing import BinaryIO, Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+from controller.action_config import setting
+
+# 與 zipfile 相同的 central directory / end of central directory 格式
+_CENTRAL_DIR = struct.Struct("<4s4B4HL2L5H2L")
+_END_RECORD = struct.Struct("<4s4H2LH")
+_ZIP32_LIMIT = (1 << 32) - 1
+_MAX_MEMBERS = (1 << 16) - 1
+
+
+class ParallelZip:
+    """
+    ParallelZip 類別，在 thread pool 中同時壓縮多個檔案 (zlib 壓縮時會釋放 GIL)，
+    再依照原本的順序寫入 zip，產生的內容與依序壓縮相同。
+    只支援不需要 ZIP64 的封存檔，ParallelZip.supports 為 False 時請改用 zipfile 依序壓縮。
+    """
+
+    @staticmethod
+    def supports(files: list) -> bool:
+        """
+        Check whether files fit in a non-ZIP64 archive.
+
+        :param files: [list] (file path, relative file path, zipfile.ZipInfo)
+        :return: [bool] 是否可以使用平行壓縮
+        """
+        # deflate 最差情況會比原始資料稍大，保留 1% 的空間
+        total = sum(zinfo.file_size for _, _, zinfo in files)
+
+        return len(files) < _MAX_MEMBERS and total * 1.01 + len(files) * 1024 < (
+            _ZIP32_LIMIT
+        )
+
+    @staticmethod
+    def _compress(file_path: str, compress_type: int, level: int) -> tuple:
+        """
+        Read and compress a file.
+
+        :param file_path: [str] file path.
+        :param compress_type: [int] zipfile.ZIP_DEFLATED or zipfile.ZIP_STORED
+        :param level: [int] deflate level
+        :return: [tuple] (crc32, 原始大小, 壓縮後的資料)
+        """
+        crc = 0
+        size = 0
+        compressor = (
+            zlib.compressobj(level, zlib.DEFLATED, -15)
+            if compress_type == zipfile.ZIP_DEFLATED
+            else None
+        )
+        data = []
+
+        with open(file_path, "rb") as f:
+            while True:
+                chunk = f.read(setting.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                crc = zlib.crc32(chunk, crc)
+                size += len(chunk)
+                data.append(compressor.compress(chunk) if compressor else chunk)
+
+        if compressor:
+            data.append(compressor.flush())
+
+        return crc, size, b"".join(data)
+
+    @staticmethod
+    def _encoded_filename(zinfo: zipfile.ZipInfo) -> tuple:
+        """
+        Encode filename like zipfile does.
+
+        :param zinfo: [zipfile.ZipInfo] zip member info
+        :return: [tuple] (encoded filename, flag bits)
+        """
+        try:
+            return zinfo.filename.encode("ascii"), zinfo.flag_bits
+        except UnicodeEncodeError:
+            return zinfo.filename.encode("utf-8"), zinfo.flag_bits | 0x800
+
+    @classmethod
+    def _central_dir_record(cls, zinfo: zipfile.ZipInfo) -> bytes:
+        """
+        Build central directory record of zip member.
+
+        :param zinfo: [zipfile.ZipInfo] zip member info
+        :return: [bytes] central directory record
+        """
+        filename, flag_bits = cls._encoded_filename(zinfo)
+        min_version = 20 if zinfo.compress_type == zipfile.ZIP_DEFLATED else 0
+        year, month, day, hour, minute, second = zinfo.date_time
+
+        return (
+            _CENTRAL_DIR.pack(
+                b"PK\001\002",
+                max(min_version, zinfo.create_version),
+                zinfo.create_system,
+                max(min_version, zinfo.extract_version),
+                zinfo.reserved,
+                flag_bits,
+                zinfo.compress_type,
+                (hour << 11) | (minute << 5) | (second // 2),
+                ((year - 1980) << 9) | (month << 5) | day,
+                zinfo.CRC,
+                zinfo.compress_size,
+                zinfo.file_size,
+                len(filename),
+                len(zinfo.extra),
+                len(zinfo.comment),
+                0,
+                zinfo.internal_attr,
+                zinfo.external_attr,
+                zinfo.header_offset,
+            )
+            + filename
+            + zinfo.extra
+            + zinfo.comment
+        )
+
+    @classmethod
+    def write(
+        cls,
+        fp: BinaryIO,
+        files: Iterable[tuple],
+        level: int = -1,
+        workers: int = setting.ZIP_PARALLEL_WORKERS,
+    ) -> None:
+        """
+        Compress files in parallel and write a zip archive to fp.
+
+        :param fp: [BinaryIO] 寫入 zip 的檔案物件
+        :param files: [Iterable[tuple]] (file path, relative file path, zipfile.ZipInfo)，ZipInfo 需已設定 compress_type
+        :param level: [int] deflate level (default: -1, zlib 預設)
+        :param workers: [int] 壓縮的執行緒數量 (default: ZIP_PARALLEL_WORKERS)
+        """
+        members = []
+        offset = 0
+
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bond-zip"
+        ) as executor:
+            # 只預先壓縮 workers * 2 個檔案，避免所有壓縮結果同時留在記憶體中
+            window = deque()
+            files = iter(files)
+
+            def submit_next() -> None:
+                for file_path, _, zinfo in files:
+                    window.append(
+                        (
+                            zinfo,
+                            executor.submit(
+                                cls._compress, file_path, zinfo.compress_type, level
+                            ),
+                        )
+                    )
+                    return
+
+            for _ in range(workers * 2):
+                submit_next()
+
+            while window:
+                zinfo, future = window.popleft()
+                submit_next()
+
+                zinfo.CRC, zinfo.file_size, data = future.result()
+                zinfo.compress_size = len(data)
+                zinfo.header_offset = offset
+
+                header = zinfo.FileHeader(zip64=False)
+                fp.write(header)
+                fp.write(data)
+                offset += len(header) + len(data)
+                members.append(zinfo)
+
+        central_dir = b"".join(cls._central_dir_record(zinfo) for zinfo in members)
+        fp.write(central_dir)
+        fp.write(
+            _END_RECORD.pack(
+                b"PK\005\006",
+                0,
+                0,
+                len(members),
+                len(members),
+                len(central_dir),
+                offset,
+                0,
+            )
+        )
@@ -1,9 +1,110 @@
+import io
 import os
+import time
+import queue
 import zipfile
 import base64
+import threading
 from io import BytesIO
+from typing import Iterable, Iterator
 
+from controller.action_config import setting
 from controller.action_config.zip_exclude import ZIP_EXCLUDE_FILES, ZIP_EXCLUDE_DIRS
+from controller.common.checksum import Checksum
+from controller.common.zip.codec import Codec
+from controller.common.zip.cache import ArchiveCache
+from controller.common.zip.parallel import ParallelZip
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """
+    不可 seek 的寫入緩衝區，zipfile 在背景執行緒寫入，每累積 chunk_size 就交給
+    ZipTool.zip_dir_stream 的呼叫端。最多預先壓縮 QUEUE_SIZE 個 chunk，
+    因此記憶體用量不受資料夾大小影響，壓縮也能與上傳同時進行。
+    """
+
+    QUEUE_SIZE = 2
+    _DONE = object()
+
+    def __init__(self, chunk_size: int) -> None:
+        self._chunk_size = chunk_size
+        self._chunks = []
+        self._size = 0
+        self._position = 0
+        self._queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self._cancelled = threading.Event()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        self._position += len(data)
+        if self._size >= self._chunk_size:
+            self._put(self._drain())
+
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def _drain(self) -> bytes:
+        """
+        Take out written bytes and clear the buffer.
+
+        :return: [bytes] 目前累積的資料
+        """
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+
+        return data
+
+    def _put(self, item) -> None:
+        """
+        Hand item to the reader, wait while the reader is behind.
+
+        :param item: [bytes | BaseException | _DONE] chunk、寫入時的例外或結束標記
+        """
+        while True:
+            if self._cancelled.is_set():
+                raise BrokenPipeError("zip stream is closed by the reader")
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    def finish(self, error: BaseException = None) -> None:
+        """
+        Flush the remaining bytes and notify the reader (writer side).
+
+        :param error: [BaseException] 寫入時發生的例外 (default: None).
+        """
+        if error is None and self._size:
+            self._put(self._drain())
+        self._put(self._DONE if error is None else error)
+
+    def cancel(self) -> None:
+        """
+        Stop the writer, its next write raises BrokenPipeError (reader side).
+        """
+        self._cancelled.set()
+
+    def chunks(self) -> Iterator[bytes]:
+        """
+        Yield chunks until the writer finishes (reader side).
+
+        :return: [Iterator[bytes]] zip data chunks
+        """
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
 
 
 class ZipTool:
@@ -13,6 +114,9 @@ class ZipTool:
         dir_path: str,
         exclude_files: tuple = (),
         exclude_dirs: tuple = (),
+        use_cache: bool = setting.ZIP_CACHE_ENABLED,
+        parallel: bool = setting.ZIP_PARALLEL,
+        codec: str = Codec.DEFLATE,
     ) -> str:
         """
         Zip directory.
@@ -20,38 +124,331 @@ class ZipTool:
         :param dir_path: [str] directory path.
         :param exclude_files: [tuple] files to exclude.
         :param exclude_dirs: [tuple] directories to exclude.
-        :return: [str] base64 encoded zip data.
+        :param use_cache: [bool] 重複使用未變更資料夾的壓縮結果 (default: ZIP_CACHE_ENABLED).
+        :param parallel: [bool] 使用多執行緒壓縮 (default: ZIP_PARALLEL).
+        :param codec: [str] 壓縮方式，見 Codec (default: deflate).
+        :return: [str] base64 encoded zip data (zstd / lz4 為整包壓縮後的 zip).
         """
         exclude_files += ZIP_EXCLUDE_FILES
         exclude_dirs += ZIP_EXCLUDE_DIRS
+        codec = Codec.normalize(codec)
 
+        if not use_cache:
+            return cls._zip_dir_base64(
+                dir_path, exclude_files, exclude_dirs, parallel=parallel, codec=codec
+            )
+
+        key = ArchiveCache.manifest_key(
+            cls._walk(dir_path, exclude_files, exclude_dirs),
+            os.path.realpath(dir_path),
+            exclude_files,
+            exclude_dirs,
+            codec,
+        )
+
+        return ArchiveCache.get_or_build(
+            key,
+            lambda: cls._zip_dir_base64(
+                dir_path, exclude_files, exclude_dirs, parallel=parallel, codec=codec
+            ),
+        )
+
+    @classmethod
+    def _zip_dir_base64(
+        cls,
+        dir_path: str,
+        exclude_files: tuple = (),
+        exclude_dirs: tuple = (),
+        include_files: frozenset = None,
+        parallel: bool = setting.ZIP_PARALLEL,
+        codec: str = Codec.DEFLATE,
+    ) -> str:
+        """
+        Zip directory and encode it with base64.
+
+        :param dir_path: [str] directory path.
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :param include_files: [frozenset] 只壓縮這些以 "/" 分隔的相對路徑，None 代表全部 (default: None).
+        :param parallel: [bool] 使用多執行緒壓縮 (default: ZIP_PARALLEL).
+        :param codec: [str] 壓縮方式，見 Codec (default: deflate).
+        :return: [str] base64 encoded zip data.
+        """
+        start = time.perf_counter()
         buf = BytesIO()
-        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zipf:
-            ZipTool._walk_and_zip(dir_path, zipf, exclude_files, exclude_dirs)
-        buf.seek(0)
-        zip_data = buf.getvalue()
+        files = None
+        if parallel:
+            files = [
+                (
+                    file_path,
+                    relative_file_path,
+                    cls._zip_info(file_path, relative_file_path, codec),
+                )
+                for file_path, relative_file_path in cls._walk(
+                    dir_path, exclude_files, exclude_dirs, include_files
+                )
+            ]
+
+        if files and len(files) > 1 and ParallelZip.supports(files):
+            level = Codec.zip_params(codec)[1]
+            ParallelZip.write(buf, files, -1 if level is None else level)
+            total = sum(zinfo.file_size for _, _, zinfo in files)
+        else:
+            with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zipf:
+                ZipTool._walk_and_zip(
+                    dir_path, zipf, exclude_files, exclude_dirs, include_files, codec
+                )
+                total = sum(zinfo.file_size for zinfo in zipf.infolist())
+
+        zip_data = Codec.compress(buf.getvalue(), codec)
+        Codec.record_compression(
+            codec, total, len(zip_data), time.perf_counter() - start
+        )
+
         return base64.b64encode(zip_data).decode("utf-8")
 
     @classmethod
-    def _walk_and_zip(
+    def file_manifest(
         cls,
         dir_path: str,
-        zipf: zipfile.ZipFile,
         exclude_files: tuple = (),
         exclude_dirs: tuple = (),
-    ) -> None:
+    ) -> dict:
         """
-        Walk and zip directory.
+        Get sha256 of every file in directory.
 
         :param dir_path: [str] directory path.
-        :param zipf: [zipfile.ZipFile] zipfile object.
         :param exclude_files: [tuple] files to exclude.
         :param exclude_dirs: [tuple] directories to exclude.
+        :return: [dict] {以 "/" 分隔的相對路徑: sha256}
+        """
+        exclude_files += ZIP_EXCLUDE_FILES
+        exclude_dirs += ZIP_EXCLUDE_DIRS
+
+        return {
+            relative_file_path.replace(os.sep, "/"): Checksum.sha256_file_cached(
+                file_path
+            )
+            for file_path, relative_file_path in cls._walk(
+                dir_path, exclude_files, exclude_dirs
+            )
+        }
+
+    @classmethod
+    def zip_files(
+        cls,
+        dir_path: str,
+        relative_paths: Iterable[str],
+        exclude_files: tuple = (),
+        exclude_dirs: tuple = (),
+        codec: str = Codec.DEFLATE,
+    ) -> str:
+        """
+        Zip only the given files of directory.
+
+        :param dir_path: [str] directory path.
+        :param relative_paths: [Iterable[str]] 以 "/" 分隔的相對路徑
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :param codec: [str] 壓縮方式，見 Codec (default: deflate).
+        :return: [str] base64 encoded zip data.
+        """
+        exclude_files += ZIP_EXCLUDE_FILES
+        exclude_dirs += ZIP_EXCLUDE_DIRS
+
+        return cls._zip_dir_base64(
+            dir_path,
+            exclude_files,
+            exclude_dirs,
+            frozenset(relative_paths),
+            codec=Codec.normalize(codec),
+        )
+
+    @staticmethod
+    def is_excluded(
+        relative_path: str, exclude_files: tuple = (), exclude_dirs: tuple = ()
+    ) -> bool:
+        """
+        Check whether a "/" separated relative path would be excluded by zip_dir.
+
+        :param relative_path: [str] 以 "/" 分隔的相對路徑
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :return: [bool] 是否被排除
+        """
+        exclude_files += ZIP_EXCLUDE_FILES
+        exclude_dirs += ZIP_EXCLUDE_DIRS
+        parts = relative_path.split("/")
+
+        return relative_path.replace("/", os.sep) in exclude_files or any(
+            part in exclude_dirs for part in parts[:-1]
+        )
+
+    @staticmethod
+    def _compress_type(relative_file_path: str, codec: str = Codec.DEFLATE) -> int:
+        """
+        Get compress type of file, already-compressed formats are stored as is.
+
+        :param relative_file_path: [str] relative file path.
+        :param codec: [str] 壓縮方式，見 Codec (default: deflate).
+        :return: [int] zipfile.ZIP_STORED or zipfile.ZIP_DEFLATED
+        """
+        if relative_file_path.lower().endswith(setting.ZIP_STORED_EXTENSIONS):
+            return zipfile.ZIP_STORED
+
+        return Codec.zip_params(codec)[0]
+
+    @classmethod
+    def _zip_info(
+        cls, file_path: str, relative_file_path: str, codec: str = Codec.DEFLATE
+    ) -> zipfile.ZipInfo:
+        """
+        Build ZipInfo of file with its compress type.
+
+        :param file_path: [str] file path.
+        :param relative_file_path: [str] relative file path.
+        :param codec: [str] 壓縮方式，見 Codec (default: deflate).
+        :return: [zipfile.ZipInfo] zip member info
+        """
+        zinfo = zipfile.ZipInfo.from_file(file_path, relative_file_path)
+        zinfo.compress_type = cls._compress_type(relative_file_path, codec)
+
+        return zinfo
+
+    @classmethod
+    def zip_dir_stream(
+        cls,
+        dir_path: str,
+        exclude_files: tuple = (),
+        exclude_dirs: tuple = (),
+        chunk_size: int = setting.UPLOAD_CHUNK_SIZE,
+        codec: str = Codec.DEFLATE,
+    ) -> Iterator[bytes]:
+        """
+        Zip directory as a stream, zip bytes are yielded while walking the tree,
+        so memory usage stays around chunk_size no matter how big the folder is.
+
+        :param dir_path: [str] directory path.
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :param chunk_size: [int] bytes per yielded chunk (default: UPLOAD_CHUNK_SIZE).
+        :param codec: [str] 壓縮方式，見 Codec (default: deflate).
+        :return: [Iterator[bytes]] zip data chunks (zstd / lz4 為整包壓縮後的 chunks)
+        """
+        exclude_files += ZIP_EXCLUDE_FILES
+        exclude_dirs += ZIP_EXCLUDE_DIRS
+
+        yield from Codec.compress_stream(
+            cls._zip_stream_chunks(
+                dir_path, exclude_files, exclude_dirs, chunk_size, codec
+            ),
+            codec,
+        )
+
+    @classmethod
+    def _zip_stream_chunks(
+        cls,
+        dir_path: str,
+        exclude_files: tuple,
+        exclude_dirs: tuple,
+        chunk_size: int,
+        codec: str,
+    ) -> Iterator[bytes]:
+        """
+        Zip the tree in a background thread and yield its output.
+
+        :param dir_path: [str] directory path.
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :param chunk_size: [int] bytes per yielded chunk.
+        :param codec: [str] 壓縮方式，見 Codec
+        :return: [Iterator[bytes]] zip data chunks
+        """
+        buf = _ZipStreamBuffer(chunk_size)
+
+        def produce() -> None:
+            try:
+                with zipfile.ZipFile(
+                    buf,
+                    "w",
+                    zipfile.ZIP_DEFLATED,
+                    compresslevel=Codec.zip_params(codec)[1],
+                ) as zipf:
+                    cls._walk_and_zip(
+                        dir_path, zipf, exclude_files, exclude_dirs, codec=codec
+                    )
+                buf.finish()
+            except BaseException as e:
+                try:
+                    buf.finish(e)
+                except BrokenPipeError:
+                    # 呼叫端已停止讀取
+                    pass
+
+        thread = threading.Thread(target=produce, name="bond-zip-stream", daemon=True)
+        thread.start()
+        try:
+            yield from buf.chunks()
+        finally:
+            buf.cancel()
+            thread.join()
+
+    @classmethod
+    def _walk(
+        cls,
+        dir_path: str,
+        exclude_files: tuple = (),
+        exclude_dirs: tuple = (),
+        include_files: frozenset = None,
+    ) -> Iterator[tuple]:
+        """
+        Walk directory and yield files which are not excluded.
+
+        :param dir_path: [str] directory path.
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :param include_files: [frozenset] 只保留這些以 "/" 分隔的相對路徑，None 代表全部 (default: None).
+        :return: [Iterator[tuple]] (file path, relative file path)
         """
         for root, dirs, files in os.walk(dir_path):
             dirs[:] = [dir_ for dir_ in dirs if dir_ not in exclude_dirs]
             for file in files:
                 file_path = os.path.join(root, file)
                 relative_file_path = os.path.relpath(file_path, start=dir_path)
-                if relative_file_path not in exclude_files:
-                    zipf.write(file_path, relative_file_path)
+                if relative_file_path in exclude_files:
+                    continue
+                if include_files is not None and (
+                    relative_file_path.replace(os.sep, "/") not in include_files
+                ):
+                    continue
+                yield file_path, relative_file_path
+
+    @classmethod
+    def _walk_and_zip(
+        cls,
+        dir_path: str,
+        zipf: zipfile.ZipFile,
+        exclude_files: tuple = (),
+        exclude_dirs: tuple = (),
+        include_files: frozenset = None,
+        codec: str = Codec.DEFLATE,
+    ) -> None:
+        """
+        Walk and zip directory.
+
+        :param dir_path: [str] directory path.
+        :param zipf: [zipfile.ZipFile] zipfile object.
+        :param exclude_files: [tuple] files to exclude.
+        :param exclude_dirs: [tuple] directories to exclude.
+        :param include_files: [frozenset] 只壓縮這些以 "/" 分隔的相對路徑，None 代表全部 (default: None).
+        :param codec: [str] 壓縮方式，見 Codec (default: deflate).
+        """
+        for file_path, relative_file_path in cls._walk(
+            dir_path, exclude_files, exclude_dirs, include_files
+        ):
+            zipf.write(
+                file_path,
+                relative_file_path,
+                compress_type=cls._compress_type(relative_file_path, codec),
+                compresslevel=Codec.zip_params(codec)[1],
+            )
@@ -0,0 +1,164 @@
+# -*- coding:utf-8 -*-
+import os
+import json
+import base64
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bond_controller_action.controller.action import Endpoint_Action as endpoint_action
+
+# 使用 Endpoint_Action 實際使用的模組
+Endpoint_Action = endpoint_action.Endpoint_Action
+AgentCapability = endpoint_action.AgentCapability
+Codec = endpoint_action.Codec
+setting = endpoint_action.setting
+
+
+class _AgentHandler(BaseHTTPRequestHandler):
+    def _reply(self, status, body):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding") != "chunked":
+            return self.rfile.read(int(self.headers["Content-Length"]))
+
+        body = b""
+        while True:
+            size = int(self.rfile.readline().strip(), 16)
+            chunk = self.rfile.read(size + 2)[:size]
+            if not size:
+                return body
+            body += chunk
+
+    def do_GET(self):
+        agent = self.server.agent
+        agent.requests.append(self.path)
+        if self.path != "/capabilities/" or agent.status == 404:
+            self._reply(404, b"not found")
+        elif agent.status != 200:
+            self._reply(agent.status, b"error")
+        else:
+            self._reply(200, {"capabilities": agent.capabilities})
+
+    def do_POST(self):
+        agent = self.server.agent
+        agent.requests.append(self.path.split("?")[0])
+        agent.uploads.append(self._read_body())
+        self._reply(200, b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class _Agent:
+    def __init__(self, status):
+        self.status = status
+        self.capabilities = [AgentCapability.UPLOAD_FILE_STREAM]
+        self.requests = []
+        self.uploads = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _AgentHandler)
+        self.server.agent = self
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestAgentCapability(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(AgentCapability.clear)
+        with tempfile.NamedTemporaryFile("wb", delete=False) as f:
+            f.write(b"file data")
+        self.filepath = f.name
+        self.addCleanup(os.remove, self.filepath)
+
+    def _agent(self, status):
+        agent = _Agent(status)
+        self.addCleanup(agent.close)
+        return agent
+
+    def test_legacy_agent_uses_json_upload(self):
+        agent = self._agent(404)
+
+        for _ in range(2):
+            Endpoint_Action.send_file_to_agent(
+                "127.0.0.1", self.filepath, "C:/a.txt", agent.port
+            )
+
+        # 404 的結果會被快取，只查詢一次
+        self.assertEqual(
+            agent.requests, ["/capabilities/", "/upload_file/", "/upload_file/"]
+        )
+        content = json.loads(agent.uploads[0])["file_content"]
+        self.assertEqual(base64.b64decode(content), b"file data")
+
+    def test_capable_agent_uses_stream_upload(self):
+        agent = self._agent(200)
+
+        Endpoint_Action.send_file_to_agent(
+            "127.0.0.1", self.filepath, "C:/a.txt", agent.port
+        )
+
+        self.assertEqual(agent.requests, ["/capabilities/", "/upload_file_stream/"])
+        self.assertEqual(agent.uploads[0], b"file data")
+
+    def test_failed_probe_expires_quickly(self):
+        agent = self._agent(500)
+
+        with mock.patch.object(setting, "CAPABILITY_FAILURE_TTL", 0):
+            self.assertEqual(AgentCapability.get("127.0.0.1", agent.port), frozenset())
+            # agent 恢復後，下一次查詢即取得正確結果
+            agent.status = 200
+            self.assertTrue(
+                AgentCapability.supports(
+                    "127.0.0.1", agent.port, AgentCapability.UPLOAD_FILE_STREAM
+                )
+            )
+
+        self.assertEqual(agent.requests, ["/capabilities/"] * 2)
+
+    def test_cache_expires(self):
+        agent = self._agent(404)
+
+        with mock.patch.object(setting, "CAPABILITY_CACHE_TTL", 0):
+            AgentCapability.get("127.0.0.1", agent.port)
+            # agent 升級
+            agent.status = 200
+            capabilities = AgentCapability.get("127.0.0.1", agent.port)
+
+        self.assertIn(AgentCapability.UPLOAD_FILE_STREAM, capabilities)
+
+    def test_auto_codec_measures_streamed_upload(self):
+        agent = self._agent(200)
+        agent.capabilities = [AgentCapability.UPLOAD_FOLDER_STREAM]
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        with open(os.path.join(folder, "data.bin"), "wb") as f:
+            f.write(os.urandom(512 * 1024))
+        self.addCleanup(Codec.clear)
+
+        with mock.patch.object(setting, "ZIP_CODEC_MIN_SAMPLE", 1024):
+            before = Endpoint_Action._resolve_codec("127.0.0.1", agent.port, "auto")
+            Endpoint_Action.send_folder_to_agent(
+                "127.0.0.1", folder, "C:/folder", agent.port, codec="auto"
+            )
+            after = Endpoint_Action._resolve_codec("127.0.0.1", agent.port, "auto")
+
+        self.assertEqual(agent.requests[-1], "/upload_folder_stream/")
+        # 尚未量測時使用預設值，量測到 loopback 的速度後改為不壓縮
+        self.assertEqual(before, Codec.normalize(setting.ZIP_CODEC_AUTO_DEFAULT))
+        self.assertEqual(after, Codec.STORE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,213 @@
+# -*- coding:utf-8 -*-
+import os
+import re
+import hashlib
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from bond_controller_action.controller.action.common import download
+
+ResumableDownload = download.ResumableDownload
+
+CONTENT = bytes(range(256)) * 64
+# 中斷時未讀滿的 chunk 不會寫入 .part 檔
+CHUNK_SIZE = 1024
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        content = server.content
+
+        start = 0
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if_range = self.headers.get("If-Range")
+        if match and (if_range is None or if_range == server.etag):
+            start = int(match.group(1))
+            if start >= len(content):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(content)}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header(
+                "Content-Range", f"bytes {start}-{len(content) - 1}/{len(content)}"
+            )
+        else:
+            self.send_response(200)
+
+        body = content[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", server.etag)
+        self.send_header("X-Checksum-Sha256", server.checksum)
+        self.end_headers()
+
+        if server.truncate:
+            # 只送出一半後中斷連線
+            server.truncate -= 1
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+        else:
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestResumableDownload(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        for name, value in {
+            "DOWNLOAD_PATH": self.folder.name,
+            "DOWNLOAD_RETRY_BACKOFF": 0,
+        }.items():
+            patcher = mock.patch.object(download.setting, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.requests = []
+        self.server.content = CONTENT
+        self.server.etag = '"v1"'
+        self.server.checksum = hashlib.sha256(CONTENT).hexdigest()
+        self.server.truncate = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/file"
+        self.part_path = ResumableDownload.part_path(self.url)
+
+    def _read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _interrupt(self):
+        # 第一次下載中斷且不重試，留下一半的 .part 檔
+        self.server.truncate = 1
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            ResumableDownload.download(self.url, CHUNK_SIZE, retries=0)
+        self.server.requests.clear()
+
+    def test_sidecar_of_interrupted_download(self):
+        self._interrupt()
+
+        meta = download.Json.load_json(self.part_path + ".json")
+        self.assertEqual(meta["url"], self.url)
+        self.assertEqual(meta["etag"], '"v1"')
+        self.assertEqual(meta["total"], len(CONTENT))
+        self.assertEqual(meta["sha256"], self.server.checksum)
+        self.assertEqual(self._read(self.part_path), CONTENT[: len(CONTENT) // 2])
+        self.assertFalse(os.path.exists(self.part_path + ".lock"))
+
+    def test_resume_with_range(self):
+        self.server.truncate = 1
+
+        part_path, meta = ResumableDownload.download(self.url, CHUNK_SIZE)
+
+        self.assertEqual(part_path, self.part_path)
+        self.assertEqual(self._read(part_path), CONTENT)
+        self.assertEqual(meta["total"], len(CONTENT))
+        self.assertNotIn("Range", self.server.requests[0])
+        self.assertEqual(
+            self.server.requests[1]["Range"], f"bytes={len(CONTENT) // 2}-"
+        )
+        self.assertEqual(self.server.requests[1]["If-Range"], '"v1"')
+        self.assertFalse(os.path.exists(part_path + ".json"))
+
+    def test_resume_after_restart(self):
+        self._interrupt()
+
+        part_path, _ = ResumableDownload.download(self.url, CHUNK_SIZE)
+
+        self.assertEqual(self._read(part_path), CONTENT)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(
+            self.server.requests[0]["Range"], f"bytes={len(CONTENT) // 2}-"
+        )
+
+    def test_restart_on_etag_change(self):
+        self._interrupt()
+        self.server.content = CONTENT[::-1]
+        self.server.etag = '"v2"'
+        self.server.checksum = hashlib.sha256(CONTENT[::-1]).hexdigest()
+
+        part_path, meta = ResumableDownload.download(self.url, CHUNK_SIZE)
+
+        self.assertEqual(self.server.requests[0]["If-Range"], '"v1"')
+        self.assertEqual(self._read(part_path), CONTENT[::-1])
+        self.assertEqual(meta["etag"], '"v2"')
+
+    def test_416_with_complete_part(self):
+        ResumableDownload.download(self.url, CHUNK_SIZE)
+        # 模擬搬移前中斷：.part 檔已完整，meta 仍在
+        download.Json.dump_json(
+            self.part_path + ".json",
+            {
+                "url": self.url,
+                "etag": '"v1"',
+                "total": len(CONTENT),
+                "sha256": self.server.checksum,
+            },
+        )
+        self.server.requests.clear()
+
+        part_path, _ = ResumableDownload.download(self.url, CHUNK_SIZE)
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self._read(part_path), CONTENT)
+
+    def test_416_with_stale_part_restarts(self):
+        self._interrupt()
+        # 伺服器上的檔案變小，且 ETag 未變
+        self.server.content = CONTENT[:100]
+        self.server.checksum = hashlib.sha256(CONTENT[:100]).hexdigest()
+
+        part_path, _ = ResumableDownload.download(self.url, CHUNK_SIZE)
+
+        self.assertIn("Range", self.server.requests[0])
+        self.assertNotIn("Range", self.server.requests[1])
+        self.assertEqual(self._read(part_path), CONTENT[:100])
+
+    def test_checksum_mismatch_removes_part(self):
+        self.server.checksum = "0" * 64
+
+        with self.assertRaisesRegex(ValueError, "Checksum mismatch"):
+            ResumableDownload.download(self.url, CHUNK_SIZE)
+
+        self.assertEqual(os.listdir(self.folder.name), [])
+
+    def test_concurrent_download_uses_own_part(self):
+        lock = ResumableDownload._lock(self.part_path)
+        self.addCleanup(ResumableDownload._unlock, lock)
+
+        part_path, _ = ResumableDownload.download(self.url, CHUNK_SIZE)
+
+        self.assertNotEqual(part_path, self.part_path)
+        self.assertEqual(self._read(part_path), CONTENT)
+        self.assertFalse(os.path.exists(self.part_path))
+
+    def test_concurrent_download_failure_removes_own_part(self):
+        lock = ResumableDownload._lock(self.part_path)
+        self.addCleanup(ResumableDownload._unlock, lock)
+        self.server.truncate = 1
+
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            ResumableDownload.download(self.url, CHUNK_SIZE, retries=0)
+
+        self.assertEqual(
+            sorted(os.listdir(self.folder.name)),
+            [os.path.basename(self.part_path) + ".lock"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
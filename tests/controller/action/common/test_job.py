@@ -0,0 +1,232 @@
+# -*- coding:utf-8 -*-
+import sys
+import json
+import time
+import threading
+import unittest
+from unittest import mock
+from concurrent.futures import wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bond_controller_action.controller.action import Endpoint_Action as endpoint_action
+
+# 使用 Endpoint_Action 實際使用的模組
+Endpoint_Action = endpoint_action.Endpoint_Action
+AgentCapability = endpoint_action.AgentCapability
+JobPoller = endpoint_action.JobPoller
+job_module = sys.modules[JobPoller.__module__]
+JobError = job_module.JobError
+
+
+class _AgentHandler(BaseHTTPRequestHandler):
+    def _reply(self, status, body, content_type="application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        agent = self.server.agent
+        if self.path == "/capabilities/" and agent.jobs_supported:
+            self._reply(200, {"capabilities": ["execute_job"]})
+        else:
+            self._reply(404, b"not found", "text/plain")
+
+    def do_POST(self):
+        agent = self.server.agent
+        data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        agent.requests.append(self.path)
+
+        if self.path == "/execute_job/":
+            job_id = f"job-{len(agent.jobs)}"
+            agent.jobs[job_id] = data["to_be_executed"]
+            self._reply(200, {"job_id": job_id})
+        elif self.path == "/job_status/":
+            agent.batches.append(len(data["job_ids"]))
+            self._reply(
+                200,
+                {
+                    "jobs": {
+                        job_id: agent.status(agent.jobs[job_id])
+                        for job_id in data["job_ids"]
+                        if job_id in agent.jobs and agent.jobs[job_id] != "lost"
+                    }
+                },
+            )
+        elif self.path == "/execute_file/":
+            time.sleep(0.05)
+            self._reply(
+                200, f"executed {data['to_be_executed']}".encode(), "text/plain"
+            )
+        else:
+            self._reply(404, b"not found", "text/plain")
+
+    def log_message(self, *args):
+        pass
+
+
+class _Agent:
+    def __init__(self, jobs_supported=True):
+        self.jobs_supported = jobs_supported
+        self.jobs = {}
+        self.requests = []
+        self.batches = []
+        self.release = threading.Event()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _AgentHandler)
+        self.server.agent = self
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def status(self, target):
+        if target == "fail":
+            return {"status": "failed", "result": "exit code 1"}
+        if not self.release.is_set():
+            return {"status": "running", "result": None}
+        return {"status": "done", "result": f"executed {target}"}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestJob(unittest.TestCase):
+    def setUp(self):
+        patches = {
+            "JOB_POLL_INTERVAL": 0.01,
+            "JOB_POLL_MAX_INTERVAL": 0.05,
+            "JOB_POLL_MAX_ERRORS": 2,
+        }
+        for name, value in patches.items():
+            patcher = mock.patch.object(job_module.setting, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(JobPoller.stop)
+        self.addCleanup(AgentCapability.clear)
+
+    def _agent(self, **kwargs):
+        agent = _Agent(**kwargs)
+        self.addCleanup(agent.close)
+        return agent
+
+    def test_submit_returns_before_job_finishes(self):
+        agent = self._agent()
+
+        jobs = [
+            Endpoint_Action.submit_execute_file(
+                "127.0.0.1", f"/tmp/{i}", port=agent.port
+            )
+            for i in range(50)
+        ]
+        time.sleep(0.2)
+
+        self.assertFalse(any(job.done() for job in jobs))
+
+        agent.release.set()
+        done, not_done = wait(jobs, timeout=5)
+
+        self.assertEqual(not_done, set())
+        self.assertEqual(jobs[3].result(), "executed /tmp/3")
+        # 同一台 agent 的 job 合併查詢
+        self.assertGreater(max(agent.batches), 1)
+        self.assertLess(len(agent.batches), sum(job.polls for job in jobs))
+
+    def test_backoff(self):
+        agent = self._agent()
+
+        job = Endpoint_Action.submit_execute_python_folder(
+            "127.0.0.1", "/tmp/folder", port=agent.port
+        )
+        time.sleep(0.5)
+
+        # 間隔由 0.01 增加到上限 0.05，0.5 秒內約查詢 12 次而非 50 次
+        self.assertLess(job.polls, 20)
+        self.assertEqual(job._interval, 0.05)
+        agent.release.set()
+        self.assertEqual(job.result(timeout=5), "executed /tmp/folder")
+
+    def test_failed_and_lost_jobs(self):
+        agent = self._agent()
+
+        failed = Endpoint_Action.submit_execute_file(
+            "127.0.0.1", "fail", port=agent.port
+        )
+        lost = Endpoint_Action.submit_execute_file("127.0.0.1", "lost", port=agent.port)
+
+        with self.assertRaisesRegex(JobError, "exit code 1"):
+            failed.result(timeout=5)
+        with self.assertRaisesRegex(JobError, "not found"):
+            lost.result(timeout=5)
+
+    def test_unreachable_agent(self):
+        agent = self._agent()
+
+        job = Endpoint_Action.submit_execute_file(
+            "127.0.0.1", "/tmp/a", port=agent.port
+        )
+        agent.close()
+
+        with self.assertRaisesRegex(JobError, "Cannot get status"):
+            job.result(timeout=5)
+
+    def test_fallback_for_old_agent(self):
+        agent = self._agent(jobs_supported=False)
+
+        job = Endpoint_Action.submit_execute_file(
+            "127.0.0.1", "/tmp/a", port=agent.port
+        )
+
+        # stub 的 /execute_file/ 需要 0.05 秒，submit 不等待執行結果
+        self.assertFalse(job.done())
+        self.assertEqual(job.result(timeout=5), "executed /tmp/a")
+        self.assertNotIn("/execute_job/", agent.requests)
+
+    def test_stop_fails_unfinished_jobs(self):
+        agent = self._agent()
+
+        jobs = [
+            Endpoint_Action.submit_execute_file(
+                "127.0.0.1", f"/tmp/{i}", port=agent.port
+            )
+            for i in range(20)
+        ]
+        time.sleep(0.1)
+        JobPoller.stop()
+
+        for job in jobs:
+            with self.assertRaisesRegex(JobError, "Poller stopped"):
+                job.result(timeout=1)
+        self.assertEqual(JobPoller.pending(), 0)
+
+    def test_submit_while_stopping(self):
+        agent = self._agent()
+        Endpoint_Action.submit_execute_file("127.0.0.1", "/tmp/a", port=agent.port)
+        join = threading.Thread.join
+        pollers, jobs = [], []
+
+        def submit_then_join(thread, timeout=None):
+            if thread.name == "bond-job-poller" and not pollers:
+                # stop 已釋放 lock 但尚未 join 舊執行緒時送出新的 job，
+                # 持有 condition 讓舊執行緒在新的 poller 啟動後才醒來
+                pollers.append(thread)
+                with JobPoller._condition:
+                    jobs.append(
+                        Endpoint_Action.submit_execute_file(
+                            "127.0.0.1", "/tmp/b", port=agent.port
+                        )
+                    )
+                timeout = 5
+            join(thread, timeout)
+
+        with mock.patch.object(threading.Thread, "join", submit_then_join):
+            JobPoller.stop()
+
+        self.assertFalse(pollers[0].is_alive())
+        self.assertIsNot(JobPoller._thread, pollers[0])
+        agent.release.set()
+        self.assertEqual(jobs[0].result(timeout=5), "executed /tmp/b")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+# -*- coding:utf-8 -*-
+import unittest
+from unittest import mock
+
+from bond_controller_action.controller.action.common import session_pool
+from bond_controller_action.controller.action.common.session_pool import SessionPool
+
+
+class TestSessionPool(unittest.TestCase):
+    def tearDown(self):
+        SessionPool.close()
+
+    def test_reuse_session_per_host(self):
+        first = SessionPool.get_session("http://10.0.0.1:8086/bond_info/")
+        second = SessionPool.get_session("http://10.0.0.1:8086/upload_file/")
+        other = SessionPool.get_session("http://10.0.0.2:8086/bond_info/")
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertEqual(SessionPool.size(), 2)
+
+    def test_close_single_host(self):
+        SessionPool.get_session("http://10.0.0.1:8086/")
+        SessionPool.get_session("http://10.0.0.2:8086/")
+
+        SessionPool.close("http://10.0.0.1:8086/bond_info/")
+
+        self.assertEqual(SessionPool.size(), 1)
+
+    def test_evict_idle_session(self):
+        with mock.patch.object(session_pool.setting, "SESSION_IDLE_TIMEOUT", 10):
+            SessionPool.get_session("http://10.0.0.1:8086/")
+            SessionPool._last_used["http://10.0.0.1:8086"] -= 60
+
+            SessionPool.evict_idle()
+
+        self.assertEqual(SessionPool.size(), 0)
+
+    def test_keep_alive_disabled(self):
+        with mock.patch.object(session_pool.setting, "SESSION_KEEP_ALIVE", False):
+            session = SessionPool.get_session("http://10.0.0.3:8086/")
+
+        self.assertEqual(session.headers["Connection"], "close")
+
+
+if __name__ == "__main__":
+    unittest.main()
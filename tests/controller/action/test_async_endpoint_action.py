@@ -0,0 +1,158 @@
+# -*- coding:utf-8 -*-
+import io
+import os
+import sys
+import json
+import base64
+import asyncio
+import zipfile
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from bond_controller_action.controller.action import (
+    AsyncEndpoint_Action as async_endpoint_action,
+)
+
+# 使用 AsyncEndpoint_Action 實際使用的模組
+AsyncEndpoint_Action = async_endpoint_action.AsyncEndpoint_Action
+AsyncResponseMethod = async_endpoint_action.AsyncResponseMethod
+async_response = sys.modules[AsyncResponseMethod.__module__]
+setting = async_endpoint_action.setting
+
+
+class _AgentHandler(BaseHTTPRequestHandler):
+    def _reply(self, status, body, headers=()):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/bond_info/":
+            self._reply(200, b"bond agent")
+        elif path == "/get_physical_file":
+            self._reply(
+                200,
+                {
+                    "filename": "a.txt",
+                    "file_base64": base64.b64encode(b"file data").decode(),
+                },
+            )
+        elif path == "/get_physical_folder_zip":
+            self._reply(
+                200,
+                b"zip data" * 1000,
+                [("Content-Disposition", 'attachment; filename="folder.zip"')],
+            )
+        else:
+            self._reply(404, b"not found")
+
+    def do_POST(self):
+        data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.posts[self.path] = data
+        if self.path == "/execute_file/":
+            self._reply(500, b"execute failed")
+        else:
+            self._reply(200, b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp is not installed")
+class TestAsyncEndpointAction(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _AgentHandler)
+        self.server.posts = {}
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        patcher = mock.patch.object(setting, "DOWNLOAD_PATH", self.folder.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await AsyncEndpoint_Action.close()
+
+    async def test_bond_info(self):
+        text = await AsyncEndpoint_Action.bond_info("127.0.0.1", self.port)
+
+        self.assertEqual(text, "bond agent")
+
+    async def test_send_file_and_folder(self):
+        source = os.path.join(self.folder.name, "source")
+        os.makedirs(source)
+        with open(os.path.join(source, "a.txt"), "wb") as f:
+            f.write(b"hello")
+
+        await AsyncEndpoint_Action.send_file_to_agent(
+            "127.0.0.1", os.path.join(source, "a.txt"), "C:/a.txt", self.port
+        )
+        await AsyncEndpoint_Action.send_folder_to_agent(
+            "127.0.0.1", source, "C:/source", self.port
+        )
+
+        posts = self.server.posts
+        self.assertEqual(
+            base64.b64decode(posts["/upload_file/"]["file_content"]), b"hello"
+        )
+        zip_data = base64.b64decode(posts["/upload_folder/"]["folder_content"])
+        with zipfile.ZipFile(io.BytesIO(zip_data)) as zf:
+            self.assertEqual(zf.read("a.txt"), b"hello")
+
+    async def test_get_physical_file_and_folder(self):
+        await AsyncEndpoint_Action.get_physical_file(
+            "127.0.0.1", "C:/a.txt", "host", self.port
+        )
+        await AsyncEndpoint_Action.get_physical_folder_zip(
+            "127.0.0.1", "C:/folder", self.port
+        )
+
+        with open(os.path.join(self.folder.name, "host_a.txt"), "rb") as f:
+            self.assertEqual(f.read(), b"file data")
+        with open(os.path.join(self.folder.name, "folder.zip"), "rb") as f:
+            self.assertEqual(f.read(), b"zip data" * 1000)
+
+    async def test_text_logs_http_error(self):
+        with mock.patch.object(async_response.Logger, "error") as error:
+            text = await AsyncEndpoint_Action.execute_file(
+                "127.0.0.1", "C:/a.exe", port=self.port
+            )
+
+        self.assertEqual(text, "execute failed")
+        self.assertIn("500", error.call_args[0][0])
+
+    async def test_get_response_error_releases_connection(self):
+        url = f"http://127.0.0.1:{self.port}/missing"
+
+        with mock.patch.object(setting, "ASYNC_CONNECTION_LIMIT_PER_HOST", 1):
+            for _ in range(3):
+                with self.assertRaises(aiohttp.ClientResponseError):
+                    # 連線未歸還時，第二次請求會一直等待唯一的連線
+                    await asyncio.wait_for(AsyncResponseMethod.get_response(url), 5)
+
+            text = await asyncio.wait_for(
+                AsyncEndpoint_Action.bond_info("127.0.0.1", self.port), 5
+            )
+
+        self.assertEqual(text, "bond agent")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# -*- coding:utf-8 -*-
+import time
+import unittest
+
+from bond_controller_action.controller.action.Fleet_Action import Fleet_Action
+
+
+def echo(dest, delay=0.0):
+    time.sleep(delay)
+    if dest == "broken":
+        raise RuntimeError("agent unreachable")
+    return dest.upper()
+
+
+class TestFleetAction(unittest.TestCase):
+    def test_collect_results_and_errors(self):
+        results = Fleet_Action.execute_all(["a", "b", "broken"], echo, max_workers=2)
+
+        self.assertEqual(results["a"]["result"], "A")
+        self.assertEqual(results["b"]["result"], "B")
+        self.assertIsInstance(results["broken"]["error"], RuntimeError)
+
+    def test_host_timeout(self):
+        results = Fleet_Action.execute_all(
+            ["fast", "slow"],
+            lambda dest: echo(dest, 1 if dest == "slow" else 0),
+            max_workers=2,
+            host_timeout=0.2,
+        )
+
+        self.assertEqual(results["fast"]["result"], "FAST")
+        self.assertIsInstance(results["slow"]["error"], TimeoutError)
+
+    def test_early_exit_cancels_pending_hosts(self):
+        called = []
+
+        def record(dest):
+            called.append(dest)
+            return echo(dest, 0.1)
+
+        results = Fleet_Action.execute(list("abcdef"), record, max_workers=1)
+        next(results)
+        results.close()
+        time.sleep(0.3)
+
+        # 已開始的主機會執行完，其餘主機被取消
+        self.assertLessEqual(len(called), 2)
+
+    def test_unknown_operation(self):
+        with self.assertRaises(ValueError):
+            list(Fleet_Action.execute(["a"], "not_an_operation"))
+
+
+if __name__ == "__main__":
+    unittest.main()
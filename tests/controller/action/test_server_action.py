@@ -0,0 +1,234 @@
+# -*- coding:utf-8 -*-
+import io
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import subprocess
+import unittest
+from unittest import mock
+
+from bond_controller_action.controller.action import Server_Action as server_action
+from bond_controller_action.controller.action.Server_Action import (
+    Server_Action,
+    _OutputStream,
+)
+
+
+def fake_run_command(dest, key, command, username, on_output, timeout):
+    if dest == "down":
+        raise ConnectionError("no route to host")
+    exit_code = 1 if command == "false" else 0
+    on_output(dest, "out", command)
+
+    return {"command": command, "exit_code": exit_code, "out": command, "err": ""}
+
+
+class _LocalSSH:
+    """
+    在本機執行指令的 SSHClient / SFTPClient 替身，用於測試遠端 delta 流程。
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    def exec_command(self, command):
+        self.commands.append(command)
+        done = subprocess.run(command, shell=True, capture_output=True)
+        out = io.BytesIO(done.stdout)
+        out.channel = mock.Mock(**{"recv_exit_status.return_value": done.returncode})
+
+        return None, out, io.BytesIO(done.stderr)
+
+    def get_transport(self):
+        return None
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def putfo(self, file_obj, path):
+        with open(path, "wb") as f:
+            f.write(file_obj.read())
+
+
+class TestServerAction(unittest.TestCase):
+    def test_output_stream_lines(self):
+        lines = []
+        stream = _OutputStream("a", "out", lambda *args: lines.append(args))
+
+        stream.feed(b"first\nsec")
+        stream.feed("ond\n中".encode("utf-8")[:-1])
+        stream.feed("中".encode("utf-8")[-1:] + b"tail", final=True)
+
+        self.assertEqual(stream.text(), "first\nsecond\n中tail")
+        self.assertEqual(
+            lines,
+            [("a", "out", "first"), ("a", "out", "second"), ("a", "out", "中tail")],
+        )
+
+    @mock.patch.object(Server_Action, "run_command", side_effect=fake_run_command)
+    def test_execute_on_hosts(self, _):
+        output = []
+        results = {
+            item["host"]: item
+            for item in Server_Action.execute_on_hosts(
+                ["a", "b", "down"],
+                "id_rsa",
+                ["true", "false", "echo skipped"],
+                on_output=lambda *args: output.append(args),
+            )
+        }
+
+        self.assertEqual([item["exit_code"] for item in results["a"]["result"]], [0, 1])
+        self.assertIsNone(results["b"]["error"])
+        self.assertIsInstance(results["down"]["error"], ConnectionError)
+        self.assertIn(("b", "out", "false"), output)
+
+    def _deploy_with_checksum(self, remote_output, **kwargs):
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(b"binary")
+        self.addCleanup(os.remove, f.name)
+
+        ssh = mock.MagicMock()
+        ssh.exec_command.side_effect = lambda command: (
+            None,
+            io.BytesIO(remote_output if "sha256sum" in command else b""),
+            io.BytesIO(),
+        )
+        connection = mock.MagicMock()
+        connection.__enter__.return_value = ssh
+
+        with mock.patch.object(
+            server_action.SSHPool, "connection", return_value=connection
+        ), mock.patch.object(
+            server_action.SFTPTransfer, "open_sftp"
+        ), mock.patch.object(
+            server_action.SFTPTransfer, "upload", return_value={"bytes": 6}
+        ) as upload:
+            result = Server_Action.only_update_binary_on_remote_server(
+                "10.0.0.1", f.name, "/opt/agent", "id_rsa", **kwargs
+            )
+
+        commands = [c[0][0] for c in ssh.exec_command.call_args_list]
+
+        return result, upload, commands
+
+    def test_skip_unchanged_binary(self):
+        digest = hashlib.sha256(b"binary").hexdigest()
+
+        result, upload, commands = self._deploy_with_checksum(
+            f"{digest}  /opt/agent\n".encode(), skip_unchanged=True
+        )
+
+        self.assertTrue(result["skipped"])
+        upload.assert_not_called()
+        self.assertIn("sha256sum", commands[0])
+
+    def test_changed_binary_is_uploaded(self):
+        digest = hashlib.sha256(b"old binary").hexdigest()
+
+        result, upload, commands = self._deploy_with_checksum(
+            f"{digest}  /opt/agent\n".encode(), skip_unchanged=True
+        )
+
+        self.assertFalse(result["skipped"])
+        upload.assert_called_once()
+        self.assertTrue(commands[-1].startswith("mv "))
+
+    def test_missing_remote_sha256sum_uploads(self):
+        # 遠端沒有 sha256sum / shasum 時沒有輸出 (錯誤訊息在 stderr)
+        result, upload, _ = self._deploy_with_checksum(b"", skip_unchanged=True)
+
+        self.assertFalse(result["skipped"])
+        upload.assert_called_once()
+
+    def test_skip_unchanged_is_opt_in(self):
+        digest = hashlib.sha256(b"binary").hexdigest()
+
+        result, upload, commands = self._deploy_with_checksum(
+            f"{digest}  /opt/agent\n".encode()
+        )
+
+        self.assertFalse(result["skipped"])
+        upload.assert_called_once()
+        self.assertFalse(any("sha256sum" in command for command in commands))
+
+    def test_delta_is_opt_in(self):
+        with mock.patch.object(server_action.setting, "DELTA_MIN_SIZE", 0):
+            result, upload, commands = self._deploy_with_checksum(b"")
+
+        self.assertEqual(result["upload"]["mode"], "full")
+        upload.assert_called_once()
+        # 預設不建立遠端暫存目錄，也不上傳 delta helper
+        self.assertEqual(len(commands), 1)
+        self.assertTrue(commands[0].startswith("mv "))
+
+    def _deploy_with_delta(self, make_delta=None):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        old = os.urandom(200_000)
+        new = old[:1000] + b"patched" + old[1000:]
+        target = os.path.join(folder, "agent")
+        local = os.path.join(folder, "agent.new")
+        for path, content in ((target, old), (local, new)):
+            with open(path, "wb") as f:
+                f.write(content)
+
+        ssh = _LocalSSH()
+        connection = mock.MagicMock()
+        connection.__enter__.return_value = ssh
+        sftp = mock.MagicMock()
+        sftp.__enter__.return_value = ssh
+
+        def full_upload(sftp, filepath, remote, parallel):
+            shutil.copyfile(filepath, remote)
+            return {"bytes": os.path.getsize(filepath)}
+
+        settings = {"DELTA_MIN_SIZE": 0, "DELTA_REMOTE_PYTHON": sys.executable}
+        with mock.patch.multiple(server_action.setting, **settings), mock.patch.object(
+            server_action.SSHPool, "connection", return_value=connection
+        ), mock.patch.object(
+            server_action.SFTPTransfer, "open_sftp", return_value=sftp
+        ), mock.patch.object(
+            server_action.SFTPTransfer, "upload", side_effect=full_upload
+        ) as upload, mock.patch.object(
+            server_action.Delta,
+            "make_delta",
+            side_effect=make_delta or server_action.Delta.make_delta,
+        ):
+            result = Server_Action.only_update_binary_on_remote_server(
+                "10.0.0.1", local, target, "id_rsa", skip_unchanged=False, delta=True
+            )
+
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), new)
+        work_dirs = [c.split()[-1] for c in ssh.commands if c.startswith("rm -rf")]
+        self.assertEqual(len(work_dirs), 1)
+        self.assertFalse(os.path.exists(work_dirs[0]))
+        self.assertFalse(any("bond_delta" in command for command in ssh.commands))
+
+        return result, upload
+
+    def test_delta_upload(self):
+        result, upload = self._deploy_with_delta()
+
+        self.assertEqual(result["upload"]["mode"], "delta")
+        self.assertLess(result["upload"]["bytes"], 10_000)
+        upload.assert_not_called()
+
+    def test_corrupt_delta_falls_back_to_full_upload(self):
+        corrupt = server_action.Delta.make_delta
+
+        def make_delta(*args, **kwargs):
+            delta, stats = corrupt(*args, **kwargs)
+            return delta[:-20] + b"garbage", stats
+
+        result, upload = self._deploy_with_delta(make_delta)
+
+        self.assertEqual(result["upload"]["mode"], "full")
+        upload.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
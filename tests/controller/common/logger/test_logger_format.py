@@ -2,9 +2,11 @@
 import logging
 import unittest
 from io import StringIO
+from unittest import mock
 from termcolor import colored
 
 from bond_controller_action.controller.action_config import setting
+from bond_controller_action.controller.common.logger import logger_format
 
 
 class ColoredFormatter(logging.Formatter):
@@ -64,5 +66,64 @@ class TestColoredFormatter(unittest.TestCase):
         logging.getLogger(self.logger_name).handlers = []
 
 
+class TtyStringIO(StringIO):
+    def isatty(self):
+        return True
+
+
+class TestCachedColoredFormatter(unittest.TestCase):
+    def make_record(self, msg, level=logging.INFO, created=1700000000.5):
+        record = logging.LogRecord("bond", level, __file__, 1, msg, None, None)
+        record.created = created
+        return record
+
+    def formatter(self, stream):
+        return logger_format.ColoredFormatter(
+            datefmt="%Y-%m-%d %H:%M:%S", use_colors=True, stream=stream
+        )
+
+    @mock.patch.dict("os.environ", {"NO_COLOR": "", "FORCE_COLOR": ""})
+    def test_matches_termcolor_output(self):
+        formatter = self.formatter(TtyStringIO())
+        record = self.make_record("hello")
+        output = formatter.format(record)
+
+        bold = ["bold"]
+        self.assertEqual(
+            output,
+            "{} {} {} {} {} {} {}".format(
+                colored(record.asctime, "blue", attrs=bold, force_color=True),
+                colored("|", "white", attrs=bold, force_color=True),
+                colored("BOND", "magenta", attrs=bold, force_color=True),
+                colored("|", "white", attrs=bold, force_color=True),
+                colored(
+                    "INFO", setting.LOG_COLOR["INFO"], attrs=bold, force_color=True
+                ),
+                colored("|", "white", attrs=bold, force_color=True),
+                colored("hello", "white", attrs=bold, force_color=True),
+            ),
+        )
+
+    @mock.patch.dict("os.environ", {"NO_COLOR": "", "FORCE_COLOR": ""})
+    def test_no_ansi_when_not_tty(self):
+        output = self.formatter(StringIO()).format(self.make_record("hello"))
+
+        self.assertNotIn("\033[", output)
+        self.assertTrue(output.endswith("| BOND | INFO | hello"))
+
+    def test_cache_prefix_and_timestamp(self):
+        formatter = self.formatter(StringIO())
+
+        with mock.patch.object(
+            formatter, "formatTime", wraps=formatter.formatTime
+        ) as format_time:
+            formatter.format(self.make_record("a", created=1700000000.1))
+            formatter.format(self.make_record("b", created=1700000000.9))
+            formatter.format(self.make_record("c", created=1700000001.0))
+
+        self.assertEqual(format_time.call_count, 2)
+        self.assertEqual(list(formatter._prefixes), [("bond", "INFO")])
+
+
 if __name__ == "__main__":
     unittest.main()
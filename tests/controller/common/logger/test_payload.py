@@ -0,0 +1,52 @@
+# -*- coding:utf-8 -*-
+import hashlib
+import unittest
+from unittest import mock
+
+from bond_controller_action.controller.common.logger import payload
+from bond_controller_action.controller.common.logger.payload import PayloadLog
+
+
+class TestPayloadLog(unittest.TestCase):
+    def setUp(self):
+        self.body = b"x" * 5000
+
+    def test_truncate(self):
+        message = PayloadLog.describe(self.body, mode="truncate", max_bytes=10)
+
+        self.assertEqual(message, "b'xxxxxxxxxx'... (5000 bytes total)")
+        self.assertEqual(
+            PayloadLog.describe("short", mode="truncate", max_bytes=10), "short"
+        )
+
+    def test_summary(self):
+        message = PayloadLog.describe(
+            self.body, content_type="application/json", mode="summary"
+        )
+
+        self.assertIn("5000 bytes", message)
+        self.assertIn(hashlib.sha256(self.body).hexdigest(), message)
+        self.assertIn("application/json", message)
+
+        headers = {"Content-Type": "text/plain", "Content-Length": "12"}
+        self.assertEqual(
+            PayloadLog.describe(headers, mode="summary"),
+            "<headers: 2 fields, content-type=text/plain, content-length=12>",
+        )
+
+    def test_off_and_disabled_level_build_nothing(self):
+        with mock.patch.object(PayloadLog, "describe") as describe, mock.patch.object(
+            payload.Logger, "is_enabled", return_value=False
+        ):
+            PayloadLog.log(self.body, mode="truncate")
+            PayloadLog.log(self.body, mode="off")
+
+        describe.assert_not_called()
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            PayloadLog.describe(self.body, mode="everything")
+
+
+if __name__ == "__main__":
+    unittest.main()
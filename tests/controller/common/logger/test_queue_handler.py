@@ -0,0 +1,70 @@
+# -*- coding:utf-8 -*-
+import queue
+import logging
+import unittest
+import logging.handlers
+
+from bond_controller_action.controller.common.logger.queue_handler import (
+    BoundedQueueHandler,
+    BoundedQueueListener,
+)
+
+
+class TestBoundedQueueHandler(unittest.TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger(f"test_queue_logger_{id(self)}")
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+
+    def tearDown(self):
+        self.logger.handlers = []
+
+    def messages(self, log_queue):
+        return [record.getMessage() for record in list(log_queue.queue)]
+
+    def test_drop_new(self):
+        log_queue = queue.Queue(maxsize=2)
+        handler = BoundedQueueHandler(log_queue, overflow="drop_new")
+        self.logger.addHandler(handler)
+
+        for index in range(5):
+            self.logger.info("record %d", index)
+
+        self.assertEqual(self.messages(log_queue), ["record 0", "record 1"])
+        self.assertEqual(handler.pop_dropped(), 3)
+        self.assertEqual(handler.dropped, 0)
+
+    def test_drop_oldest(self):
+        log_queue = queue.Queue(maxsize=2)
+        handler = BoundedQueueHandler(log_queue, overflow="drop_oldest")
+        self.logger.addHandler(handler)
+
+        for index in range(5):
+            self.logger.info("record %d", index)
+
+        self.assertEqual(self.messages(log_queue), ["record 3", "record 4"])
+        self.assertEqual(handler.dropped, 3)
+
+    def test_unknown_overflow(self):
+        with self.assertRaises(ValueError):
+            BoundedQueueHandler(queue.Queue(), overflow="explode")
+
+    def test_listener_writes_all_records_on_stop(self):
+        log_queue = queue.Queue(maxsize=10)
+        target = logging.handlers.BufferingHandler(1000)
+        listener = BoundedQueueListener(log_queue, target)
+        self.logger.addHandler(BoundedQueueHandler(log_queue))
+
+        listener.start()
+        for index in range(100):
+            self.logger.info("record %d", index)
+        listener.stop()
+
+        self.assertEqual(
+            [record.getMessage() for record in target.buffer],
+            [f"record {index}" for index in range(100)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
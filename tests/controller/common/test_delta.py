@@ -0,0 +1,110 @@
+# -*- coding:utf-8 -*-
+import os
+import random
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+from bond_controller_action.controller.common import delta_remote
+from bond_controller_action.controller.common.delta import Delta
+
+
+class TestDelta(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.old = os.urandom(300_000)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def path(self, name, content=None):
+        path = os.path.join(self.folder, name)
+        if content is not None:
+            with open(path, "wb") as f:
+                f.write(content)
+        return path
+
+    def roundtrip(self, new, block_size=2048):
+        old_path = self.path("old.bin", self.old)
+        new_path = self.path("new.bin", new)
+
+        signature = delta_remote.signature(old_path, block_size)
+        delta, stats = Delta.make_delta(new_path, signature)
+        self.assertIsNotNone(delta)
+
+        delta_remote.patch(
+            old_path,
+            self.path("update.delta", delta),
+            self.path("rebuilt.bin"),
+            hashlib.sha256(new).hexdigest(),
+        )
+        with open(self.path("rebuilt.bin"), "rb") as f:
+            self.assertEqual(f.read(), new)
+
+        return len(delta), stats
+
+    def test_small_changes(self):
+        random.seed(0)
+        new = bytearray(self.old)
+        new[100:100] = b"inserted"
+        del new[50_000:50_100]
+        for _ in range(3):
+            offset = random.randrange(len(new) - 10)
+            new[offset : offset + 10] = os.urandom(10)
+
+        size, stats = self.roundtrip(bytes(new))
+
+        self.assertLess(size, len(new) // 10)
+        self.assertEqual(stats["size"], len(new))
+
+    def test_unchanged_and_empty(self):
+        size, stats = self.roundtrip(self.old)
+        self.assertEqual(stats["literal"], 300_000 % 2048)
+
+        self.old = b""
+        self.roundtrip(b"")
+
+    def test_give_up_when_too_different(self):
+        signature = delta_remote.signature(self.path("old.bin", self.old), 2048)
+
+        delta, stats = Delta.make_delta(
+            self.path("new.bin", os.urandom(300_000)), signature
+        )
+
+        self.assertIsNone(delta)
+        self.assertIsNone(stats)
+
+    def test_patch_verifies_checksum(self):
+        old_path = self.path("old.bin", self.old)
+        delta, _ = Delta.make_delta(old_path, delta_remote.signature(old_path, 4096))
+
+        with self.assertRaises(ValueError):
+            delta_remote.patch(
+                old_path, self.path("update.delta", delta), self.path("out"), "0" * 64
+            )
+        self.assertFalse(os.path.exists(self.path("out")))
+
+    def test_patch_removes_output_of_corrupt_delta(self):
+        old_path = self.path("old.bin", self.old)
+        delta, _ = Delta.make_delta(old_path, delta_remote.signature(old_path, 4096))
+        corrupt = {
+            "bad magic": b"X" + delta[1:],
+            "bad record": delta[: len(delta_remote.MAGIC) + 4] + b"?",
+            "truncated": delta[: len(delta) // 2],
+        }
+
+        for name, content in corrupt.items():
+            with self.subTest(name):
+                with self.assertRaises(Exception):
+                    delta_remote.patch(
+                        old_path,
+                        self.path("update.delta", content),
+                        self.path("out"),
+                        hashlib.sha256(self.old).hexdigest(),
+                    )
+                self.assertFalse(os.path.exists(self.path("out")))
+
+
+if __name__ == "__main__":
+    unittest.main()
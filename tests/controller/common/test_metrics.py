@@ -0,0 +1,140 @@
+# -*- coding:utf-8 -*-
+import io
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bond_controller_action.controller.common import stream
+from bond_controller_action.controller.action.common import response
+
+# 使用 controller 內部實際使用的 Metrics
+Metrics = stream.Metrics
+StreamTool = stream.StreamTool
+ResponseMethod = response.ResponseMethod
+
+
+@Metrics.instrument()
+def upload(dest, chunks):
+    out = io.BytesIO()
+    StreamTool.write_chunks(Metrics.timed_iter(chunks, "receive", "received"), out)
+    with Metrics.phase("zip"):
+        time.sleep(0.01)
+    Metrics.add_bytes("sent", 10)
+
+    return out.getvalue()
+
+
+@Metrics.instrument("outer")
+def outer(dest):
+    return upload(dest, [b"abc"])
+
+
+@Metrics.instrument()
+def broken(dest):
+    raise ValueError("boom")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"x" * 1000
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.records = []
+        Metrics.reset()
+        Metrics.enable(self.records.append)
+
+    def tearDown(self):
+        Metrics.disable()
+        Metrics.remove_callback(self.records.append)
+        Metrics.reset()
+
+    def test_disabled_is_noop(self):
+        Metrics.disable()
+        chunks = [b"a"]
+
+        self.assertEqual(upload("host", chunks), b"a")
+        self.assertIsNone(Metrics.current())
+        self.assertIs(Metrics.timed_iter(chunks, "receive"), chunks)
+        self.assertEqual(self.records, [])
+        self.assertNotIn("_calls_total{", Metrics.prometheus())
+
+    def test_phases_and_bytes(self):
+        self.assertEqual(upload("host", [b"ab", b"cd"]), b"abcd")
+
+        record = self.records[0]
+        self.assertEqual(record["operation"], "upload")
+        self.assertEqual(record["host"], "host")
+        self.assertIsNone(record["error"])
+        self.assertEqual(record["bytes"], {"sent": 10, "received": 4})
+        self.assertGreaterEqual(record["phases"]["zip"], 0.01)
+        self.assertIn("write", record["phases"])
+        self.assertIn("receive", record["phases"])
+        self.assertGreaterEqual(record["elapsed"], record["phases"]["zip"])
+
+    def test_nested_call_is_merged(self):
+        outer("host")
+
+        self.assertEqual([r["operation"] for r in self.records], ["upload", "outer"])
+        self.assertEqual(self.records[1]["bytes"], {"sent": 10, "received": 3})
+        self.assertIn("zip", self.records[1]["phases"])
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            broken("host")
+
+        self.assertIn("boom", self.records[0]["error"])
+        self.assertIsNone(Metrics.current())
+
+    def test_prometheus(self):
+        upload("host", [b"ab"])
+        upload("host", [b"cd"])
+        text = Metrics.prometheus()
+
+        self.assertIn(
+            'bond_controller_calls_total{operation="upload",status="ok"} 2', text
+        )
+        self.assertIn(
+            'bond_controller_call_seconds_bucket{operation="upload",le="+Inf"} 2', text
+        )
+        self.assertIn(
+            'bond_controller_phase_seconds_count{operation="upload",phase="zip"} 2',
+            text,
+        )
+        self.assertIn(
+            'bond_controller_transfer_bytes_total{operation="upload",direction="received"} 4',
+            text,
+        )
+        self.assertNotIn("host", text)
+
+    def test_http_phases(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics_test"
+
+        try:
+            text = Metrics.instrument("get")(ResponseMethod.get_text)(url)
+        finally:
+            server.shutdown()
+            server.server_close()
+            ResponseMethod.close_sessions(url)
+
+        record = self.records[0]
+        self.assertEqual(len(text), 1000)
+        self.assertEqual(record["bytes"]["received"], 1000)
+        self.assertGreater(record["bytes"]["sent"], 0)
+        for phase in ("connect", "send", "wait", "receive"):
+            self.assertIn(phase, record["phases"])
+
+
+if __name__ == "__main__":
+    unittest.main()
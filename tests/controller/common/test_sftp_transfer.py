@@ -0,0 +1,116 @@
+# -*- coding:utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from bond_controller_action.controller.common import sftp_transfer
+from bond_controller_action.controller.common.sftp_transfer import SFTPTransfer
+
+
+class LocalFile:
+    def __init__(self, path, mode):
+        self.file = open(path, mode)
+        self.pipelined = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.file.close()
+
+    def set_pipelined(self, pipelined=True):
+        self.pipelined = pipelined
+
+    def seek(self, offset):
+        self.file.seek(offset)
+
+    def write(self, data):
+        assert self.pipelined
+        self.file.write(data)
+
+
+class LocalSFTP:
+    """
+    以本機檔案系統模擬的 SFTPClient。
+    """
+
+    def __init__(self):
+        self.channel = mock.MagicMock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def open(self, path, mode):
+        return LocalFile(path, mode)
+
+    def stat(self, path):
+        return os.stat(path)
+
+    def get_channel(self):
+        return self.channel
+
+
+class TestSFTPTransfer(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.local = os.path.join(self.folder, "agent.bin")
+        self.content = os.urandom(3 * 1024 * 1024 + 17)
+        with open(self.local, "wb") as f:
+            f.write(self.content)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_upload(self):
+        progress = []
+        remote = os.path.join(self.folder, "remote.bin")
+
+        result = SFTPTransfer.upload(
+            LocalSFTP(),
+            self.local,
+            remote,
+            block_size=256 * 1024,
+            callback=lambda sent, total: progress.append((sent, total)),
+        )
+
+        self.assertEqual(self.read(remote), self.content)
+        self.assertEqual(result["bytes"], len(self.content))
+        self.assertEqual(progress[-1], (len(self.content), len(self.content)))
+
+    @mock.patch.object(sftp_transfer.setting, "SFTP_PARALLEL_MIN_CHUNK", 1024 * 1024)
+    def test_parallel_upload(self):
+        remote = os.path.join(self.folder, "remote.bin")
+
+        with mock.patch.object(SFTPTransfer, "open_sftp", return_value=LocalSFTP()):
+            SFTPTransfer.upload(LocalSFTP(), self.local, remote, parallel=4)
+            # 分段數受 SFTP_PARALLEL_MIN_CHUNK 限制
+            self.assertEqual(SFTPTransfer.open_sftp.call_count, 3)
+
+        self.assertEqual(self.read(remote), self.content)
+
+    def test_upload_files(self):
+        files = [
+            (self.local, os.path.join(self.folder, f"remote{index}.bin"))
+            for index in range(2)
+        ]
+
+        results = SFTPTransfer.upload_files(LocalSFTP(), files)
+
+        self.assertEqual(
+            [result["remote"] for result in results], [f[1] for f in files]
+        )
+        for _, remote in files:
+            self.assertEqual(self.read(remote), self.content)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+# -*- coding:utf-8 -*-
+import time
+import socket
+import unittest
+
+from bond_controller_action.controller.common.SSH import InteractiveSSH
+
+
+class FakeShell:
+    """
+    依序回傳 (延遲秒數, 資料) 的假 channel，資料用完後保持沒有輸出。
+    """
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.timeout = None
+        self.sent = []
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def recv(self, size):
+        if not self.chunks or (
+            self.timeout is not None and self.chunks[0][0] > self.timeout
+        ):
+            time.sleep(self.timeout or 0)
+            raise socket.timeout()
+
+        delay, data = self.chunks.pop(0)
+        time.sleep(delay)
+
+        return data
+
+
+class TestInteractiveSSH(unittest.TestCase):
+    def test_stop_on_prompt(self):
+        shell = FakeShell(
+            [(0, b"ls\r\n"), (0, b"a.txt " * 1000), (0, b"\r\nuser@host:~$ ")]
+        )
+
+        start = time.monotonic()
+        output = InteractiveSSH.read_until(shell, idle_timeout=5, timeout=10)
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(output.endswith("user@host:~$ "))
+        self.assertIn("a.txt " * 1000, output)
+
+    def test_stop_on_idle(self):
+        shell = FakeShell([(0, b"no prompt here"), (1, b"late")])
+
+        output = InteractiveSSH.read_until(shell, idle_timeout=0.1, timeout=10)
+
+        self.assertEqual(output, "no prompt here")
+
+    def test_stop_on_deadline(self):
+        shell = FakeShell([(0.1, b"."), (0.1, b"."), (0.1, b"."), (0.1, b".")])
+
+        output = InteractiveSSH.read_until(
+            shell, prompt=None, idle_timeout=None, timeout=0.25
+        )
+
+        self.assertLess(len(output), 4)
+
+    def test_share_session(self):
+        interactive = InteractiveSSH("10.0.0.1")
+        interactive.shell = FakeShell(
+            [(0, b"cd /tmp\r\n$ "), (0, b"pwd\r\n/tmp\r\n$ ")]
+        )
+
+        outputs = [interactive.execute("cd /tmp"), interactive.execute("pwd")]
+
+        self.assertEqual(interactive.shell.sent, ["cd /tmp\n", "pwd\n"])
+        self.assertIn("/tmp\r\n$ ", outputs[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
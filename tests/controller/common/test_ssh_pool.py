@@ -0,0 +1,110 @@
+# -*- coding:utf-8 -*-
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from bond_controller_action.controller.common import ssh_pool
+from bond_controller_action.controller.common.ssh_pool import SSHPool
+
+
+class TestSSHPool(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(ssh_pool.paramiko, "SSHClient")
+        self.SSHClient = patcher.start()
+        self.SSHClient.side_effect = lambda: mock.MagicMock()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        SSHPool.close()
+
+    def test_reuse_connection_per_host(self):
+        first = SSHPool.get_client("10.0.0.1", "id_rsa")
+        with SSHPool.connection("10.0.0.1", "id_rsa") as second:
+            self.assertIs(first, second)
+        other = SSHPool.get_client("10.0.0.1", "id_rsa", username="root")
+
+        self.assertIsNot(first, other)
+        self.assertEqual(SSHPool.size(), 2)
+        first.connect.assert_called_once()
+        first.get_transport().set_keepalive.assert_called_with(
+            ssh_pool.setting.SSH_KEEPALIVE_INTERVAL
+        )
+
+    def test_reconnect_broken_connection(self):
+        first = SSHPool.get_client("10.0.0.1", "id_rsa")
+        first.get_transport().is_active.return_value = False
+
+        second = SSHPool.get_client("10.0.0.1", "id_rsa")
+
+        self.assertIsNot(first, second)
+        first.close.assert_called_once()
+        self.assertEqual(SSHPool.size(), 1)
+
+    def test_concurrent_connect_shares_client(self):
+        clients = []
+
+        def slow_client():
+            client = mock.MagicMock()
+            client.connect.side_effect = lambda *args, **kwargs: time.sleep(0.1)
+            clients.append(client)
+            return client
+
+        self.SSHClient.side_effect = slow_client
+        with ThreadPoolExecutor(5) as executor:
+            results = list(
+                executor.map(
+                    lambda _: SSHPool.get_client("10.0.0.1", "id_rsa"), range(5)
+                )
+            )
+
+        self.assertEqual(len(clients), 1)
+        self.assertTrue(all(client is clients[0] for client in results))
+        self.assertEqual(SSHPool._connecting, {})
+
+    def test_connect_locks_are_pruned(self):
+        for i in range(10):
+            SSHPool.get_client(f"10.0.0.{i}", "id_rsa")
+
+        self.SSHClient.side_effect = lambda: mock.MagicMock(
+            **{"connect.side_effect": OSError("no route to host")}
+        )
+        with self.assertRaises(OSError):
+            SSHPool.get_client("10.0.1.1", "id_rsa")
+
+        self.assertEqual(SSHPool._connecting, {})
+
+    def test_evict_idle_connection(self):
+        with mock.patch.object(ssh_pool.setting, "SSH_IDLE_TIMEOUT", 10):
+            with SSHPool.connection("10.0.0.1") as client:
+                SSHPool._last_used[("10.0.0.1", 22, None, None)] -= 60
+                SSHPool.evict_idle()
+                # 借出中的連線不會被回收
+                self.assertEqual(SSHPool.size(), 1)
+
+            SSHPool._last_used[("10.0.0.1", 22, None, None)] -= 60
+            SSHPool.evict_idle()
+
+        self.assertEqual(SSHPool.size(), 0)
+        client.close.assert_called_once()
+
+    def test_open_sftp_is_not_evicted(self):
+        with mock.patch.object(
+            ssh_pool.setting, "SSH_IDLE_TIMEOUT", 10
+        ), mock.patch.object(ssh_pool.SFTPTransfer, "open_sftp") as open_sftp:
+            with SSHPool.open_sftp("10.0.0.1") as sftp:
+                SSHPool._last_used[("10.0.0.1", 22, None, None)] -= 60
+                SSHPool.evict_idle()
+                # SFTP 傳輸中的連線不會被回收
+                self.assertEqual(SSHPool.size(), 1)
+
+            SSHPool._last_used[("10.0.0.1", 22, None, None)] -= 60
+            SSHPool.evict_idle()
+
+        self.assertIs(sftp, open_sftp.return_value.__enter__.return_value)
+        open_sftp.return_value.__exit__.assert_called_once()
+        self.assertEqual(SSHPool.size(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# -*- coding:utf-8 -*-
+import os
+import io
+import json
+import base64
+import unittest
+
+from bond_controller_action.controller.common.stream import (
+    Base64StreamDecoder,
+    StreamTool,
+)
+
+
+def split(data, size):
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestBase64StreamDecoder(unittest.TestCase):
+    def test_decode_in_pieces(self):
+        raw = os.urandom(1000)
+        decoder = Base64StreamDecoder()
+
+        decoded = b"".join(decoder.decode(c) for c in split(base64.b64encode(raw), 7))
+        decoded += decoder.flush()
+
+        self.assertEqual(decoded, raw)
+
+    def test_decode_with_line_breaks(self):
+        raw = os.urandom(1000)
+        encoded = base64.encodebytes(raw).replace(b"/", b"\\/")
+        decoder = Base64StreamDecoder()
+
+        for size in (1, 5, 77, len(encoded)):
+            with self.subTest(chunk_size=size):
+                decoded = b"".join(decoder.decode(c) for c in split(encoded, size))
+                decoded += decoder.flush()
+
+                self.assertEqual(decoded, raw)
+
+
+class TestExtractJsonBase64(unittest.TestCase):
+    def test_extract_with_fields_around_value(self):
+        raw = os.urandom(4096)
+        body = json.dumps(
+            {
+                "status": "ok",
+                "file_base64": base64.b64encode(raw).decode(),
+                "filename": "evidence.bin",
+            }
+        ).encode()
+        progress = []
+
+        for size in (1, 3, 64, len(body)):
+            with self.subTest(chunk_size=size):
+                out = io.BytesIO()
+                fields = StreamTool.extract_json_base64(
+                    split(body, size),
+                    "file_base64",
+                    out,
+                    lambda done, total: progress.append(done),
+                )
+
+                self.assertEqual(out.getvalue(), raw)
+                self.assertEqual(fields["filename"], "evidence.bin")
+                self.assertEqual(fields["file_base64"], "")
+
+        self.assertEqual(progress[-1], len(raw))
+
+    def test_escaped_slash(self):
+        raw = b"\xff" * 30
+        encoded = base64.b64encode(raw).decode().replace("/", "\\/")
+        body = ('{"file_base64": "%s", "filename": "a"}' % encoded).encode()
+        out = io.BytesIO()
+
+        StreamTool.extract_json_base64(split(body, 5), "file_base64", out)
+
+        self.assertEqual(out.getvalue(), raw)
+
+    def test_missing_key(self):
+        with self.assertRaises(ValueError):
+            StreamTool.extract_json_base64(
+                [b'{"filename": "a"}'], "file_base64", io.BytesIO()
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
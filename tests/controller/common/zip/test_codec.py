@@ -0,0 +1,81 @@
+# -*- coding:utf-8 -*-
+import io
+import os
+import base64
+import shutil
+import zipfile
+import tempfile
+import unittest
+
+from unittest import mock
+
+from bond_controller_action.controller.common.zip.zip import ZipTool
+from bond_controller_action.controller.common.zip.codec import Codec
+from bond_controller_action.controller.common.zip.cache import ArchiveCache
+
+
+class TestCodec(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        with open(os.path.join(self.folder, "main.py"), "wb") as f:
+            f.write(b"print('hello')\n" * 1000)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        ArchiveCache.clear()
+        Codec.clear()
+
+    def test_parse(self):
+        self.assertEqual(Codec.parse("deflate"), ("deflate", 6))
+        self.assertEqual(Codec.parse("deflate:1"), ("deflate", 1))
+        self.assertEqual(Codec.normalize("store"), "store")
+        self.assertEqual(Codec.normalize("zstd"), "zstd:3")
+        self.assertRaises(ValueError, Codec.parse, "brotli")
+
+    def test_zip_members(self):
+        for codec, compress_type in (
+            ("store", zipfile.ZIP_STORED),
+            ("deflate:1", zipfile.ZIP_DEFLATED),
+        ):
+            data = base64.b64decode(ZipTool.zip_dir(self.folder, codec=codec))
+            with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+                self.assertEqual(zipf.getinfo("main.py").compress_type, compress_type)
+
+    def test_framed_roundtrip(self):
+        for codec in sorted(set(Codec.FRAMED) & Codec.installed()):
+            with self.subTest(codec=codec):
+                data = base64.b64decode(ZipTool.zip_dir(self.folder, codec=codec))
+                streamed = b"".join(ZipTool.zip_dir_stream(self.folder, codec=codec))
+
+                for archive in (data, streamed):
+                    archive = Codec.decompress(archive, codec)
+                    with zipfile.ZipFile(io.BytesIO(archive)) as zipf:
+                        self.assertEqual(
+                            zipf.read("main.py"), b"print('hello')\n" * 1000
+                        )
+
+    def test_choose(self):
+        with mock.patch.dict(
+            Codec._profiles,
+            {
+                "store": (float("inf"), 1.0),
+                "deflate:6": (20 * 1024 * 1024, 0.3),
+                "lz4:0": (500 * 1024 * 1024, 0.5),
+            },
+            clear=True,
+        ):
+            # 尚未量測時使用預設值
+            self.assertEqual(Codec.choose("lan"), "deflate:6")
+
+            Codec.record_link("lan", 100 * 1024 * 1024, 1)
+            Codec.record_link("wan", 1024 * 1024, 1)
+            self.assertEqual(Codec.choose("lan"), "store")
+            self.assertEqual(Codec.choose("wan"), "deflate:6")
+            if "lz4" in Codec.installed():
+                self.assertEqual(
+                    Codec.choose("lan", ("store", "deflate", "lz4")), "lz4:0"
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
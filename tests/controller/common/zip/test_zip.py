@@ -0,0 +1,148 @@
+# -*- coding:utf-8 -*-
+import io
+import os
+import base64
+import random
+import shutil
+import threading
+import zipfile
+import tempfile
+import unittest
+
+from unittest import mock
+
+from bond_controller_action.controller.common.zip.zip import ZipTool
+from bond_controller_action.controller.common.zip.cache import ArchiveCache
+
+
+class TestZipTool(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.files = {
+            "main.py": b"print('hello')\n" * 100,
+            os.path.join("pkg", "data.bin"): os.urandom(300_000),
+            os.path.join("pkg", "empty.txt"): b"",
+        }
+        for relative_path, content in self.files.items():
+            path = os.path.join(self.folder, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(content)
+        os.makedirs(os.path.join(self.folder, "__pycache__"))
+        with open(os.path.join(self.folder, "__pycache__", "main.pyc"), "wb") as f:
+            f.write(b"cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        ArchiveCache.clear()
+
+    def assertArchive(self, data):
+        with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual(
+                {name: zipf.read(name) for name in zipf.namelist()},
+                {path.replace(os.sep, "/"): c for path, c in self.files.items()},
+            )
+
+    def test_zip_dir(self):
+        self.assertArchive(base64.b64decode(ZipTool.zip_dir(self.folder)))
+
+    def test_zip_dir_parallel(self):
+        self.files["logo.png"] = os.urandom(50_000)
+        with open(os.path.join(self.folder, "logo.png"), "wb") as f:
+            f.write(self.files["logo.png"])
+
+        parallel = base64.b64decode(
+            ZipTool.zip_dir(self.folder, use_cache=False, parallel=True)
+        )
+        serial = base64.b64decode(
+            ZipTool.zip_dir(self.folder, use_cache=False, parallel=False)
+        )
+
+        self.assertArchive(parallel)
+        self.assertArchive(serial)
+        for data in (parallel, serial):
+            with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+                self.assertEqual(
+                    zipf.getinfo("logo.png").compress_type, zipfile.ZIP_STORED
+                )
+                self.assertEqual(
+                    zipf.getinfo("main.py").compress_type, zipfile.ZIP_DEFLATED
+                )
+
+    def test_zip_dir_stream(self):
+        chunks = list(ZipTool.zip_dir_stream(self.folder, chunk_size=16 * 1024))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), 64 * 1024)
+        self.assertArchive(b"".join(chunks))
+
+    def test_zip_dir_stream_level(self):
+        rand = random.Random(0)
+        words = [b"bond", b"agent", b"controller", b"zip", b"stream"]
+        self.files["words.txt"] = b" ".join(rand.choice(words) for _ in range(50_000))
+        with open(os.path.join(self.folder, "words.txt"), "wb") as f:
+            f.write(self.files["words.txt"])
+
+        fast = b"".join(ZipTool.zip_dir_stream(self.folder, codec="deflate:1"))
+        best = b"".join(ZipTool.zip_dir_stream(self.folder, codec="deflate:9"))
+
+        self.assertArchive(fast)
+        self.assertArchive(best)
+        self.assertLess(len(best), len(fast))
+
+    def test_zip_dir_stream_close_stops_writer(self):
+        stream = ZipTool.zip_dir_stream(self.folder, chunk_size=1024)
+        next(stream)
+        stream.close()
+
+        names = [thread.name for thread in threading.enumerate()]
+        self.assertNotIn("bond-zip-stream", names)
+
+    def test_zip_dir_stream_error(self):
+        with mock.patch.object(
+            ZipTool, "_walk_and_zip", side_effect=OSError("disk error")
+        ):
+            with self.assertRaisesRegex(OSError, "disk error"):
+                list(ZipTool.zip_dir_stream(self.folder))
+
+    def test_zip_dir_cache(self):
+        with mock.patch.object(
+            ZipTool, "_zip_dir_base64", wraps=ZipTool._zip_dir_base64
+        ) as build:
+            first = ZipTool.zip_dir(self.folder)
+            second = ZipTool.zip_dir(self.folder)
+            self.assertIs(first, second)
+            self.assertEqual(build.call_count, 1)
+
+            self.files["main.py"] = b"print('changed')\n"
+            with open(os.path.join(self.folder, "main.py"), "wb") as f:
+                f.write(self.files["main.py"])
+            self.assertArchive(base64.b64decode(ZipTool.zip_dir(self.folder)))
+            self.assertEqual(build.call_count, 2)
+
+    def test_zip_dir_cache_build_error(self):
+        key = "0" * 64
+
+        with mock.patch.object(ArchiveCache, "_load_from_disk", return_value=None):
+            with self.assertRaisesRegex(OSError, "disk error"):
+                ArchiveCache.get_or_build(
+                    key, mock.Mock(side_effect=OSError("disk error"))
+                )
+
+        self.assertNotIn(key, ArchiveCache._building)
+
+    def test_zip_changed_files_only(self):
+        manifest = ZipTool.file_manifest(self.folder)
+        self.assertEqual(set(manifest), {"main.py", "pkg/data.bin", "pkg/empty.txt"})
+
+        data = base64.b64decode(ZipTool.zip_files(self.folder, ["pkg/data.bin"]))
+        with zipfile.ZipFile(io.BytesIO(data)) as zipf:
+            self.assertEqual(zipf.namelist(), ["pkg/data.bin"])
+
+        self.assertTrue(ZipTool.is_excluded("__pycache__/main.pyc"))
+        self.assertFalse(ZipTool.is_excluded("pkg/data.bin"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+# -*- coding:utf-8 -*-
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+HEAVY_MODULES = ["paramiko", "requests", "termcolor", "aiohttp"]
+
+SCRIPT = """
+import sys, json
+import controller
+print(json.dumps({
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+class TestImport(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def run_python(self, code):
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        output = subprocess.check_output(
+            [sys.executable, "-c", code], cwd=self.folder, env=env
+        )
+        return json.loads(output)
+
+    def test_import_is_lazy(self):
+        result = self.run_python(SCRIPT % HEAVY_MODULES)
+
+        self.assertEqual(result["loaded"], [])
+        # import 時不應建立 Logs 目錄
+        self.assertEqual(os.listdir(self.folder), [])
+
+    def test_logger_level_before_first_log(self):
+        result = self.run_python(
+            "import json\n"
+            "from controller.common.logger.info_logger_handle import Logger\n"
+            "Logger.info_logger.setLevel('WARNING')\n"
+            "created = bool(__import__('os').listdir('.'))\n"
+            "Logger.info('hidden')\n"
+            "print(json.dumps({'created': created,"
+            " 'level': Logger.info_logger.getEffectiveLevel()}))"
+        )
+
+        # 設定等級不會建立 log 檔，第一次寫 log 時也不會覆蓋呼叫端的設定
+        self.assertFalse(result["created"])
+        self.assertEqual(result["level"], 30)
+
+    def test_concurrent_flush(self):
+        result = self.run_python(
+            "import json, time, threading\n"
+            "from controller.action_config import setting\n"
+            "from controller.common.logger.info_logger_handle import Logger\n"
+            "setting.INFO_LOG_ASYNC = True\n"
+            "from controller.common.logger import queue_handler\n"
+            "Listener = queue_handler.BoundedQueueListener\n"
+            "stop = Listener.stop\n"
+            # 拉長 stop 與 start 之間的空檔，讓競爭情況穩定出現
+            "Listener.stop = lambda self: (stop(self), time.sleep(0.01))\n"
+            "errors = []\n"
+            "def work():\n"
+            "    try:\n"
+            "        for i in range(10):\n"
+            "            Logger.info(str(i))\n"
+            "            Logger.flush()\n"
+            "    except Exception as e:\n"
+            "        errors.append(repr(e))\n"
+            "threads = [threading.Thread(target=work) for _ in range(8)]\n"
+            "[t.start() for t in threads]\n"
+            "[t.join() for t in threads]\n"
+            "Logger.shutdown()\n"
+            "print(json.dumps({'errors': errors}))"
+        )
+
+        # 多個執行緒同時 flush 不會操作到已停止的 listener
+        self.assertEqual(result["errors"], [])
+
+    def test_lazy_attributes(self):
+        result = self.run_python(
+            "import sys, json\n"
+            "from controller import SERVER\n"
+            "print(json.dumps({'server': SERVER.__name__,"
+            " 'paramiko': 'paramiko' in sys.modules}))"
+        )
+
+        self.assertEqual(result["server"], "Server_Action")
+        self.assertTrue(result["paramiko"])
+
+    def test_unknown_attribute(self):
+        import bond_controller_action.controller as controller
+
+        self.assertIn("SERVER", dir(controller))
+        with self.assertRaises(AttributeError):
+            controller.NOT_AN_ACTION
+
+
+if __name__ == "__main__":
+    unittest.main()